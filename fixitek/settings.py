@@ -49,6 +49,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'services.middleware.ReplicaPinMiddleware',
+    'services.middleware.QueryCountMiddleware',
 ]
 
 ROOT_URLCONF = 'fixitek.urls'
@@ -86,6 +88,17 @@ DATABASES = {
     }
 }
 
+# Read replica
+# Reads of the catalog and order history go to this alias when it is defined in DATABASES
+# (see services.db_routers). After a write, a client stays on the primary for
+# SERVICES_REPLICA_PIN_SECONDS so it reads its own writes, and catalog cache entries of the
+# changed models are rebuilt from the primary for as long (see services.cache.filling).
+
+DATABASE_ROUTERS = ['services.db_routers.ReadReplicaRouter']
+SERVICES_READ_REPLICA_ALIAS = 'replica'
+SERVICES_REPLICA_PIN_COOKIE = 'replica_pin'
+SERVICES_REPLICA_PIN_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -123,12 +136,124 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Media files
+# Uploads are stored once per distinct content under MEDIA_ROOT/cas/ and served with
+# immutable caching headers, see services.storage.ContentAddressedStorage. Resized
+# derivatives keep names derived from their source and use the plain file system storage;
+# they can be regenerated in place, so they are cached for SERVICES_DERIVATIVE_MAX_AGE
+# seconds only.
+
+MEDIA_ROOT = BASE_DIR / 'media'
+MEDIA_URL = '/media/'
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'services.storage.ContentAddressedStorage',
+    },
+    'derivatives': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
+# Resized derivatives generated in the background for every image uploaded through
+# services.help_functions.upload_to_service, exposed by the serializers as *_srcset maps.
+SERVICES_IMAGE_WIDTHS = (320, 640, 1280)
+SERVICES_IMAGE_FORMATS = ('webp', 'jpeg')
+SERVICES_IMAGE_QUALITY = 80
+SERVICES_IMAGE_WORKERS = 2
+SERVICES_DERIVATIVE_MAX_AGE = 60 * 60 * 24
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Cache alias used for catalog responses, facet tables and option prices. LocMem is per
+# process, point this at a shared backend (file, database, Redis, Memcached) when running
+# several workers. The cache versions of catalog models live in this cache too, and a
+# save only bumps them in the process that made it: with LocMem, the other workers keep
+# serving their cached catalog responses and facet counts until SERVICES_CATALOG_CACHE_TIMEOUT
+# expires them. Option prices are not affected, their versions are stored in the database.
+SERVICES_CATALOG_CACHE = 'default'
+SERVICES_CATALOG_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Carts idle for longer than this, without an order, are deleted by the purge_carts command.
+SERVICES_CART_TTL_DAYS = 30
+
+# Responses to writes sent with an Idempotency-Key header are replayed to retries for this many
+# seconds, then deleted by the purge_idempotency_keys command. A key whose first request has not
+# finished after SERVICES_IDEMPOTENCY_LOCK_TIMEOUT seconds can be claimed again.
+SERVICES_IDEMPOTENCY_TTL = 60 * 60 * 24
+SERVICES_IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+
+# Query counting
+# Per-request query counts are logged by services.middleware.QueryCountMiddleware and
+# checked against these budgets, keyed by URL name. services.testing.assert_query_budget
+# enforces them in tests. Writes sent with an Idempotency-Key header may run
+# SERVICES_IDEMPOTENCY_QUERY_BUDGET more queries to claim the key and store the response.
+# Only requests over their budget are logged (at WARNING); set the services.queries logger to
+# INFO, e.g. in a local settings module, to log the query report of every request.
+
+SERVICES_QUERY_HEADERS = DEBUG
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'services.queries': {'handlers': ['console'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+SERVICES_QUERY_BUDGETS = {
+    'service-category-list': 2,
+    'service-category-detail': 2,
+    'tv-mounting-option-list': 2,
+    'furniture-assembly-option-list': 2,
+    'installation-service-option-list': 2,
+    'gazebo-service-option-list': 2,
+    'catalog-list': 2,
+    'cart-list': 8,
+    'cart-detail': 8,
+    'cart-items-list': 7,
+    'order-list': 8,
+    'order-detail': 8,
+    'orderitem-list': 7,
+    'cart-checkout': 18,
+    'order-pay': 5,
+    'order-cancel': 5,
+    'order-complete': 5,
+    'order-bulk-transition': 6,
+    'quote': 4,
+    'category-tree': 5,
+    'service-list': 5,
+    'search': 5,
+    'tv-mounting-option-facets': 1,
+    'furniture-assembly-option-facets': 4,
+    'installation-service-option-facets': 2,
+    'gazebo-service-option-facets': 2,
+    'async-service-category-list': 1,
+    'async-option-list': 1,
+    'async-cart-detail': 8,
+    'async-order-detail': 6,
+}
+SERVICES_IDEMPOTENCY_QUERY_BUDGET = 3
+
+
 REST_FRAMEWORK = {
     'COERCE_DECIMAL_TO_STRING': False,
 }
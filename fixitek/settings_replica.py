@@ -0,0 +1,23 @@
+"""
+Settings for trying the read-replica routing locally with two SQLite databases:
+
+    python manage.py migrate --settings=fixitek.settings_replica
+    python manage.py migrate --database=replica --settings=fixitek.settings_replica
+
+SQLite does not replicate, so copy db.sqlite3 over db_replica.sqlite3 to "catch up" the replica.
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {'MIRROR': 'default'},
+    },
+}
@@ -0,0 +1,25 @@
+"""
+Settings for running fixitek on SQLite instead of Postgres, e.g. for local benchmarks:
+
+    python manage.py benchmark_endpoints --settings=fixitek.settings_sqlite
+    python manage.py runserver --settings=fixitek.settings_sqlite
+    python manage.py loadtest --settings=fixitek.settings_sqlite
+"""
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+# Transactions take SQLite's write lock when they begin (BEGIN IMMEDIATE) and wait up to
+# 'timeout' seconds for it. With the default deferred transactions, the read-then-write
+# transactions of checkout and cart adds fail with "database is locked" under concurrent load
+# instead of queueing.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,
+        },
+    }
+}
@@ -16,8 +16,10 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+from services.views import content_addressed_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('media/cas/<path:path>', content_addressed_media, name='content-addressed-media'),
     path('services/', include('services.urls'))
 ]
@@ -1,11 +1,105 @@
 from django.contrib import admin
+from django.contrib.contenttypes.models import ContentType
+from django.forms.models import BaseInlineFormSet
 from django.utils.translation import gettext_lazy as _
 from . import models
+from .pagination import EstimatedCountPaginator
+from .serializers import resolve_service_options
 
 # Register your models here.
 admin.sites.site.site_header = "Fixitek Services"
 
 
+class PriceRangeFilter(admin.SimpleListFilter):
+    """
+    Filters service options by price bucket instead of listing every distinct price.
+    """
+    title = _('price')
+    parameter_name = 'price_range'
+    ranges = ((None, 50), (50, 100), (100, 250), (250, 500), (500, None))
+
+    def lookups(self, request, model_admin):
+        choices = []
+        for low, high in self.ranges:
+            if low is None:
+                choices.append((f'-{high}', _('Under %(high)s') % {'high': high}))
+            elif high is None:
+                choices.append((f'{low}-', _('%(low)s and over') % {'low': low}))
+            else:
+                choices.append((f'{low}-{high}', f'{low} – {high}'))
+        return choices
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        low, _sep, high = self.value().partition('-')
+        if low:
+            queryset = queryset.filter(price__gte=low)
+        if high:
+            queryset = queryset.filter(price__lt=high)
+        return queryset
+
+
+class ServiceOptionItemFormSet(BaseInlineFormSet):
+    """
+    Inline formset for CartItem/OrderItem that resolves every item's service option in bulk.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        resolve_service_options(queryset)
+        for item in queryset:
+            # Saves a query per row when an item is rendered with its cart/order.
+            self.fk.set_cached_value(item, self.instance)
+        return queryset
+
+
+class ServiceOptionItemInline(admin.TabularInline):
+    formset = ServiceOptionItemFormSet
+    extra = 0
+    readonly_fields = ('service_option_title',)
+
+    @admin.display(description=_('Service option'))
+    def service_option_title(self, obj):
+        return getattr(obj.service_option, 'title', '-')
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name != 'content_type':
+            return super().formfield_for_foreignkey(db_field, request, **kwargs)
+        content_types = ContentType.objects.get_for_models(*models.SERVICE_OPTION_MODELS).values()
+        kwargs['queryset'] = ContentType.objects.filter(pk__in=[content_type.pk for content_type in content_types])
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        # Fixed choices from the ContentType cache, instead of one query per inline form.
+        field.choices = [('', field.empty_label), *((content_type.pk, str(content_type)) for content_type in content_types)]
+        return field
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist settings for tables with millions of rows: estimated counts, no full count.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+class ServiceOptionItemAdmin(LargeTableAdmin):
+    """
+    Changelist of CartItem/OrderItem resolving the service options of a page in bulk.
+    """
+    list_select_related = ('content_type',)
+    date_hierarchy = 'created_at'
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        resolve_service_options(changelist.result_list)
+        return changelist
+
+    @admin.display(description=_('Service option'))
+    def service_option_title(self, obj):
+        return getattr(obj.service_option, 'title', '-')
+
+
 @admin.register(models.ServiceCategory)
 class ServiceCategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'description', 'created_at')
@@ -17,7 +111,7 @@ class ServiceCategoryAdmin(admin.ModelAdmin):
 class TVMountingOptionAdmin(admin.ModelAdmin):
     list_display = ['title', 'needs',
                     'bracket', 'wall_type', 'quantity', 'price', 'needs_moving_help', 'moving_help_charge']
-    list_filter = ['needs', 'bracket', 'wall_type', 'price']
+    list_filter = ['needs', 'bracket', 'wall_type', PriceRangeFilter]
     search_fields = ['title']
 
 
@@ -25,16 +119,18 @@ class TVMountingOptionAdmin(admin.ModelAdmin):
 class FurnitureAssemblyOptionAdmin(admin.ModelAdmin):
     list_display = ['title', 'location',
                     'needs_moving_help', 'quantity', 'price']
-    list_filter = ['location', 'service_type', 'needs_moving_help']
-    search_fields = ['title', 'service_type']
+    list_filter = ['location', 'service_type', 'needs_moving_help', PriceRangeFilter]
+    list_select_related = ['location']
+    search_fields = ['title', 'service_type__name']
 
 
 @admin.register(models.InstallationServiceOption)
 class InstallationServiceOptionAdmin(admin.ModelAdmin):
     list_display = ['title', 'installation_type',
                     'location', 'power_nearby', 'quantity', 'price']
-    list_filter = ['installation_type', 'location', 'power_nearby']
-    search_fields = ['title', 'installation_type']
+    list_filter = ['installation_type', 'location', 'power_nearby', PriceRangeFilter]
+    list_select_related = ['installation_type']
+    search_fields = ['title', 'installation_type__name']
 
 
 @admin.register(models.GazeboServiceOption)
@@ -42,8 +138,9 @@ class GazeboServiceOptionAdmin(admin.ModelAdmin):
     list_display = ['title',
                     'gazebo_model', 'size', 'quantity', 'price', 'needs_moving_help', 'anchoring',
                     'related_image', 'moving_help_charge']
-    list_filter = ['gazebo_model', 'size']
-    search_fields = ['title', 'gazebo_model']
+    list_filter = ['gazebo_model', 'size', PriceRangeFilter]
+    list_select_related = ['gazebo_model']
+    search_fields = ['title', 'gazebo_model__name']
 
 
 @admin.register(models.GazeboModel)
@@ -74,3 +171,53 @@ class ServiceTypeAdmin(admin.ModelAdmin):
 class AssemblyTypeAdmin(admin.ModelAdmin):
     list_display = ('name',)
     search_fields = ('name',)
+
+
+class CartItemInline(ServiceOptionItemInline):
+    model = models.CartItem
+    fields = ('content_type', 'object_id', 'service_option_title', 'quantity')
+
+
+@admin.register(models.Cart)
+class CartAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'created_at', 'updated_at')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
+    date_hierarchy = 'created_at'
+    search_fields = ('=id', '=user__username', '=user__email')
+    inlines = [CartItemInline]
+
+
+@admin.register(models.CartItem)
+class CartItemAdmin(ServiceOptionItemAdmin):
+    list_display = ('id', 'cart', 'content_type', 'object_id', 'service_option_title', 'quantity', 'created_at')
+    list_select_related = ('content_type', 'cart__user')
+    raw_id_fields = ('cart',)
+    search_fields = ('=cart__id',)
+
+
+class OrderItemInline(ServiceOptionItemInline):
+    model = models.OrderItem
+    fields = ('content_type', 'object_id', 'service_option_title', 'quantity', 'price')
+
+
+@admin.register(models.Order)
+class OrderAdmin(LargeTableAdmin):
+    list_display = ('id', 'user', 'guest_email', 'status', 'total_price', 'created_at')
+    list_select_related = ('user',)
+    list_filter = ('status',)
+    autocomplete_fields = ('user',)
+    raw_id_fields = ('cart',)
+    date_hierarchy = 'created_at'
+    search_fields = ('=id', '=user__username', '=guest_email', '=guest_phone')
+    readonly_fields = ('created_at', 'updated_at')
+    inlines = [OrderItemInline]
+
+
+@admin.register(models.OrderItem)
+class OrderItemAdmin(ServiceOptionItemAdmin):
+    list_display = ('id', 'order', 'content_type', 'object_id', 'service_option_title', 'quantity', 'price',
+                    'created_at')
+    list_select_related = ('content_type', 'order__user')
+    raw_id_fields = ('order',)
+    search_fields = ('=order__id',)
@@ -0,0 +1,71 @@
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse
+from rest_framework.renderers import JSONRenderer
+from .fieldsets import optimize_queryset
+from .models import (Cart, FurnitureAssemblyOption, GazeboServiceOption, InstallationServiceOption,
+                     Order, ServiceCategory, TVMountingOption)
+from .serializers import (SERVICE_OPTION_SERIALIZERS, CartSerializer, OrderSerializer,
+                          ServiceCategorySerializer, aresolve_service_options)
+
+# Async read-only counterparts of the catalog, cart and order endpoints, meant to be served by
+# fixitek.asgi so that a worker keeps handling requests while it waits on the database.
+
+OPTION_MODELS = {
+    'tv-mounting-options': TVMountingOption,
+    'furniture-assembly-options': FurnitureAssemblyOption,
+    'installation-service-options': InstallationServiceOption,
+    'gazebo-service-options': GazeboServiceOption,
+}
+CHUNK_SIZE = 500
+
+
+def render(data):
+    # JSONRenderer keeps the output identical to the DRF endpoints (e.g. decimals as numbers).
+    return HttpResponse(JSONRenderer().render(data), content_type='application/json')
+
+
+async def option_list(request, kind):
+    model = OPTION_MODELS.get(kind)
+    if model is None:
+        raise Http404
+    serializer = SERVICE_OPTION_SERIALIZERS[model](context={'request': request})
+    queryset = optimize_queryset(model.objects.order_by('pk'), serializer)
+    options = [option async for option in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+    return render(SERVICE_OPTION_SERIALIZERS[model](options, many=True, context={'request': request}).data)
+
+
+async def category_list(request):
+    categories = [category async for category in ServiceCategory.objects.order_by('pk').aiterator(chunk_size=CHUNK_SIZE)]
+    return render(ServiceCategorySerializer(categories, many=True, context={'request': request}).data)
+
+
+async def category_detail(request, pk):
+    try:
+        category = await ServiceCategory.objects.aget(pk=pk)
+    except ServiceCategory.DoesNotExist:
+        raise Http404
+    return render(ServiceCategorySerializer(category, context={'request': request}).data)
+
+
+async def render_container(serializer, queryset, pk):
+    # Loads a Cart/Order with what ``serializer`` renders, resolving the options of its items up front
+    # since the serializer cannot query the database from here.
+    try:
+        serializer.instance = await optimize_queryset(queryset, serializer).aget(pk=pk)
+    except queryset.model.DoesNotExist:
+        raise Http404
+    items = serializer.fields.get('items')
+    queryset_for = items.child.get_option_queryset_for() if items is not None else None
+    if queryset_for is not None:
+        await aresolve_service_options(serializer.instance.items.all(), queryset_for)
+    if items is not None:
+        await sync_to_async(items.child.resolve_unit_prices)(serializer.instance.items.all())
+    return render(serializer.data)
+
+
+async def cart_detail(request, pk):
+    return await render_container(CartSerializer(context={'request': request}), Cart.objects.all(), pk)
+
+
+async def order_detail(request, pk):
+    return await render_container(OrderSerializer(context={'request': request}), Order.objects.all(), pk)
@@ -0,0 +1,71 @@
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from .middleware import QueryRecorder
+
+
+@contextmanager
+def benchmark_database(verbosity=0):
+    """
+    Runs the block against a throwaway test database (in memory on SQLite), leaving real data untouched.
+    """
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        teardown_test_environment()
+
+
+def percentile(values, pct):
+    if len(values) == 1:
+        return values[0]
+    return statistics.quantiles(values, n=100, method='inclusive')[pct - 1]
+
+
+def summarize(timings):
+    """
+    Returns the p50/p95/p99/mean of a list of durations in seconds, in milliseconds.
+    """
+    return {
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'p99_ms': round(percentile(timings, 99) * 1000, 3),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+    }
+
+
+def measure(request, iterations, before=None):
+    """
+    Calls ``request()`` ``iterations`` times and returns latency percentiles, the largest
+    query count seen and the peak Python memory allocated by one extra traced call.
+
+    ``before`` runs ahead of every call, outside of the measurement.
+    """
+    timings, query_counts = [], []
+    for _ in range(iterations):
+        if before is not None:
+            before()
+        with QueryRecorder() as recorder:
+            start = time.perf_counter()
+            response = request()
+            timings.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f'Benchmark request failed with status {response.status_code}: {response.content[:500]!r}')
+        query_counts.append(recorder.count)
+
+    if before is not None:
+        before()
+    tracemalloc.start()
+    try:
+        request()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {**summarize(timings), 'queries': max(query_counts), 'peak_memory_kb': round(peak_memory / 1024, 1)}
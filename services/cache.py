@@ -0,0 +1,163 @@
+import hashlib
+import time
+from contextlib import nullcontext
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+from .db_routers import get_replica_alias, pin_to_primary
+
+KEY_PREFIX = 'services:catalog'
+
+
+def get_catalog_cache():
+    """
+    Returns the cache backend configured by ``SERVICES_CATALOG_CACHE`` (any Django cache alias).
+    """
+    return caches[getattr(settings, 'SERVICES_CATALOG_CACHE', 'default')]
+
+
+def _version_key(model):
+    return f'{KEY_PREFIX}:version:{model._meta.label_lower}'
+
+
+def _bumped_key(model):
+    return f'{KEY_PREFIX}:bumped:{model._meta.label_lower}'
+
+
+def get_versions(models):
+    """
+    Returns the current cache version of every model in ``models``.
+
+    Versions start from a timestamp rather than 1 so that a version evicted from the
+    cache can never be re-issued and resurrect entries built from older data.
+    """
+    cache = get_catalog_cache()
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_version(model):
+    """
+    Invalidates every cached response that depends on ``model``.
+    """
+    cache = get_catalog_cache()
+    key = _version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+    if get_replica_alias() is not None:
+        cache.set(_bumped_key(model), True, timeout=getattr(settings, 'SERVICES_REPLICA_PIN_SECONDS', 5))
+
+
+def filling(dependencies):
+    """
+    Returns the context to build a cache entry depending on ``dependencies`` in.
+
+    For ``SERVICES_REPLICA_PIN_SECONDS`` after any of them is bumped, reads are pinned to the
+    primary: the replica may not have caught up yet, and its old rows would be cached under the
+    new version.
+    """
+    if get_replica_alias() is None or not get_catalog_cache().get_many([_bumped_key(model) for model in dependencies]):
+        return nullcontext()
+    return pin_to_primary()
+
+
+def _record(basename, outcome):
+    cache = get_catalog_cache()
+    key = f'{KEY_PREFIX}:stats:{basename}:{outcome}'
+    if not cache.add(key, 1, timeout=None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, timeout=None)
+
+
+def catalog_cache_stats(basenames):
+    """
+    Returns the hit/miss counters of the cached catalog endpoints.
+    """
+    cache = get_catalog_cache()
+    keys = {
+        (basename, outcome): f'{KEY_PREFIX}:stats:{basename}:{outcome}'
+        for basename in basenames for outcome in ('hits', 'misses')
+    }
+    values = cache.get_many(keys.values())
+    return {
+        basename: {outcome: values.get(keys[(basename, outcome)], 0) for outcome in ('hits', 'misses')}
+        for basename in basenames
+    }
+
+
+def catalog_cache_key(basename, request, dependencies):
+    versions = '.'.join(str(version) for version in get_versions(dependencies))
+    # Responses embed absolute URLs, so the host is part of the key along with the query string.
+    # The versions are hashed too, keeping keys of views with many dependencies short enough for
+    # memcached.
+    request_hash = hashlib.md5(
+        f'{versions}:{request.get_host()}{request.get_full_path()}'.encode('utf-8'), usedforsecurity=False).hexdigest()
+    return f'{KEY_PREFIX}:{basename}:{request_hash}'
+
+
+def cached_response(view, request, build, *args, **kwargs):
+    """
+    Serves ``build(request, *args, **kwargs)`` from the catalog cache when possible.
+
+    Only successful responses are cached. The key carries the versions of the view's
+    ``cache_dependencies``, so saving or deleting any of those models (see
+    ``services.signals``) makes the affected entries unreachable. Right after such a change,
+    responses are built from the primary, see ``filling``.
+    """
+    cache = get_catalog_cache()
+    key = catalog_cache_key(view.basename, request, view.cache_dependencies)
+    data = cache.get(key)
+    if data is not None:
+        _record(view.basename, 'hits')
+        return Response(data, headers={'X-Cache': 'HIT'})
+
+    with filling(view.cache_dependencies):
+        response = build(request, *args, **kwargs)
+    _record(view.basename, 'misses')
+    if response.status_code == 200:
+        cache.set(key, response.data, timeout=getattr(settings, 'SERVICES_CATALOG_CACHE_TIMEOUT', 60 * 60 * 6))
+    response['X-Cache'] = 'MISS'
+    return response
+
+
+def cached_value(basename, request, dependencies, build):
+    """
+    Returns ``build()``, served from the catalog cache under the versions of ``dependencies``.
+
+    The plain-data counterpart of ``cached_response``, for views that do not return a DRF Response.
+    """
+    cache = get_catalog_cache()
+    key = catalog_cache_key(basename, request, dependencies)
+    value = cache.get(key)
+    if value is not None:
+        _record(basename, 'hits')
+        return value
+    with filling(dependencies):
+        value = build()
+    _record(basename, 'misses')
+    cache.set(key, value, timeout=getattr(settings, 'SERVICES_CATALOG_CACHE_TIMEOUT', 60 * 60 * 6))
+    return value
+
+
+class CachedCatalogMixin:
+    """
+    Caches the list and retrieve responses of read-mostly catalog viewsets.
+
+    Set ``cache_dependencies`` to every model whose data ends up in the response.
+    """
+    cache_dependencies = ()
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(self, request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(self, request, super().retrieve, *args, **kwargs)
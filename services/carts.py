@@ -0,0 +1,110 @@
+from collections import defaultdict
+from django.db import connections, router, transaction
+from django.db.models import Exists, F, OuterRef
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from .models import Cart, CartItem, Order
+from .pricing import line_total, option_prices
+
+
+def add_cart_items(cart_pk, entries):
+    """
+    Adds many service options to a cart at once and returns the affected CartItems.
+
+    ``entries`` are dicts with ``content_type``, ``object_id`` and ``quantity``. Every option
+    reference is checked and priced by ``option_prices``. Quantities are added to the items
+    already in the cart by a single ``INSERT ... ON CONFLICT DO UPDATE`` whose conflict clause
+    does the increment, so no increment is lost to a concurrent writer, see ``upsert_cart_items``.
+    The cart row is locked, like every CartItem write does, and the stored cart totals are
+    adjusted in the same ``UPDATE`` that touches the cart. Prices are read once the lock is held,
+    so a price change committed while waiting for it is the one added to the totals.
+    """
+    quantities = defaultdict(int)
+    for entry in entries:
+        quantities[entry['content_type'], entry['object_id']] += entry['quantity']
+
+    db = router.db_for_write(CartItem)
+    with transaction.atomic(using=db):
+        cart = get_object_or_404(Cart.objects.using(db).select_for_update(), pk=cart_pk)
+        prices = option_prices(quantities)
+        existing = set(CartItem.objects.using(db).filter(cart=cart).values_list('content_type_id', 'object_id'))
+        upsert_cart_items(cart, quantities, using=db)
+        Cart.objects.using(db).filter(pk=cart.pk).update(
+            updated_at=timezone.now(),
+            item_count=F('item_count') + len(quantities.keys() - existing),
+            subtotal=F('subtotal') + sum(line_total(prices[key][0], quantity) for key, quantity in quantities.items()),
+        )
+
+    return [item for item in CartItem.objects.using(db).filter(cart=cart).order_by('pk')
+            if (item.content_type_id, item.object_id) in quantities]
+
+
+def upsert_cart_items(cart, quantities, using):
+    """
+    Inserts the ``{(content_type_id, object_id): quantity}`` items into ``cart``, adding the
+    quantities of the items already there in SQL (``quantity = quantity + excluded.quantity``)
+    rather than from a value read beforehand.
+    """
+    connection = connections[using]
+    opts = CartItem._meta
+    quote = connection.ops.quote_name
+    fields = [opts.get_field(name) for name in ('cart', 'content_type', 'object_id', 'quantity', 'created_at',
+                                                 'updated_at')]
+    now = timezone.now()
+    params = []
+    for (content_type_id, object_id), quantity in quantities.items():
+        for field, value in zip(fields, (cart.pk, content_type_id, object_id, quantity, now, now)):
+            params.append(field.get_db_prep_save(value, connection))
+    table, columns = quote(opts.db_table), ', '.join(quote(field.column) for field in fields)
+    row = f'({", ".join(["%s"] * len(fields))})'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) VALUES {", ".join([row] * len(quantities))} '
+            f'ON CONFLICT ({", ".join(quote(field.column) for field in fields[:3])}) DO UPDATE SET '
+            f'{quote("quantity")} = {table}.{quote("quantity")} + EXCLUDED.{quote("quantity")}, '
+            f'{quote("updated_at")} = EXCLUDED.{quote("updated_at")}',
+            params,
+        )
+
+
+def abandoned_carts(cutoff):
+    """
+    Carts idle since ``cutoff``: neither the cart nor any of its items changed after it, and no
+    order was placed from it.
+    """
+    return Cart.objects.filter(updated_at__lt=cutoff).exclude(
+        Exists(Order.objects.filter(cart=OuterRef('pk')))
+    ).exclude(
+        Exists(CartItem.objects.filter(cart=OuterRef('pk'), updated_at__gte=cutoff))
+    )
+
+
+def purge_abandoned_carts(cutoff, batch_size=1000):
+    """
+    Deletes the carts returned by ``abandoned_carts(cutoff)`` and their items, oldest first, and
+    yields ``(carts, items)`` deleted per batch.
+
+    Each batch is its own transaction: a page of the ``updated_at`` index is locked, skipping
+    carts locked by a checkout or a bulk add, and deleted with two plain ``DELETE ... WHERE
+    ... IN (...)`` statements instead of the ORM's cascade collection. Nothing else points at
+    carts that have no order, and no signal is sent.
+    """
+    db = router.db_for_write(Cart)
+    connection = connections[db]
+    item_table, cart_table = CartItem._meta.db_table, Cart._meta.db_table
+    while True:
+        with transaction.atomic(using=db):
+            batch = abandoned_carts(cutoff).using(db).order_by('updated_at')
+            if connection.features.has_select_for_update_skip_locked:
+                batch = batch.select_for_update(skip_locked=True, of=('self',))
+            ids = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return
+            ids = [Cart._meta.pk.get_db_prep_value(pk, connection) for pk in ids]
+            placeholders = ', '.join(['%s'] * len(ids))
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {item_table} WHERE cart_id IN ({placeholders})', ids)
+                items = cursor.rowcount
+                cursor.execute(f'DELETE FROM {cart_table} WHERE id IN ({placeholders})', ids)
+                carts = cursor.rowcount
+        yield carts, items
@@ -0,0 +1,42 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from .models import SERVICE_OPTION_MODELS, ZERO
+
+# Columns shared by every BaseServiceOption table, selected in the same order by every UNION branch.
+CATALOG_FIELDS = (
+    'id', 'category_id', 'title', 'description', 'related_image', 'price', 'quantity',
+    'needs_moving_help', 'moving_help_charge',
+)
+
+# Sort keys exposed to clients, mapped to the annotation that is compared by the cursor.
+CATALOG_ORDERINGS = {
+    'price': 'sort_price',
+    'title': 'sort_title',
+}
+
+
+def catalog_branch(model, category=None, min_price=None, max_price=None):
+    """
+    Returns the ``values()`` queryset of one option table projected onto the catalog columns.
+    """
+    queryset = model.objects.all()
+    if category is not None:
+        queryset = queryset.filter(category_id=category)
+    if min_price is not None:
+        queryset = queryset.filter(price__gte=min_price)
+    if max_price is not None:
+        queryset = queryset.filter(price__lte=max_price)
+    content_type = ContentType.objects.get_for_model(model)
+    return queryset.annotate(
+        type=Value(model._meta.model_name, output_field=models.CharField()),
+        content_type=Value(content_type.pk, output_field=models.IntegerField()),
+        unit_price=model.unit_price_expression(),
+        sort_price=Coalesce('price', ZERO, output_field=models.DecimalField(max_digits=10, decimal_places=2)),
+        sort_title=Coalesce('title', Value(''), output_field=models.CharField()),
+    ).values(*CATALOG_FIELDS, 'type', 'content_type', 'unit_price', 'sort_price', 'sort_title')
+
+
+def catalog_branches(**filters):
+    return [catalog_branch(model, **filters) for model in SERVICE_OPTION_MODELS]
@@ -0,0 +1,45 @@
+from decimal import Decimal
+from django.db import transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .models import Cart, CartItem, Order, OrderItem
+from .pricing import line_total, option_prices
+
+
+def checkout_cart(cart_pk):
+    """
+    Turns a cart into an order in a single transaction and returns the order.
+
+    The cart row is locked for the duration of the checkout. Options are priced in one batch by
+    ``option_prices``, like quotes and cart adds, and the prices are snapshotted onto bulk-created
+    OrderItems. The total is computed server-side and the cart is emptied.
+    """
+    with transaction.atomic():
+        cart = get_object_or_404(Cart.objects.select_for_update(), pk=cart_pk)
+        items = list(CartItem.objects.filter(cart=cart).order_by('pk'))
+        if not items:
+            raise ValidationError({'detail': 'Cart is empty.'})
+
+        prices = option_prices({(item.content_type_id, item.object_id) for item in items}, raise_exception=False)
+        unavailable = [item.pk for item in items if (item.content_type_id, item.object_id) not in prices]
+        if unavailable:
+            raise ValidationError({'detail': 'Some cart items are no longer available.', 'items': unavailable})
+
+        order_items = [
+            OrderItem(content_type_id=item.content_type_id, object_id=item.object_id, quantity=item.quantity,
+                      price=prices[item.content_type_id, item.object_id][0])
+            for item in items
+        ]
+        order = Order.objects.create(
+            user_id=cart.user_id,
+            cart=cart,
+            total_price=sum((line_total(item.price, item.quantity) for item in order_items), Decimal('0.00')),
+        )
+        for order_item in order_items:
+            order_item.order = order
+        OrderItem.objects.bulk_create(order_items)
+        # The cart is emptied, so its totals are reset directly instead of adjusted per item.
+        CartItem._base_manager.filter(cart=cart).delete()
+        Cart.objects.filter(pk=cart.pk).update(item_count=0, subtotal=0, updated_at=timezone.now())
+    return order
@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# Models whose reads may be served by the replica: the catalog and the order history. Carts and
+# everything else always use the primary.
+REPLICA_MODELS = {
+    'services.servicecategory',
+    'services.tvmountingoption',
+    'services.furnitureassemblyoption',
+    'services.installationserviceoption',
+    'services.gazeboserviceoption',
+    'services.gazebomodel',
+    'services.installationtype',
+    'services.location',
+    'services.servicetype',
+    'services.assemblytype',
+    'services.searchentry',
+    'services.order',
+    'services.orderitem',
+}
+
+_pinned = ContextVar('services_primary_pinned', default=False)
+
+
+def get_replica_alias():
+    alias = getattr(settings, 'SERVICES_READ_REPLICA_ALIAS', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def is_pinned():
+    return _pinned.get()
+
+
+@contextmanager
+def pin_to_primary():
+    """
+    Sends every read in the block to the primary, e.g. to read back data that was just written.
+    """
+    token = _pinned.set(True)
+    try:
+        yield
+    finally:
+        _pinned.reset(token)
+
+
+class ReadReplicaRouter:
+    """
+    Routes reads of the catalog and order history models to ``SERVICES_READ_REPLICA_ALIAS``.
+
+    Reads stay on the primary while pinned (see ``pin_to_primary`` and
+    ``services.middleware.ReplicaPinMiddleware``) and inside a transaction on the primary, so
+    that a request never misses its own writes. Writes always go to the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        alias = get_replica_alias()
+        if alias is None or model._meta.label_lower not in REPLICA_MODELS or is_pinned():
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Instances read from the replica carry its alias; without this, saving them would target it.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, get_replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
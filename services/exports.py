@@ -0,0 +1,123 @@
+import csv
+from collections import defaultdict
+from itertools import islice
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import OrderItem
+from .pricing import line_total
+
+ORDER_FIELDS = ('id', 'created_at', 'status', 'user_id', 'user__username', 'guest_name', 'guest_email',
+                'guest_phone', 'total_price')
+ITEM_FIELDS = ('id', 'order_id', 'content_type_id', 'object_id', 'quantity', 'price')
+CSV_COLUMNS = ('order_id', 'created_at', 'status', 'user_id', 'username', 'guest_name', 'guest_email',
+               'guest_phone', 'order_total', 'item_id', 'service_type', 'object_id', 'title', 'quantity',
+               'unit_price', 'line_total')
+EXPORT_CHUNK_SIZE = 2000
+
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _option_titles(items):
+    # One query per option type in the chunk, loading only the titles.
+    ids = defaultdict(set)
+    for item in items:
+        ids[item['content_type_id']].add(item['object_id'])
+    titles = {}
+    for content_type_id, object_ids in ids.items():
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        if model is None:
+            continue
+        for pk, title in model._default_manager.filter(pk__in=object_ids).values_list('pk', 'title'):
+            titles[content_type_id, pk] = title
+    return titles
+
+
+def export_orders(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields every order of ``queryset`` as a dict with its items and their option titles.
+
+    Orders are read with a server-side cursor and handled ``chunk_size`` at a time: the items
+    and titles of a chunk are loaded with one query per table, so memory use depends on the
+    chunk size rather than on the size of the export.
+    """
+    orders = (
+        queryset.order_by('created_at', 'id')
+        .values(*ORDER_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in _chunks(orders, chunk_size):
+        items = list(
+            OrderItem.objects.filter(order_id__in=[order['id'] for order in chunk])
+            .order_by('order_id', 'id')
+            .values(*ITEM_FIELDS)
+        )
+        titles = _option_titles(items)
+        type_names = {
+            content_type_id: ContentType.objects.get_for_id(content_type_id).model
+            for content_type_id in {item['content_type_id'] for item in items}
+        }
+        items_by_order = defaultdict(list)
+        for item in items:
+            items_by_order[item['order_id']].append({
+                'id': item['id'],
+                'service_type': type_names[item['content_type_id']],
+                'object_id': item['object_id'],
+                'title': titles.get((item['content_type_id'], item['object_id'])),
+                'quantity': item['quantity'],
+                'unit_price': item['price'],
+                'line_total': line_total(item['price'], item['quantity']),
+            })
+        for order in chunk:
+            yield {
+                'id': order['id'],
+                'created_at': order['created_at'],
+                'status': order['status'],
+                'user_id': order['user_id'],
+                'username': order['user__username'],
+                'guest_name': order['guest_name'],
+                'guest_email': order['guest_email'],
+                'guest_phone': order['guest_phone'],
+                'total_price': order['total_price'],
+                'items': items_by_order[order['id']],
+            }
+
+
+class _Echo:
+    # File-like object handing back what csv.writer writes, to stream its rows.
+    def write(self, value):
+        return value
+
+
+def iter_csv(orders):
+    """
+    Encodes exported orders as CSV lines, one row per item (orders without items get one row).
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_COLUMNS)
+    for order in orders:
+        head = [order['id'], order['created_at'].isoformat(), order['status'], order['user_id'], order['username'],
+                order['guest_name'], order['guest_email'], order['guest_phone'], order['total_price']]
+        if not order['items']:
+            yield writer.writerow(head + [None] * 7)
+        for item in order['items']:
+            yield writer.writerow(head + [item['id'], item['service_type'], item['object_id'], item['title'],
+                                          item['quantity'], item['unit_price'], item['line_total']])
+
+
+def iter_ndjson(orders):
+    """
+    Encodes exported orders as newline-delimited JSON, one order with its items per line.
+    """
+    encoder = DjangoJSONEncoder()
+    for order in orders:
+        yield encoder.encode(order) + '\n'
+
+
+EXPORT_FORMATS = {
+    'csv': (iter_csv, 'text/csv'),
+    'ndjson': (iter_ndjson, 'application/x-ndjson'),
+}
@@ -0,0 +1,145 @@
+from collections import defaultdict
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Count
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from .cache import KEY_PREFIX, filling, get_catalog_cache, get_versions
+from .models import FurnitureAssemblyOption, GazeboServiceOption, InstallationServiceOption, TVMountingOption
+
+# Fields offered as filters of each option type, each with the number of options per value.
+OPTION_FACETS = {
+    TVMountingOption: ('wall_type', 'bracket', 'needs'),
+    FurnitureAssemblyOption: ('location', 'service_type', 'assembly_type'),
+    InstallationServiceOption: ('installation_type', 'power_nearby'),
+    GazeboServiceOption: ('size', 'action', 'gazebo_model'),
+}
+
+
+def facet_fields(model):
+    return [model._meta.get_field(name) for name in OPTION_FACETS[model]]
+
+
+def parse_facet_filters(model, query_params):
+    """
+    Returns the facet filters of ``query_params`` as ``{facet: set of values}``.
+
+    A facet takes several comma separated values and matches any of them, e.g.
+    ``?wall_type=CONCRETE,STONE&bracket=FLAT``; relations are filtered by primary key.
+    """
+    filters, errors = {}, {}
+    for field in facet_fields(model):
+        raw = query_params.get(field.name)
+        if not raw:
+            continue
+        values = set()
+        for part in filter(None, (part.strip() for part in raw.split(','))):
+            try:
+                value = (field.target_field if field.is_relation else field).to_python(part)
+            except DjangoValidationError:
+                value = None
+            if value is None or (field.choices and value not in dict(field.flatchoices)):
+                errors.setdefault(field.name, []).append(f'"{part}" is not a valid choice.')
+                continue
+            values.add(value)
+        if values:
+            filters[field.name] = values
+    if errors:
+        raise ValidationError(errors)
+    return filters
+
+
+def filter_by_facets(queryset, filters):
+    model = queryset.model
+    for name, values in filters.items():
+        queryset = queryset.filter(**{f'{model._meta.get_field(name).attname}__in': values})
+    return queryset
+
+
+def facet_table(model):
+    """
+    Returns the number of options of ``model`` for every combination of facet values, and the
+    labels of those values.
+
+    The combinations come from one grouped aggregate query. The table is cached under the
+    versions of ``model`` and of the models its facets point to, so it is rebuilt after any of
+    them is saved or deleted (see ``services.signals``), from the primary right after the change
+    (see ``services.cache.filling``). Those versions are kept in the catalog
+    cache: with a per-process backend such as LocMem, other processes only see a change once
+    their copy of the table expires (see ``SERVICES_CATALOG_CACHE`` in the settings).
+    """
+    fields = facet_fields(model)
+    dependencies = [model, *dict.fromkeys(field.related_model for field in fields if field.is_relation)]
+    cache = get_catalog_cache()
+    versions = '.'.join(str(version) for version in get_versions(dependencies))
+    key = f'{KEY_PREFIX}:facets:{model._meta.label_lower}:{versions}'
+    table = cache.get(key)
+    if table is None:
+        with filling(dependencies):
+            columns = [field.attname for field in fields]
+            combinations = [
+                (tuple(row[column] for column in columns), row['count'])
+                for row in model.objects.order_by().values(*columns).annotate(count=Count('pk'))
+            ]
+            labels = {}
+            for index, field in enumerate(fields):
+                if field.is_relation:
+                    present = {values[index] for values, _ in combinations} - {None}
+                    objects = field.related_model._default_manager.in_bulk(present)
+                    labels[field.name] = {pk: str(obj)
+                                          for pk, obj in sorted(objects.items(), key=lambda item: str(item[1]))}
+                else:
+                    labels[field.name] = {value: str(label) for value, label in field.flatchoices}
+            table = {'combinations': combinations, 'labels': labels}
+        cache.set(key, table, timeout=getattr(settings, 'SERVICES_CATALOG_CACHE_TIMEOUT', 60 * 60 * 6))
+    return table
+
+
+def facet_counts(model, filters):
+    """
+    Returns the number of options of ``model`` matching ``filters`` and, for every facet value,
+    the number of options that selecting it would give.
+
+    As usual for facets, the counts of a facet ignore the filter on that facet itself, so the
+    other values of a facet stay visible once one is selected. Everything is computed from
+    ``facet_table``, so changing the filters costs no query.
+    """
+    table = facet_table(model)
+    names = OPTION_FACETS[model]
+    total, counts = 0, {name: defaultdict(int) for name in names}
+    for values, count in table['combinations']:
+        misses = [name for name, value in zip(names, values) if name in filters and value not in filters[name]]
+        if not misses:
+            total += count
+        for name, value in zip(names, values):
+            if not misses or misses == [name]:
+                counts[name][value] += count
+    return {
+        'count': total,
+        'facets': {
+            name: [
+                {'value': value, 'label': label, 'count': counts[name][value], 'selected': value in filters.get(name, ())}
+                for value, label in table['labels'][name].items()
+            ]
+            for name in names
+        },
+    }
+
+
+class FacetFilterMixin:
+    """
+    Option ViewSet mixin filtering the list by the facets of its model, and adding a ``facets/``
+    endpoint that counts the options per facet value under the same filters.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action != 'list':
+            return queryset
+        return filter_by_facets(queryset, parse_facet_filters(queryset.model, self.request.query_params))
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        model = self.queryset.model
+        return Response(facet_counts(model, parse_facet_filters(model, request.query_params)))
@@ -0,0 +1,155 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+
+def _parse(value):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    return {part.strip() for part in value if part.strip()}
+
+
+def field_selection(context):
+    """
+    Returns the ``(fields, expand)`` sets of dotted paths requested for a serializer tree.
+
+    Values in the serializer context take precedence over the ``fields``/``expand`` query
+    parameters of the request. ``fields`` is None when every field is requested, ``expand`` when
+    every relation is.
+    """
+    request = context.get('request')
+    params = getattr(request, 'query_params', getattr(request, 'GET', {}))
+    fields = context['fields'] if 'fields' in context else params.get('fields')
+    expand = context['expand'] if 'expand' in context else params.get('expand')
+    return _parse(fields), _parse(expand)
+
+
+def field_path(serializer):
+    """
+    Returns the dotted path of a serializer from the root of its tree, e.g. ``items.service_option``.
+    """
+    names = []
+    node = serializer
+    while node is not None:
+        if getattr(node, 'field_name', None):
+            names.append(node.field_name)
+        node = node.parent
+    return '.'.join(reversed(names))
+
+
+def _prefix(serializer, name=None):
+    path = '.'.join(part for part in (field_path(serializer), name) if part)
+    return f'{path}.' if path else ''
+
+
+def nested_context(serializer, name):
+    """
+    Context for a serializer built by hand to render the field ``name`` of ``serializer``, with
+    the requested fields and expansions made relative to it.
+    """
+    fields, expand = field_selection(serializer.context)
+    prefix = _prefix(serializer, name)
+    return {
+        **serializer.context,
+        'fields': None if fields is None else {path[len(prefix):] for path in fields if path.startswith(prefix)},
+        'expand': None if expand is None else {path[len(prefix):] for path in expand if path.startswith(prefix)},
+    }
+
+
+class DynamicFieldsMixin:
+    """
+    Serializer mixin for sparse fieldsets and opt-in narrowing of embedded relations.
+
+    ``?fields=id,title,items.quantity`` keeps only the listed fields, dotted paths reaching into
+    nested serializers. Relations are embedded by default; ``?expand=location,items.service_option``
+    keeps only the listed ones embedded, the other relations of ``Meta.collapsed_fields``
+    (``{name: (field_class, kwargs)}``, or ``{name: None}``) are then rendered by the given field,
+    typically their primary key, or left out.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        only, expand = field_selection(self.context)
+        prefix = _prefix(self)
+        if expand is not None:
+            for name, collapsed in getattr(getattr(self, 'Meta', None), 'collapsed_fields', {}).items():
+                if name not in fields or prefix + name in expand:
+                    continue
+                if collapsed is None:
+                    del fields[name]
+                else:
+                    field_class, kwargs = collapsed
+                    fields[name] = field_class(**kwargs)
+        if only is not None:
+            selected = {path[len(prefix):].split('.')[0] for path in only if path.startswith(prefix)}
+            if selected:
+                fields = {name: field for name, field in fields.items() if name in selected or field.write_only}
+        return fields
+
+
+def optimize_queryset(queryset, serializer, required=()):
+    """
+    Restricts ``queryset`` to what ``serializer`` renders.
+
+    Loads only the primary key and the columns of the selected fields (plus ``required``), joins the relations of
+    expanded nested serializers and prefetches nested lists with a queryset optimized the same
+    way, in the model's ordering or else by primary key. Fields computed by methods declare the
+    lookups they read in ``Meta.field_dependencies``;
+    a forward relation named there is joined, its ``attname`` only loads the column. A method
+    field without declared dependencies could read any column, so the columns are then not
+    restricted rather than loaded one query per object on access.
+    """
+    opts = queryset.model._meta
+    dependencies = getattr(getattr(serializer, 'Meta', None), 'field_dependencies', {})
+    only, related, prefetches = {opts.pk.name, *required}, set(), []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == '*' and name not in dependencies:
+            only = None
+        lookups = dependencies.get(name, () if field.source == '*' else (field.source_attrs[0],))
+        for lookup in lookups:
+            try:
+                model_field = opts.get_field(lookup)
+            except FieldDoesNotExist:
+                # Annotations and properties.
+                continue
+            if model_field.one_to_many and isinstance(field, ListSerializer):
+                child_queryset = optimize_queryset(model_field.related_model._default_manager.all(), field.child,
+                                                   required=(model_field.field.name,))
+                if not child_queryset.ordered:
+                    child_queryset = child_queryset.order_by('pk')
+                prefetches.append(Prefetch(lookup, queryset=child_queryset))
+            elif model_field.concrete and model_field.is_relation and lookup == model_field.name and (
+                    name in dependencies or isinstance(field, BaseSerializer)):
+                related.add(lookup)
+                if only is not None:
+                    only.add(lookup)
+            elif model_field.concrete and only is not None:
+                only.add(lookup)
+    if only is not None:
+        queryset = queryset.only(*only)
+    if related:
+        queryset = queryset.select_related(*related)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
+
+
+class SparseFieldsMixin:
+    """
+    ViewSet mixin restricting the queryset of reads to the ``?fields=``/``?expand=`` of the request.
+
+    The fields the paginator orders by are always loaded, its cursors are built from them.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+        ordering = getattr(self.paginator, 'ordering', ()) if self.paginator is not None else ()
+        return optimize_queryset(queryset, self.get_serializer(),
+                                 required=[field.lstrip('-') for field in ordering])
@@ -1,7 +1,8 @@
 def upload_to_service(instance, filename):
     from datetime import datetime
-    import re
-    
+
+    # Only the extension matters with the content-addressed storage, the directory keeps
+    # uploads readable with any other storage. Avoid instance.category: categories,
+    # gazebo models and installation types have none, and it costs a query.
     date_path = datetime.now().strftime('%Y/%m/%d')
-    category = re.sub(r'[^\w\-]', '_', str(instance.category.name))
-    return f"services/{category}/{date_path}/{filename}"
\ No newline at end of file
+    return f"services/{instance._meta.model_name}/{date_path}/{filename}"
\ No newline at end of file
@@ -0,0 +1,177 @@
+import hashlib
+import json
+import zlib
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.http.request import RawPostDataException
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class IdempotencyConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'A request with this Idempotency-Key is still in progress, retry later.'
+    default_code = 'conflict'
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = 'This Idempotency-Key was already used with a different request body.'
+    default_code = 'idempotency_key_reused'
+
+
+class IdempotentReplay(Exception):
+    """
+    Raised when a request repeats a completed one; carries the stored response.
+    """
+
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+def idempotency_scope(request):
+    """
+    Returns who an Idempotency-Key belongs to: the authenticated user, else the ``guest_email``
+    of the request body, else anonymous clients as a whole.
+
+    A ``user`` in the body is not trusted: an anonymous client naming a user would otherwise
+    share that user's keys and could replay their stored responses.
+    """
+    if request.user and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    data = request.data if hasattr(request.data, 'get') else {}
+    if data.get('guest_email'):
+        return f'guest:{str(data["guest_email"]).strip().lower()}'
+    return 'anonymous'
+
+
+def key_digest(key, scope, method, path):
+    return hashlib.sha256('\0'.join((scope, method, path, key)).encode('utf-8')).digest()
+
+
+def request_fingerprint(request):
+    """
+    Returns a short hash of the request body, telling a retry from a different request sent with
+    the same key.
+    """
+    try:
+        body = request.body
+    except RawPostDataException:
+        # The stream was already consumed, e.g. by a CSRF check of a form post: hash the parsed data.
+        body = json.dumps(request.data, cls=JSONEncoder, sort_keys=True).encode('utf-8')
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+def stored_response(row):
+    data = json.loads(zlib.decompress(row.response)) if row.response else None
+    return Response(data, status=row.status_code, headers={REPLAYED_HEADER: 'true'})
+
+
+def claim_key(digest, fingerprint):
+    """
+    Reserves ``digest`` for the current request and returns the claimed row.
+
+    The claim is an INSERT into the primary key, so of concurrent duplicates exactly one wins; the
+    others find its row and get IdempotencyConflict while it runs, or IdempotentReplay once its
+    response is stored. Claims past ``expires_at`` (stale locks and expired responses) are
+    replaced. Raises IdempotencyKeyReused if the key was used for a different request body.
+    """
+    alias = router.db_for_write(IdempotencyKey)
+    lock_timeout = getattr(settings, 'SERVICES_IDEMPOTENCY_LOCK_TIMEOUT', 60)
+    for _ in range(2):
+        now = timezone.now()
+        row = IdempotencyKey.objects.using(alias).filter(key=digest).first()
+        if row is not None and row.expires_at <= now:
+            IdempotencyKey.objects.using(alias).filter(key=digest, expires_at__lte=now).delete()
+            row = None
+        if row is None:
+            try:
+                with transaction.atomic(using=alias):
+                    return IdempotencyKey.objects.using(alias).create(
+                        key=digest, fingerprint=fingerprint, expires_at=now + timedelta(seconds=lock_timeout))
+            except IntegrityError:
+                # A concurrent duplicate claimed the key first: look at its row.
+                continue
+        if bytes(row.fingerprint) != fingerprint:
+            raise IdempotencyKeyReused()
+        if row.status_code is None:
+            raise IdempotencyConflict()
+        raise IdempotentReplay(stored_response(row))
+    raise IdempotencyConflict()
+
+
+def store_response(claim, response):
+    """
+    Stores ``response`` under ``claim`` for ``SERVICES_IDEMPOTENCY_TTL`` seconds.
+
+    Server errors are not stored: the claim is released so that a retry runs the request again.
+    """
+    queryset = IdempotencyKey.objects.using(router.db_for_write(IdempotencyKey)).filter(key=claim.key)
+    if response.status_code >= 500:
+        queryset.delete()
+        return
+    body = None
+    if response.data is not None:
+        body = zlib.compress(json.dumps(response.data, cls=JSONEncoder, separators=(',', ':')).encode('utf-8'))
+    queryset.update(
+        status_code=response.status_code, response=body,
+        expires_at=timezone.now() + timedelta(seconds=getattr(settings, 'SERVICES_IDEMPOTENCY_TTL', 60 * 60 * 24)),
+    )
+
+
+def release_key(claim):
+    IdempotencyKey.objects.using(router.db_for_write(IdempotencyKey)).filter(key=claim.key).delete()
+
+
+class IdempotentMixin:
+    """
+    ViewSet mixin making write requests safe to retry with an ``Idempotency-Key`` header.
+
+    The first request with a given key, scoped to its user or guest email and its endpoint, runs
+    normally and its response is stored; repeats get the stored response back, marked with an
+    ``Idempotent-Replayed`` header, without running the view again.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.idempotency_claim = None
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None or request.method in SAFE_METHODS:
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({IDEMPOTENCY_HEADER: [f'Must be 1 to {MAX_KEY_LENGTH} characters long.']})
+        # The raw body is read before the parsers consume the stream, which keeps it cached.
+        fingerprint = request_fingerprint(request)
+        digest = key_digest(key, idempotency_scope(request), request.method, request.path)
+        self.idempotency_claim = claim_key(digest, fingerprint)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, IdempotentReplay):
+            return exc.response
+        try:
+            return super().handle_exception(exc)
+        except Exception:
+            # Unhandled errors never reach finalize_response: free the key for a retry.
+            if getattr(self, 'idempotency_claim', None) is not None:
+                release_key(self.idempotency_claim)
+                self.idempotency_claim = None
+            raise
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        claim = getattr(self, 'idempotency_claim', None)
+        if claim is not None:
+            self.idempotency_claim = None
+            store_response(claim, response)
+        return response
@@ -0,0 +1,205 @@
+import hashlib
+import io
+import logging
+import posixpath
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, storages
+from django.db import models, transaction
+from PIL import Image, ImageOps
+from .cache import KEY_PREFIX, get_catalog_cache
+from .help_functions import upload_to_service
+
+logger = logging.getLogger(__name__)
+
+# Pillow format names of the derivative formats, keyed by the name used in URLs and srcset maps.
+PIL_FORMATS = {'webp': 'WEBP', 'jpeg': 'JPEG'}
+EXTENSIONS = {'webp': 'webp', 'jpeg': 'jpg'}
+# Seconds an incomplete set of derivatives is remembered, until the pool finishes writing them.
+PENDING_DERIVATIVES_TIMEOUT = 60
+DERIVATIVE_NAME = re.compile(r'__w\d+\.(?:%s)$' % '|'.join(map(re.escape, EXTENSIONS.values())))
+
+_executor = None
+_in_flight = set()
+_in_flight_lock = threading.Lock()
+
+
+def get_widths():
+    return tuple(getattr(settings, 'SERVICES_IMAGE_WIDTHS', (320, 640, 1280)))
+
+
+def get_formats():
+    return tuple(getattr(settings, 'SERVICES_IMAGE_FORMATS', ('webp', 'jpeg')))
+
+
+def get_derivative_storage(storage):
+    """
+    Returns where the derivatives of images kept in ``storage`` are written.
+
+    Derivative names are computed from the original name, so they go to the
+    ``derivatives`` storage when one is configured, e.g. next to a content-addressed
+    default storage that would otherwise rename them.
+    """
+    if 'derivatives' in settings.STORAGES:
+        return storages['derivatives']
+    return storage
+
+
+def service_image_fields(model):
+    """
+    Returns the image fields of ``model`` whose uploads go through ``upload_to_service``.
+    """
+    return [field for field in model._meta.concrete_fields
+            if isinstance(field, models.ImageField) and field.upload_to is upload_to_service]
+
+
+def derivative_name(name, width, image_format):
+    """
+    Returns the storage name of the ``width`` pixels wide ``image_format`` derivative of ``name``.
+    """
+    root, _ = posixpath.splitext(name)
+    return f'{root}__w{width}.{EXTENSIONS[image_format]}'
+
+
+def is_derivative_name(name):
+    """
+    Tells whether ``name`` is the name of a derivative rather than of an uploaded image.
+    """
+    return DERIVATIVE_NAME.search(name) is not None
+
+
+def _derivatives_key(name):
+    return f'{KEY_PREFIX}:derivatives:{hashlib.md5(name.encode("utf-8"), usedforsecurity=False).hexdigest()}'
+
+
+def _store_derivatives(name, storage):
+    available = frozenset((image_format, width) for image_format in get_formats() for width in get_widths()
+                          if storage.exists(derivative_name(name, width, image_format)))
+    complete = len(available) == len(get_formats()) * len(get_widths())
+    timeout = getattr(settings, 'SERVICES_CATALOG_CACHE_TIMEOUT', 60 * 60 * 6) if complete \
+        else PENDING_DERIVATIVES_TIMEOUT
+    get_catalog_cache().set(_derivatives_key(name), available, timeout=timeout)
+    return available
+
+
+def existing_derivatives(name, storage=None):
+    """
+    Returns the ``(format, width)`` derivatives of ``name`` that have been written.
+
+    ``generate_derivatives`` records them in the catalog cache, so serializing an image costs a
+    cache read rather than a storage lookup per derivative. They are only looked up in storage
+    when the cache has no record, e.g. in another process with a per-process cache.
+    """
+    available = get_catalog_cache().get(_derivatives_key(name))
+    if available is None:
+        available = _store_derivatives(name, get_derivative_storage(storage or default_storage))
+    return available
+
+
+def generate_derivatives(name, storage=None, overwrite=False):
+    """
+    Writes the resized derivatives of the stored image ``name`` and returns their names.
+
+    Images are never upscaled, and derivatives that already exist are skipped unless
+    ``overwrite`` is set, so the function can safely be re-run. The derivatives available
+    afterwards are recorded for ``existing_derivatives``.
+    """
+    source_storage = storage or default_storage
+    storage = get_derivative_storage(source_storage)
+    targets = [(width, image_format, derivative_name(name, width, image_format))
+               for width in get_widths() for image_format in get_formats()]
+    if not overwrite:
+        targets = [target for target in targets if not storage.exists(target[2])]
+    if not targets:
+        _store_derivatives(name, storage)
+        return []
+
+    with source_storage.open(name, 'rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+
+    created = []
+    quality = getattr(settings, 'SERVICES_IMAGE_QUALITY', 80)
+    for width, image_format, target in targets:
+        resized = image.copy()
+        resized.thumbnail((width, width * 10), Image.Resampling.LANCZOS)
+        if image_format == 'jpeg' and resized.mode not in ('RGB', 'L'):
+            resized = resized.convert('RGB')
+        buffer = io.BytesIO()
+        resized.save(buffer, PIL_FORMATS[image_format], quality=quality)
+        if storage.exists(target):
+            if not overwrite:
+                continue  # Written concurrently by another worker.
+            storage.delete(target)
+        saved = storage.save(target, ContentFile(buffer.getvalue()))
+        if saved != target:
+            # Lost a race with another process, keep the name the srcset points to.
+            storage.delete(saved)
+            continue
+        created.append(saved)
+    _store_derivatives(name, storage)
+    return created
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'SERVICES_IMAGE_WORKERS', 2),
+                                       thread_name_prefix='image-derivatives')
+    return _executor
+
+
+def _generate_in_background(name, storage, on_generated=None):
+    try:
+        if generate_derivatives(name, storage) and on_generated is not None:
+            on_generated()
+    except Exception:
+        logger.exception('Could not generate derivatives of %s', name)
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(name)
+
+
+def _submit(name, storage, on_generated=None):
+    with _in_flight_lock:
+        if name in _in_flight:
+            return
+        _in_flight.add(name)
+    get_executor().submit(_generate_in_background, name, storage, on_generated)
+
+
+def schedule_derivatives(name, storage=None, on_generated=None):
+    """
+    Generates the derivatives of ``name`` on the background pool once the current transaction commits.
+
+    Content-addressed uploads of identical files share a name and are only processed once.
+    ``on_generated`` is called from the pool once new derivatives have been written.
+    """
+    transaction.on_commit(lambda: _submit(name, storage or default_storage, on_generated))
+
+
+def srcset(name, storage=None, request=None):
+    """
+    Maps every derivative format of the stored image ``name`` to ``{width: url}``.
+
+    Only derivatives that have already been generated are listed (see ``existing_derivatives``).
+    Returns ``None`` while there are none, so clients fall back to the original image.
+    """
+    if not name:
+        return None
+    available = existing_derivatives(name, storage)
+    storage = get_derivative_storage(storage or default_storage)
+    result = {}
+    for image_format in get_formats():
+        widths = {}
+        for width in get_widths():
+            if (image_format, width) not in available:
+                continue
+            url = storage.url(derivative_name(name, width, image_format))
+            widths[str(width)] = request.build_absolute_uri(url) if request is not None else url
+        if widths:
+            result[image_format] = widths
+    return result or None
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import ThreadSensitiveContext
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import AsyncClient, Client, override_settings
+from django.urls import reverse
+from services.benchmarking import benchmark_database, summarize
+from services.models import Cart, Order
+from .seed_services import seed_services
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the throughput of the sync (WSGI) read endpoints with their async (ASGI) counterparts '
+        'under concurrent load, on a throwaway test database. The async views do not cache, so the '
+        'catalog cache is disabled for both sides.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=200, help='Number of options per service type to seed.')
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and mode.')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight at once.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('--requests and --concurrency must be positive.')
+        logging.getLogger('services.queries').setLevel(logging.WARNING)
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite serializes database access; run against PostgreSQL for representative numbers.'))
+
+        # The sync views would serve their catalog responses and prices from a cache warmed by the
+        # first requests, the async ones always query: compare them both uncached.
+        no_cache = override_settings(
+            CACHES={**settings.CACHES, 'benchmark-disabled': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+            SERVICES_CATALOG_CACHE='benchmark-disabled')
+        with benchmark_database(), no_cache:
+            seed_services(options=options['size'], categories=max(5, options['size'] // 50), users=options['size'],
+                          carts=options['size'], items_per_cart=10, orders=options['size'], items_per_order=5,
+                          tag='bench')
+            cart = Cart.objects.annotate(n=Count('items')).order_by('-n').first()
+            order = Order.objects.annotate(n=Count('items')).order_by('-n').first()
+            endpoints = {
+                'service-category-list': (reverse('service-category-list'),
+                                          reverse('async-service-category-list')),
+                'tv-mounting-option-list': (reverse('tv-mounting-option-list'),
+                                            reverse('async-option-list', kwargs={'kind': 'tv-mounting-options'})),
+                'cart-detail': (reverse('cart-detail', kwargs={'pk': cart.pk}),
+                                reverse('async-cart-detail', kwargs={'pk': cart.pk})),
+                'order-detail': (reverse('order-detail', kwargs={'pk': order.pk}),
+                                 reverse('async-order-detail', kwargs={'pk': order.pk})),
+            }
+            for name, (sync_url, async_url) in endpoints.items():
+                sync_result = self.run_sync(sync_url, options['requests'], options['concurrency'])
+                async_result = asyncio.run(self.run_async(async_url, options['requests'], options['concurrency']))
+                self.stdout.write(f'{name}')
+                for mode, result in (('sync', sync_result), ('async', async_result)):
+                    self.stdout.write(
+                        f'  {mode:5} {result["throughput_rps"]:9.1f} req/s  p50 {result["p50_ms"]:9.2f} ms  '
+                        f'p95 {result["p95_ms"]:9.2f} ms')
+
+    def run_sync(self, url, requests, concurrency):
+        client = Client()
+
+        def request(_):
+            start = time.perf_counter()
+            self.check_response(client.get(url))
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            timings = list(executor.map(request, range(requests)))
+        return self.result(timings, time.perf_counter() - start)
+
+    async def run_async(self, url, requests, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def request():
+            # Like the ASGI handler (unlike AsyncClient), give every request its own ORM thread.
+            async with semaphore, ThreadSensitiveContext():
+                start = time.perf_counter()
+                self.check_response(await client.get(url))
+                return time.perf_counter() - start
+
+        start = time.perf_counter()
+        timings = await asyncio.gather(*(request() for _ in range(requests)))
+        return self.result(timings, time.perf_counter() - start)
+
+    def check_response(self, response):
+        if response.status_code >= 400:
+            raise CommandError(f'Benchmark request failed with status {response.status_code}: {response.content[:500]!r}')
+
+    def result(self, timings, elapsed):
+        return {'throughput_rps': round(len(timings) / elapsed, 1), **summarize(timings)}
@@ -0,0 +1,116 @@
+import json
+import logging
+import platform
+from datetime import datetime, timezone
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+from services.benchmarking import benchmark_database, measure
+from services.cache import get_catalog_cache
+from services.models import Cart, CartItem
+from .seed_services import seed_services
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the hot API endpoints with the Django test client at several data sizes, on a '
+        'throwaway test database, and writes p50/p95 latency, query counts and peak memory to JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000',
+                            help='Comma-separated numbers of options per service type to seed.')
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Keep the catalog cache between requests instead of clearing it.')
+        parser.add_argument('--output', default='benchmark.json', help='Where to write the results.')
+        parser.add_argument('--compare', help='A previous results file to compare against.')
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be a comma-separated list of integers.')
+        logging.getLogger('services.queries').setLevel(logging.WARNING)
+
+        results = {}
+        for size in sizes:
+            self.stdout.write(f'Benchmarking with {size} options per type...')
+            with benchmark_database():
+                results[str(size)] = self.run_size(size, options['iterations'], options['warm_cache'])
+
+        report = {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'warm_cache': options['warm_cache'],
+            },
+            'results': results,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2)
+        self.print_report(results)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                self.print_comparison(json.load(baseline)['results'], results)
+
+    def run_size(self, size, iterations, warm_cache):
+        seed_services(options=size, categories=max(5, size // 50), users=size, carts=size, items_per_cart=10,
+                      orders=size, items_per_order=5, tag='bench')
+        client = Client()
+        # The fullest cart is both read and, refilled before every request, checked out.
+        cart = Cart.objects.annotate(n=Count('items')).order_by('-n').first()
+        before = None if warm_cache else get_catalog_cache().clear
+        checkout_items = list(CartItem.objects.filter(cart=cart).values('content_type_id', 'object_id', 'quantity'))
+
+        def refill_cart():
+            CartItem.objects.bulk_create([CartItem(cart=cart, **item) for item in checkout_items], ignore_conflicts=True)
+            Cart.objects.filter(pk=cart.pk).recompute_totals()
+
+        endpoints = {
+            'catalog-list': lambda: client.get(reverse('catalog-list')),
+            'service-category-list': lambda: client.get(reverse('service-category-list')),
+            'tv-mounting-option-list': lambda: client.get(reverse('tv-mounting-option-list')),
+            'furniture-assembly-option-list': lambda: client.get(reverse('furniture-assembly-option-list')),
+            'installation-service-option-list': lambda: client.get(reverse('installation-service-option-list')),
+            'gazebo-service-option-list': lambda: client.get(reverse('gazebo-service-option-list')),
+            'cart-detail': lambda: client.get(reverse('cart-detail', kwargs={'pk': cart.pk})),
+            'order-list': lambda: client.get(reverse('order-list')),
+            'cart-checkout': lambda: client.post(reverse('cart-checkout', kwargs={'pk': cart.pk})),
+        }
+        setup = {
+            'cart-checkout': refill_cart,
+        }
+        results = {}
+        for name, request in endpoints.items():
+            results[name] = measure(request, iterations, before=setup.get(name, before))
+        return results
+
+    def print_report(self, results):
+        for size, endpoints in results.items():
+            self.stdout.write(f'\n{size} options per type')
+            for name, metrics in endpoints.items():
+                self.stdout.write(
+                    f'  {name:34} p50 {metrics["p50_ms"]:9.2f} ms  p95 {metrics["p95_ms"]:9.2f} ms  '
+                    f'{metrics["queries"]:3} queries  {metrics["peak_memory_kb"]:10.1f} KiB')
+
+    def print_comparison(self, baseline, results):
+        self.stdout.write('\nCompared with baseline (p95 latency, queries)')
+        for size, endpoints in results.items():
+            for name, metrics in endpoints.items():
+                previous = baseline.get(size, {}).get(name)
+                if previous is None:
+                    continue
+                change = (metrics['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+                line = (f'  {size:>6} {name:34} {previous["p95_ms"]:9.2f} -> {metrics["p95_ms"]:9.2f} ms '
+                        f'({change:+.1f}%)  {previous["queries"]} -> {metrics["queries"]} queries')
+                regressed = change > 10 or metrics['queries'] > previous['queries']
+                self.stdout.write(self.style.WARNING(line) if regressed else line)
@@ -0,0 +1,88 @@
+import os
+import re
+from functools import partial
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from services.cache import bump_version
+from services.images import schedule_derivatives, service_image_fields
+from services.signals import CATALOG_MODELS
+from services.storage import ContentAddressedStorage
+
+DEFAULT_TREES = ('services', 'gazebo', 'categories', 'service_categories')
+DERIVATIVE = re.compile(r'__w\d+\.(webp|jpg)$')
+
+
+class Command(BaseCommand):
+    help = (
+        'Moves existing media files into the content-addressed storage, storing identical files once, '
+        'and rewrites the image fields that reference them in bulk. Bulk updates send no signals, so the '
+        'catalog caches are invalidated and the derivatives of the new names scheduled here.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('trees', nargs='*', default=DEFAULT_TREES,
+                            help='Directories under MEDIA_ROOT to migrate. Defaults to %s.' % ', '.join(DEFAULT_TREES))
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing.')
+        parser.add_argument('--delete-originals', action='store_true',
+                            help='Delete migrated files once their rows have been rewritten.')
+
+    def handle(self, *args, **options):
+        storage = default_storage
+        if not isinstance(storage, ContentAddressedStorage):
+            raise CommandError('The default storage is not a ContentAddressedStorage.')
+
+        missing = [tree for tree in options['trees'] if not os.path.isdir(storage.path(tree))]
+        if missing:
+            raise CommandError(f'No such directory under {storage.location}: {", ".join(missing)}.')
+
+        mapping, scanned, duplicate_bytes, digests = {}, 0, 0, set()
+        for tree in options['trees']:
+            root = storage.path(tree)
+            for directory, _, filenames in os.walk(root):
+                for filename in filenames:
+                    if DERIVATIVE.search(filename):
+                        continue
+                    path = os.path.join(directory, filename)
+                    name = os.path.relpath(path, storage.location).replace(os.sep, '/')
+                    with open(path, 'rb') as handle:
+                        content = File(handle, name=filename)
+                        digest = storage.content_hash(content)
+                        if digest in digests or storage.exists(storage.address(digest, name)):
+                            duplicate_bytes += os.path.getsize(path)
+                        digests.add(digest)
+                        mapping[name] = storage.address(digest, name) if options['dry_run'] else storage.save(name, content)
+                    scanned += 1
+        self.stdout.write(f'{scanned} files scanned, {len(digests)} distinct contents, '
+                          f'{duplicate_bytes / 1024:.1f} KiB of duplicates.')
+
+        updated = 0
+        names = list(mapping)
+        for model in CATALOG_MODELS:
+            model_updated = set()
+            for field in service_image_fields(model):
+                for start in range(0, len(names), options['batch_size']):
+                    chunk = names[start:start + options['batch_size']]
+                    rows = list(model.objects.filter(**{f'{field.attname}__in': chunk}).only('pk', field.attname))
+                    for row in rows:
+                        setattr(row, field.attname, mapping[getattr(row, field.attname).name])
+                    if rows and not options['dry_run']:
+                        with transaction.atomic():
+                            model.objects.bulk_update(rows, [field.attname], batch_size=options['batch_size'])
+                    model_updated.update(getattr(row, field.attname).name for row in rows)
+                    updated += len(rows)
+            if model_updated and not options['dry_run']:
+                bump_version(model)
+                for name in sorted(model_updated):
+                    schedule_derivatives(name, storage, partial(bump_version, model))
+        self.stdout.write(f'{updated} image references {"to rewrite" if options["dry_run"] else "rewritten"}.')
+
+        if options['delete_originals'] and not options['dry_run']:
+            for name in names:
+                os.remove(storage.path(name))
+            self.stdout.write(f'{len(names)} original files deleted.')
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                'Done. The derivatives of the new names are generated in the background before exiting.'))
@@ -0,0 +1,43 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+from services.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_orders
+from services.models import Order
+from services.views import filter_orders
+
+
+class Command(BaseCommand):
+    help = (
+        'Streams orders with their items and option titles as CSV or NDJSON, with constant memory '
+        'use regardless of the number of orders.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', dest='fmt', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--status', help='Only export orders with this status.')
+        parser.add_argument('--user', type=int, help='Only export the orders of this user id.')
+        parser.add_argument('--created-after', help='ISO 8601 date or datetime, inclusive.')
+        parser.add_argument('--created-before', help='ISO 8601 date or datetime, exclusive.')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument('--output', help='File to write to. Defaults to standard output.')
+
+    def handle(self, *args, **options):
+        params = {
+            key: options[key] for key in ('status', 'user', 'created_after', 'created_before')
+            if options[key] is not None
+        }
+        try:
+            queryset = filter_orders(Order.objects.all(), params)
+        except ValidationError as error:
+            raise CommandError(error.detail)
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be positive.')
+
+        encode, _ = EXPORT_FORMATS[options['fmt']]
+        lines = encode(export_orders(queryset, chunk_size=options['chunk_size']))
+        if options['output'] is None:
+            sys.stdout.writelines(lines)
+            return
+        with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+            output.writelines(lines)
+        self.stderr.write(self.style.SUCCESS(f'Orders written to {options["output"]}'))
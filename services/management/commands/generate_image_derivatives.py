@@ -0,0 +1,53 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from django.core.management.base import BaseCommand
+from services.cache import bump_version
+from services.images import generate_derivatives, service_image_fields
+from services.signals import CATALOG_MODELS
+
+
+class Command(BaseCommand):
+    help = (
+        'Generates the resized image derivatives of every existing service image, in parallel, then '
+        'invalidates the cached catalog responses of the models whose images got new derivatives.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4, help='Number of images processed in parallel.')
+        parser.add_argument('--overwrite', action='store_true', help='Regenerate derivatives that already exist.')
+
+    def handle(self, *args, **options):
+        images, owners = {}, defaultdict(set)
+        for model in CATALOG_MODELS:
+            for field in service_image_fields(model):
+                names = model.objects.exclude(**{field.attname: ''}).exclude(**{f'{field.attname}__isnull': True}) \
+                    .values_list(field.attname, flat=True).distinct()
+                for name in names.iterator():
+                    images[name] = field.storage
+                    owners[name].add(model)
+        self.stdout.write(f'{len(images)} images to process with {options["workers"]} workers.')
+
+        created = failed = 0
+        changed = set()
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            futures = {
+                executor.submit(generate_derivatives, name, storage, options['overwrite']): name
+                for name, storage in images.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    names = future.result()
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{futures[future]}: {error}')
+                    continue
+                created += len(names)
+                if names:
+                    changed.update(owners[futures[future]])
+
+        # Cached catalog responses embed the srcset of their images.
+        for model in CATALOG_MODELS:
+            if model in changed:
+                bump_version(model)
+        self.stdout.write(self.style.SUCCESS(f'{created} derivatives created, {failed} images failed, '
+                                             f'{len(changed)} catalog caches invalidated.'))
@@ -0,0 +1,327 @@
+import http.client
+import json
+import logging
+import platform
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlencode, urlsplit
+import django
+from django.contrib.auth.models import User
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.urls import reverse
+from services.benchmarking import summarize
+from services.cache import get_catalog_cache
+from services.models import Cart
+
+OPTION_BASENAMES = ('tv-mounting-option', 'furniture-assembly-option', 'installation-service-option',
+                    'gazebo-service-option')
+DEFAULT_MIX = 'browse=60,purchase=25,history=15'
+
+
+class FlowError(Exception):
+    """
+    Ends a user flow early, after a request that the following steps depend on failed.
+    """
+
+
+class Connection:
+    """
+    One keep-alive HTTP connection to the server under test, reopened when the server drops it.
+    """
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.factory = lambda: connection_class(parts.hostname, parts.port, timeout=timeout)
+        self.prefix = parts.path.rstrip('/')
+        self.connection = None
+
+    def request(self, method, path, body=None, headers=None):
+        payload = None if body is None else json.dumps(body).encode('utf-8')
+        headers = {'Accept': 'application/json', **(headers or {})}
+        if payload is not None:
+            headers['Content-Type'] = 'application/json'
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self.factory()
+            try:
+                self.connection.request(method, self.prefix + path, body=payload, headers=headers)
+                response = self.connection.getresponse()
+                return response.status, response.read(), response.getheader('X-Cache')
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # Kept-alive connection closed by the server: retry once on a fresh one.
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+
+
+class Recorder:
+    """
+    Collects the latency and outcome of every request, per endpoint, from all virtual users.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.cache = defaultdict(lambda: defaultdict(int))
+
+    def add(self, name, duration, status, cache=None):
+        with self.lock:
+            self.timings[name].append(duration)
+            self.statuses[name][str(status)] += 1
+            if cache:
+                self.cache[name][cache] += 1
+            if status == 'error' or status >= 400:
+                self.errors[name] += 1
+
+    def report(self, elapsed):
+        endpoints = {}
+        for name in sorted(self.timings):
+            timings = self.timings[name]
+            endpoints[name] = {
+                'requests': len(timings),
+                'errors': self.errors[name],
+                'error_rate': round(self.errors[name] / len(timings), 4),
+                'throughput_rps': round(len(timings) / elapsed, 2),
+                **summarize(timings),
+                'statuses': dict(sorted(self.statuses[name].items())),
+            }
+            if name in self.cache:
+                cache = self.cache[name]
+                endpoints[name]['cache_hit_rate'] = round(cache['HIT'] / sum(cache.values()), 4)
+        timings = [duration for durations in self.timings.values() for duration in durations]
+        errors = sum(self.errors.values())
+        total = {
+            'requests': len(timings),
+            'errors': errors,
+            'error_rate': round(errors / len(timings), 4) if timings else 0,
+            'throughput_rps': round(len(timings) / elapsed, 2),
+            **(summarize(timings) if timings else {}),
+        }
+        return endpoints, total
+
+
+class VirtualUser:
+    """
+    Plays the user flows of one simulated customer against the server, one request at a time.
+    """
+
+    def __init__(self, base_url, user_id, cart_id, recorder, rng, think_time, timeout):
+        self.connection = Connection(base_url, timeout)
+        self.user_id = user_id
+        self.cart_id = cart_id
+        self.recorder = recorder
+        self.rng = rng
+        self.think_time = think_time
+
+    def call(self, name, method, path, body=None, headers=None, expect=None):
+        start = time.perf_counter()
+        try:
+            status, content, cache = self.connection.request(method, path, body, headers)
+        except (OSError, http.client.HTTPException):
+            self.recorder.add(name, time.perf_counter() - start, 'error')
+            raise FlowError(name)
+        self.recorder.add(name, time.perf_counter() - start, status, cache)
+        if self.think_time:
+            time.sleep(self.rng.uniform(0, self.think_time))
+        if expect is not None and status != expect:
+            raise FlowError(name)
+        return json.loads(content) if content and status < 400 else None
+
+    def catalog_entries(self):
+        page = self.call('catalog-list', 'GET', reverse('catalog-list') + '?' + urlencode(
+            {'ordering': self.rng.choice(['price', '-price', 'title'])}), expect=200)
+        return page['results']
+
+    def browse(self):
+        self.call('service-category-list', 'GET', reverse('service-category-list'), expect=200)
+        if self.rng.random() < 0.2:
+            self.call('category-tree', 'GET', reverse('category-tree'), expect=200)
+        basename = self.rng.choice(OPTION_BASENAMES)
+        self.call(f'{basename}-list', 'GET', reverse(f'{basename}-list'), expect=200)
+        self.call(f'{basename}-facets', 'GET', reverse(f'{basename}-facets'), expect=200)
+        entries = self.catalog_entries()
+        titles = [entry['title'] for entry in entries if entry.get('title')]
+        if titles:
+            self.call('search', 'GET', reverse('search') + '?' + urlencode(
+                {'q': self.rng.choice(titles).split()[0]}), expect=200)
+
+    def purchase(self):
+        entries = self.catalog_entries()
+        if not entries:
+            raise FlowError('catalog-list')
+        if self.cart_id is None:
+            # A user has a single cart, emptied by every checkout: create it on the first purchase.
+            self.cart_id = self.call('cart-list', 'POST', reverse('cart-list'), {'user': self.user_id}, expect=201)['id']
+        picked = self.rng.sample(entries, min(len(entries), self.rng.randint(1, 5)))
+        self.call('cart-items-bulk', 'POST', reverse('cart-items-bulk', kwargs={'cart_pk': self.cart_id}), [
+            {'content_type': entry['content_type'], 'object_id': entry['id'], 'quantity': self.rng.randint(1, 3)}
+            for entry in picked
+        ], expect=200)
+        self.call('cart-detail', 'GET', reverse('cart-detail', kwargs={'pk': self.cart_id}), expect=200)
+        # Checkouts are retried by mobile clients, so they carry an Idempotency-Key like theirs do.
+        order = self.call('cart-checkout', 'POST', reverse('cart-checkout', kwargs={'pk': self.cart_id}),
+                          headers={'Idempotency-Key': str(uuid.uuid4())}, expect=201)
+        self.call('order-detail', 'GET', reverse('order-detail', kwargs={'pk': order['id']}), expect=200)
+
+    def history(self):
+        page = self.call('order-list', 'GET', reverse('order-list') + '?' + urlencode(
+            {'user': self.user_id, 'page_size': 20}), expect=200)
+        if page['results']:
+            order = self.rng.choice(page['results'])
+            self.call('order-detail', 'GET', reverse('order-detail', kwargs={'pk': order['id']}), expect=200)
+            self.call('orderitem-list', 'GET', reverse('orderitem-list') + '?' + urlencode(
+                {'user': self.user_id}), expect=200)
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests a running server (runserver, gunicorn or an ASGI server on SQLite or PostgreSQL) with '
+        'concurrent virtual users replaying browse, purchase and order history flows, and writes p50/p95/p99 '
+        'latency, throughput and error rate per endpoint to JSON. Users are picked from the database the '
+        'server uses, so seed it first, e.g. with seed_services. The catalog cache is cleared before the run '
+        'so that builds are compared from the same cold start, unless --warm-cache is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--base-url', default='http://127.0.0.1:8000', help='Root URL of the server under test.')
+        parser.add_argument('--concurrency', type=int, default=10, help='Number of virtual users.')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to run for.')
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help=f'Relative weights of the user flows (default: {DEFAULT_MIX}).')
+        parser.add_argument('--think-time', type=float, default=0,
+                            help='Maximum random pause, in seconds, after each request.')
+        parser.add_argument('--timeout', type=float, default=30, help='Timeout of one request in seconds.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random choices of the virtual users.')
+        parser.add_argument('--output', default='loadtest.json', help='Where to write the results.')
+        parser.add_argument('--compare', help='A previous results file to compare against.')
+        parser.add_argument('--warm-cache', action='store_true',
+                            help='Keep the catalog cache of the server instead of clearing it before the run.')
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['duration'] <= 0:
+            raise CommandError('--concurrency and --duration must be positive.')
+        mix = self.parse_mix(options['mix'])
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True)[:10000])
+        if not user_ids:
+            raise CommandError('No users in the database, seed it first (e.g. manage.py seed_services).')
+        # Every virtual user plays a different customer, as long as there are enough of them.
+        random.Random(options['seed']).shuffle(user_ids)
+        user_ids = user_ids[:options['concurrency']]
+        carts = dict(Cart.objects.filter(user_id__in=user_ids).values_list('user_id', 'pk'))
+        logging.getLogger('services.queries').setLevel(logging.WARNING)
+        if not options['warm_cache']:
+            if isinstance(get_catalog_cache(), LocMemCache):
+                self.stdout.write(self.style.WARNING(
+                    'The catalog cache is local to each server process and cannot be cleared from here: restart '
+                    'the server before every run so that builds are compared from the same cold cache.'))
+            else:
+                get_catalog_cache().clear()
+        if connection.vendor == 'sqlite':
+            self.stdout.write(self.style.WARNING(
+                'SQLite allows one writer at a time, so writes queue behind each other. Serve the app with '
+                'fixitek.settings_sqlite, whose immediate transactions wait for the lock instead of failing, '
+                'and use PostgreSQL for representative numbers.'))
+
+        recorder = Recorder()
+        flows = defaultdict(lambda: defaultdict(int))
+        deadline = time.monotonic() + options['duration']
+
+        def run(index):
+            rng = random.Random(options['seed'] * 100003 + index)
+            user_id = user_ids[index % len(user_ids)]
+            user = VirtualUser(options['base_url'], user_id, carts.get(user_id), recorder, rng,
+                               options['think_time'], options['timeout'])
+            names, weights = zip(*mix.items())
+            while time.monotonic() < deadline:
+                flow = rng.choices(names, weights)[0]
+                try:
+                    getattr(user, flow)()
+                except FlowError:
+                    outcome = 'aborted'
+                else:
+                    outcome = 'completed'
+                with recorder.lock:
+                    flows[flow][outcome] += 1
+
+        self.stdout.write(f'Running {options["concurrency"]} virtual users against {options["base_url"]} '
+                          f'for {options["duration"]:g}s...')
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            list(executor.map(run, range(options['concurrency'])))
+        elapsed = time.perf_counter() - started
+
+        endpoints, total = recorder.report(elapsed)
+        report = {
+            'meta': {
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'django': django.get_version(),
+                'python': platform.python_version(),
+                'base_url': options['base_url'],
+                'concurrency': options['concurrency'],
+                'duration_s': round(elapsed, 2),
+                'mix': mix,
+                'think_time_s': options['think_time'],
+                'seed': options['seed'],
+                'warm_cache': options['warm_cache'],
+            },
+            'flows': {name: dict(sorted(outcomes.items())) for name, outcomes in sorted(flows.items())},
+            'total': total,
+            'endpoints': endpoints,
+        }
+        with open(options['output'], 'w') as output:
+            json.dump(report, output, indent=2, sort_keys=True)
+        self.print_report(endpoints, total)
+        self.stdout.write(self.style.SUCCESS(f'Results written to {options["output"]}'))
+
+        if options['compare']:
+            with open(options['compare']) as baseline:
+                self.print_comparison(json.load(baseline)['endpoints'], endpoints)
+
+    def parse_mix(self, value):
+        mix = {}
+        try:
+            for part in value.split(','):
+                name, weight = part.split('=')
+                mix[name.strip()] = float(weight)
+        except ValueError:
+            raise CommandError('--mix must look like browse=60,purchase=25,history=15.')
+        unknown = set(mix) - {'browse', 'purchase', 'history'}
+        if unknown or not any(weight > 0 for weight in mix.values()) or any(weight < 0 for weight in mix.values()):
+            raise CommandError('--mix takes non-negative weights for browse, purchase and history.')
+        return mix
+
+    def print_report(self, endpoints, total):
+        for name, metrics in {**endpoints, 'total': total}.items():
+            if not metrics['requests']:
+                continue
+            self.stdout.write(
+                f'  {name:34} {metrics["requests"]:7} req  {metrics["throughput_rps"]:8.1f} req/s  '
+                f'p50 {metrics["p50_ms"]:9.2f} ms  p95 {metrics["p95_ms"]:9.2f} ms  p99 {metrics["p99_ms"]:9.2f} ms  '
+                f'{metrics["error_rate"] * 100:6.2f}% errors')
+
+    def print_comparison(self, baseline, endpoints):
+        self.stdout.write('\nCompared with baseline (p95 latency, error rate)')
+        for name, metrics in endpoints.items():
+            previous = baseline.get(name)
+            if previous is None:
+                continue
+            change = (metrics['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100 if previous['p95_ms'] else 0
+            line = (f'  {name:34} {previous["p95_ms"]:9.2f} -> {metrics["p95_ms"]:9.2f} ms ({change:+.1f}%)  '
+                    f'{previous["error_rate"] * 100:.2f}% -> {metrics["error_rate"] * 100:.2f}% errors')
+            if 'cache_hit_rate' in metrics and 'cache_hit_rate' in previous:
+                # A latency change can come from a colder or warmer catalog cache rather than the build.
+                line += (f'  {previous["cache_hit_rate"] * 100:.0f}% -> '
+                         f'{metrics["cache_hit_rate"] * 100:.0f}% cache hits')
+            regressed = change > 10 or metrics['error_rate'] > previous['error_rate']
+            self.stdout.write(self.style.WARNING(line) if regressed else line)
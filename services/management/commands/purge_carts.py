@@ -0,0 +1,46 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from services.carts import abandoned_carts, purge_abandoned_carts
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes carts, with their items, that have been idle for longer than a TTL and have no order. '
+        'Works in small batches so it can run on a schedule (e.g. hourly from cron) next to live traffic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ttl-days', type=float, default=getattr(settings, 'SERVICES_CART_TTL_DAYS', 30),
+                            help='Idle time after which a cart is purged. Defaults to SERVICES_CART_TTL_DAYS.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-batches', type=int, default=None, help='Stop after this many batches.')
+        parser.add_argument('--pause', type=float, default=0, help='Seconds to sleep between batches.')
+        parser.add_argument('--dry-run', action='store_true', help='Count the carts that would be purged.')
+
+    def handle(self, *args, **options):
+        if options['ttl_days'] <= 0 or options['batch_size'] <= 0:
+            raise CommandError('--ttl-days and --batch-size must be positive.')
+        cutoff = timezone.now() - timedelta(days=options['ttl_days'])
+        if options['dry_run']:
+            self.stdout.write(f'{abandoned_carts(cutoff).count()} carts idle since {cutoff:%Y-%m-%d %H:%M} would be purged.')
+            return
+
+        started = time.monotonic()
+        carts = items = batches = 0
+        for batch_carts, batch_items in purge_abandoned_carts(cutoff, batch_size=options['batch_size']):
+            carts += batch_carts
+            items += batch_items
+            batches += 1
+            if options['verbosity'] > 1:
+                self.stdout.write(f'Batch {batches}: {batch_carts} carts, {batch_items} items.')
+            if options['max_batches'] and batches >= options['max_batches']:
+                break
+            if options['pause']:
+                time.sleep(options['pause'])
+        elapsed = time.monotonic() - started
+        rate = carts / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'{carts} carts and {items} items purged in {batches} batches, {elapsed:.1f}s ({rate:.0f} carts/s).'))
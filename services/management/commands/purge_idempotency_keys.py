@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from services.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    help = (
+        'Deletes stored Idempotency-Key responses past their expiry (SERVICES_IDEMPOTENCY_TTL), in small '
+        'batches so it can run on a schedule next to live traffic.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size must be positive.')
+        now, deleted = timezone.now(), 0
+        while True:
+            keys = list(IdempotencyKey.objects.filter(expires_at__lte=now)
+                        .values_list('key', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            deleted += IdempotencyKey.objects.filter(key__in=keys, expires_at__lte=now).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'{deleted} expired idempotency keys deleted.'))
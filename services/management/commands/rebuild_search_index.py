@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from services.search import INDEX_BATCH_SIZE, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Rewrites the search entries of every service option and drops those of deleted options, '
+        'e.g. after bulk writes that send no signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=INDEX_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        indexed = rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'{indexed} service options indexed.'))
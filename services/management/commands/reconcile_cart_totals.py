@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from services.models import Cart
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the stored item count and subtotal of every cart with the totals computed from its '
+        'items and repairs the carts that drifted, e.g. after bulk writes that bypass CartItem.save().'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Report drifted carts without repairing them.')
+
+    def handle(self, *args, **options):
+        checked, drifted, last_pk = 0, 0, None
+        while True:
+            carts = Cart.objects.order_by('pk')
+            if last_pk is not None:
+                carts = carts.filter(pk__gt=last_pk)
+            chunk = list(carts.with_totals().values_list(
+                'pk', 'item_count', 'subtotal', 'computed_item_count', 'computed_subtotal')[:options['chunk_size']])
+            if not chunk:
+                break
+            last_pk = chunk[-1][0]
+            checked += len(chunk)
+            wrong = [pk for pk, item_count, subtotal, computed_count, computed_subtotal in chunk
+                     if item_count != computed_count or subtotal != computed_subtotal]
+            if wrong:
+                drifted += len(wrong)
+                if options['verbosity'] > 1:
+                    for pk in wrong:
+                        self.stdout.write(f'Cart {pk} drifted.')
+                if not options['dry_run']:
+                    Cart.objects.filter(pk__in=wrong).recompute_totals()
+
+        action = 'to repair' if options['dry_run'] else 'repaired'
+        self.stdout.write(self.style.SUCCESS(f'{checked} carts checked, {drifted} {action}.'))
@@ -0,0 +1,159 @@
+import random
+from decimal import Decimal
+from uuid import uuid4
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from services.models import (SERVICE_OPTION_MODELS, AssemblyType, Cart, CartItem, FurnitureAssemblyOption,
+                             GazeboModel, GazeboServiceOption, InstallationServiceOption, InstallationType,
+                             Location, Order, OrderItem, ServiceCategory, ServiceType, TVMountingOption)
+from services.pricing import line_total
+from services.search import index_options
+
+
+def _choice_values(model, field_name):
+    return [value for value, _ in model._meta.get_field(field_name).choices]
+
+
+def _lookups(model, tag, count, batch_size):
+    names = [f'{model._meta.model_name} {tag} {index}' for index in range(count)]
+    model.objects.bulk_create([model(name=name) for name in names], batch_size=batch_size, ignore_conflicts=True)
+    return list(model.objects.filter(name__in=names))
+
+
+def _price(rng, low=20, high=500):
+    return Decimal(rng.randint(low * 100, high * 100)) / 100
+
+
+def seed_services(options=100, categories=10, users=100, carts=100, items_per_cart=5,
+                  orders=100, items_per_order=5, batch_size=1000, seed=0, tag=None):
+    """
+    Bulk-inserts a synthetic catalog, users, carts and orders and returns the number of rows per model.
+
+    ``options`` is the number of options of each of the four types. Names are suffixed with
+    ``tag`` so that the generator can run repeatedly against the same database.
+    """
+    rng = random.Random(seed)
+    tag = tag or uuid4().hex[:8]
+    counts = {}
+
+    with transaction.atomic():
+        category_names = [f'Category {tag} {index}' for index in range(categories)]
+        ServiceCategory.objects.bulk_create(
+            [ServiceCategory(name=name, description=f'Synthetic category {name}') for name in category_names],
+            batch_size=batch_size)
+        category_ids = list(ServiceCategory.objects.filter(name__in=category_names).values_list('pk', flat=True))
+        counts['ServiceCategory'] = len(category_ids)
+        locations = _lookups(Location, tag, 5, batch_size)
+        service_types = _lookups(ServiceType, tag, 5, batch_size)
+        assembly_types = _lookups(AssemblyType, tag, 5, batch_size)
+        installation_types = _lookups(InstallationType, tag, 5, batch_size)
+        gazebo_models = _lookups(GazeboModel, tag, 5, batch_size)
+
+        def common(index, kind):
+            needs_moving_help = rng.choice(['YES', 'NO'])
+            return {
+                'category_id': rng.choice(category_ids),
+                'title': f'{kind} {tag} {index}',
+                'description': f'Synthetic {kind} option {index}.',
+                'price': _price(rng),
+                'needs_moving_help': needs_moving_help,
+                'moving_help_charge': _price(rng, 10, 80) if needs_moving_help == 'YES' else None,
+            }
+
+        builders = {
+            TVMountingOption: lambda index: TVMountingOption(
+                needs=rng.choice(_choice_values(TVMountingOption, 'needs')),
+                bracket=rng.choice(_choice_values(TVMountingOption, 'bracket')),
+                bracket_price=_price(rng, 20, 150),
+                wall_type=rng.choice(_choice_values(TVMountingOption, 'wall_type')),
+                **common(index, 'TV mounting')),
+            FurnitureAssemblyOption: lambda index: FurnitureAssemblyOption(
+                location=rng.choice(locations), service_type=rng.choice(service_types),
+                assembly_type=rng.choice(assembly_types), **common(index, 'Furniture assembly')),
+            InstallationServiceOption: lambda index: InstallationServiceOption(
+                installation_type=rng.choice(installation_types),
+                location=rng.choice(_choice_values(InstallationServiceOption, 'location')),
+                power_nearby=rng.choice(_choice_values(InstallationServiceOption, 'power_nearby')),
+                **common(index, 'Installation')),
+            GazeboServiceOption: lambda index: GazeboServiceOption(
+                action=rng.choice(_choice_values(GazeboServiceOption, 'action')),
+                gazebo_model=rng.choice(gazebo_models),
+                size=rng.choice(_choice_values(GazeboServiceOption, 'size')),
+                anchoring=rng.choice(['YES', 'NO']), anchoring_charge=_price(rng, 20, 100),
+                **common(index, 'Gazebo')),
+        }
+        content_types = ContentType.objects.get_for_models(*SERVICE_OPTION_MODELS)
+        catalog = []  # (content type id, object id, unit price with surcharges) of every created option
+        for model in SERVICE_OPTION_MODELS:
+            created = model.objects.bulk_create([builders[model](index) for index in range(options)],
+                                                batch_size=batch_size)
+            catalog.extend((content_types[model].pk, option.pk, option.unit_price) for option in created)
+            # bulk_create sends no post_save, so the search entries are written here.
+            index_options(model, model.objects.filter(pk__in=[option.pk for option in created]))
+            counts[model.__name__] = len(created)
+
+        password = make_password(None)
+        seeded_users = User.objects.bulk_create(
+            [User(username=f'seed-{tag}-{index}', password=password) for index in range(users)],
+            batch_size=batch_size)
+        counts['User'] = len(seeded_users)
+
+        seeded_carts = Cart.objects.bulk_create(
+            [Cart(user=user) for user in seeded_users[:carts]], batch_size=batch_size)
+        cart_items = [
+            CartItem(cart=cart, content_type_id=content_type_id, object_id=object_id, quantity=rng.randint(1, 3))
+            for cart in seeded_carts
+            for content_type_id, object_id, _ in rng.sample(catalog, min(items_per_cart, len(catalog)))
+        ]
+        CartItem.objects.bulk_create(cart_items, batch_size=batch_size)
+        # bulk_create bypasses CartItem.save(), so the stored totals are filled in afterwards.
+        Cart.objects.filter(pk__in=[cart.pk for cart in seeded_carts]).recompute_totals()
+        counts['Cart'] = len(seeded_carts)
+        counts['CartItem'] = len(cart_items)
+
+        seeded_orders, order_items = [], []
+        for _ in range(orders):
+            order = Order(user=rng.choice(seeded_users), total_price=0,
+                          status=rng.choice(_choice_values(Order, 'status')))
+            for content_type_id, object_id, unit_price in rng.sample(catalog, min(items_per_order, len(catalog))):
+                item = OrderItem(order=order, content_type_id=content_type_id, object_id=object_id,
+                                 quantity=rng.randint(1, 3), price=unit_price)
+                order.total_price += line_total(unit_price, item.quantity)
+                order_items.append(item)
+            seeded_orders.append(order)
+        Order.objects.bulk_create(seeded_orders, batch_size=batch_size)
+        OrderItem.objects.bulk_create(order_items, batch_size=batch_size)
+        counts['Order'] = len(seeded_orders)
+        counts['OrderItem'] = len(order_items)
+
+    return counts
+
+
+class Command(BaseCommand):
+    help = 'Seeds the database with a synthetic catalog, users, carts and orders using bulk inserts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--options', type=int, default=100, help='Options of each of the four service types.')
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--carts', type=int, default=100, help='At most one cart per user.')
+        parser.add_argument('--items-per-cart', type=int, default=5)
+        parser.add_argument('--orders', type=int, default=100)
+        parser.add_argument('--items-per-order', type=int, default=5)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--seed', type=int, default=0, help='Random seed, for reproducible data.')
+        parser.add_argument('--tag', help='Suffix for generated names, random by default.')
+
+    def handle(self, *args, **options):
+        counts = seed_services(
+            options=options['options'], categories=options['categories'], users=options['users'],
+            carts=options['carts'], items_per_cart=options['items_per_cart'], orders=options['orders'],
+            items_per_order=options['items_per_order'], batch_size=options['batch_size'],
+            seed=options['seed'], tag=options['tag'],
+        )
+        for model_name, count in counts.items():
+            self.stdout.write(f'{model_name}: {count}')
+        self.stdout.write(self.style.SUCCESS('Seeding complete.'))
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from .db_routers import get_replica_alias, pin_to_primary
+from .idempotency import IDEMPOTENCY_HEADER
+
+logger = logging.getLogger('services.queries')
+
+_IN_LIST = re.compile(r'IN \((?:%s, )*%s\)')
+_WHITESPACE = re.compile(r'\s+')
+_SAVEPOINT = re.compile(r'\s*(?:SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)\b', re.IGNORECASE)
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def fingerprint(sql):
+    """
+    Returns a short, stable identifier of a SQL statement, ignoring the length of IN lists.
+    """
+    normalized = _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql.strip()))
+    return hashlib.md5(normalized.encode('utf-8'), usedforsecurity=False).hexdigest()[:12]
+
+
+class QueryRecorder:
+    """
+    Records every SQL statement executed on any database connection while active.
+
+    Usable as a context manager around a request, a test or a block of code. Savepoint
+    statements are not recorded: tests run every request inside a transaction, where
+    ``atomic()`` blocks issue savepoints instead of the unrecorded ``BEGIN``/``COMMIT`` of
+    production, and counting them would make budgets differ between the two.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if _SAVEPOINT.match(sql):
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append((sql, time.perf_counter() - start))
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            self._stack.enter_context(connections[alias].execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    @property
+    def total_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def duplicates(self):
+        """
+        Maps the fingerprint of every statement executed more than once to its count.
+        """
+        counts = Counter(fingerprint(sql) for sql, _ in self.queries)
+        return {key: count for key, count in counts.most_common() if count > 1}
+
+    def report(self):
+        lines = [f'{self.count} queries in {self.total_time * 1000:.1f} ms']
+        for index, (sql, duration) in enumerate(self.queries, start=1):
+            lines.append(f'{index}. [{fingerprint(sql)}] {duration * 1000:.2f} ms: {sql}')
+        return '\n'.join(lines)
+
+
+def query_budget_for(url_name, method='GET', headers=None):
+    """
+    Returns the query budget of a request to ``url_name``, None when it has none.
+
+    Writes sent with an ``Idempotency-Key`` header get ``SERVICES_IDEMPOTENCY_QUERY_BUDGET``
+    more queries, those of claiming the key and storing the response.
+    """
+    budget = getattr(settings, 'SERVICES_QUERY_BUDGETS', {}).get(url_name)
+    if budget is not None and method.upper() not in SAFE_METHODS and IDEMPOTENCY_HEADER in (headers or {}):
+        budget += getattr(settings, 'SERVICES_IDEMPOTENCY_QUERY_BUDGET', 3)
+    return budget
+
+
+class QueryCountMiddleware:
+    """
+    Logs the query count, SQL time and duplicate statements of every request.
+
+    Adds ``X-Query-Count``, ``X-Query-Time-Ms`` and ``X-Query-Duplicates`` response headers
+    when ``SERVICES_QUERY_HEADERS`` is enabled and warns when a URL exceeds its entry in
+    ``SERVICES_QUERY_BUDGETS``.
+
+    Streaming responses, such as order exports, run most of their queries while the body is sent,
+    after this middleware has returned. Only the queries run before streaming are counted, and
+    the record is marked ``streaming`` and never checked against a budget.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with QueryRecorder() as recorder:
+            response = self.get_response(request)
+        return self.process_recording(request, response, recorder)
+
+    async def __acall__(self, request):
+        # Connections are thread-local: install the wrappers on the thread that runs the
+        # async ORM's queries for this request.
+        recorder = QueryRecorder()
+        await sync_to_async(recorder.__enter__)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recorder.__exit__)(None, None, None)
+        return self.process_recording(request, response, recorder)
+
+    def process_recording(self, request, response, recorder):
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        duplicates = recorder.duplicates()
+        streaming = response.streaming
+        budget = None if streaming else query_budget_for(url_name, request.method, request.headers)
+        record = {
+            'method': request.method,
+            'path': request.path,
+            'url_name': url_name,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'sql_ms': round(recorder.total_time * 1000, 2),
+            'duplicates': duplicates,
+            'budget': budget,
+        }
+        if streaming:
+            record['streaming'] = True
+        if budget is not None and recorder.count > budget:
+            logger.warning(json.dumps(record))
+        else:
+            logger.info(json.dumps(record))
+
+        if getattr(settings, 'SERVICES_QUERY_HEADERS', settings.DEBUG):
+            response['X-Query-Count'] = str(recorder.count)
+            response['X-Query-Time-Ms'] = f'{recorder.total_time * 1000:.2f}'
+            response['X-Query-Duplicates'] = ','.join(f'{key}x{count}' for key, count in duplicates.items())
+        return response
+
+
+class ReplicaPinMiddleware:
+    """
+    Gives read-your-writes consistency when reads are routed to a replica.
+
+    Requests with an unsafe method read from the primary and, when they succeed, set a cookie that
+    keeps the client's following requests on the primary for ``SERVICES_REPLICA_PIN_SECONDS``,
+    long enough for the replica to catch up.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_pin(request):
+            return self.process_response(request, self.get_response(request))
+        with pin_to_primary():
+            return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        if not self.should_pin(request):
+            return self.process_response(request, await self.get_response(request))
+        with pin_to_primary():
+            return self.process_response(request, await self.get_response(request))
+
+    def should_pin(self, request):
+        if get_replica_alias() is None:
+            return False
+        cookie = getattr(settings, 'SERVICES_REPLICA_PIN_COOKIE', 'replica_pin')
+        return request.method not in SAFE_METHODS or cookie in request.COOKIES
+
+    def process_response(self, request, response):
+        if get_replica_alias() is not None and request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                getattr(settings, 'SERVICES_REPLICA_PIN_COOKIE', 'replica_pin'), '1',
+                max_age=getattr(settings, 'SERVICES_REPLICA_PIN_SECONDS', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,66 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:26
+
+from collections import defaultdict
+from decimal import Decimal
+from django.db import migrations, models
+
+OPTION_MODELS = ('TVMountingOption', 'FurnitureAssemblyOption', 'InstallationServiceOption', 'GazeboServiceOption')
+
+
+def unit_price(option):
+    price = option.price or Decimal('0.00')
+    if option.needs_moving_help == 'YES':
+        price += option.moving_help_charge or Decimal('0.00')
+    if getattr(option, 'bracket', 'OWN') != 'OWN':
+        price += option.bracket_price or Decimal('0.00')
+    return price
+
+
+def fill_cart_totals(apps, schema_editor):
+    Cart = apps.get_model('services', 'Cart')
+    CartItem = apps.get_model('services', 'CartItem')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    models_by_type = {
+        content_type.pk: apps.get_model('services', content_type.model)
+        for content_type in ContentType.objects.filter(
+            app_label='services', model__in=[name.lower() for name in OPTION_MODELS])
+    }
+    cart_ids = list(Cart.objects.filter(items__isnull=False).distinct().order_by('pk').values_list('pk', flat=True))
+    for start in range(0, len(cart_ids), 1000):
+        items = list(CartItem.objects.filter(cart_id__in=cart_ids[start:start + 1000]))
+        wanted = defaultdict(set)
+        for item in items:
+            wanted[item.content_type_id].add(item.object_id)
+        prices = {
+            (content_type_id, option.pk): unit_price(option)
+            for content_type_id, object_ids in wanted.items() if content_type_id in models_by_type
+            for option in models_by_type[content_type_id].objects.filter(pk__in=object_ids)
+        }
+        totals = defaultdict(lambda: [0, Decimal('0.00')])
+        for item in items:
+            totals[item.cart_id][0] += 1
+            totals[item.cart_id][1] += item.quantity * prices.get((item.content_type_id, item.object_id), Decimal('0.00'))
+        for cart_id, (item_count, subtotal) in totals.items():
+            Cart.objects.filter(pk=cart_id).update(item_count=item_count, subtotal=subtotal)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0009_order_history_indexes'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cart',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Item Count'),
+        ),
+        migrations.AddField(
+            model_name='cart',
+            name='subtotal',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12, verbose_name='Subtotal'),
+        ),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
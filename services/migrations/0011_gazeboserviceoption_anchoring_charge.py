@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:37
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0010_cart_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gazeboserviceoption',
+            name='anchoring_charge',
+            field=models.DecimalField(blank=True, decimal_places=2, help_text='Additional charge for anchoring the gazebo.', max_digits=10, null=True, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Anchoring Charge'),
+        ),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Related names folded into the keywords of each option type.
+OPTION_KEYWORDS = {
+    'TVMountingOption': ('category__name',),
+    'FurnitureAssemblyOption': ('category__name',),
+    'InstallationServiceOption': ('category__name', 'installation_type__name'),
+    'GazeboServiceOption': ('category__name', 'gazebo_model__name'),
+}
+
+# PostgreSQL: a generated tsvector column weighting the title (A) over the keywords (B) and the
+# description (C), recomputed by the database whenever a row is written, with a GIN index.
+POSTGRES_INDEX = [
+    """
+    ALTER TABLE services_searchentry ADD COLUMN document tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english'::regconfig, coalesce(title, '')), 'A')
+        || setweight(to_tsvector('english'::regconfig, coalesce(keywords, '')), 'B')
+        || setweight(to_tsvector('english'::regconfig, coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    'CREATE INDEX services_searchentry_document_gin ON services_searchentry USING gin (document)',
+]
+POSTGRES_UNINDEX = [
+    'DROP INDEX IF EXISTS services_searchentry_document_gin',
+    'ALTER TABLE services_searchentry DROP COLUMN IF EXISTS document',
+]
+
+# SQLite: an FTS5 table over the rows of services_searchentry, kept in sync by triggers.
+SQLITE_INDEX = [
+    """
+    CREATE VIRTUAL TABLE services_searchentry_fts USING fts5(
+        title, keywords, description, content='services_searchentry', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER services_searchentry_fts_insert AFTER INSERT ON services_searchentry BEGIN
+        INSERT INTO services_searchentry_fts(rowid, title, keywords, description)
+        VALUES (new.id, new.title, new.keywords, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER services_searchentry_fts_delete AFTER DELETE ON services_searchentry BEGIN
+        INSERT INTO services_searchentry_fts(services_searchentry_fts, rowid, title, keywords, description)
+        VALUES ('delete', old.id, old.title, old.keywords, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER services_searchentry_fts_update AFTER UPDATE ON services_searchentry BEGIN
+        INSERT INTO services_searchentry_fts(services_searchentry_fts, rowid, title, keywords, description)
+        VALUES ('delete', old.id, old.title, old.keywords, old.description);
+        INSERT INTO services_searchentry_fts(rowid, title, keywords, description)
+        VALUES (new.id, new.title, new.keywords, new.description);
+    END
+    """,
+]
+SQLITE_UNINDEX = [
+    'DROP TRIGGER IF EXISTS services_searchentry_fts_insert',
+    'DROP TRIGGER IF EXISTS services_searchentry_fts_delete',
+    'DROP TRIGGER IF EXISTS services_searchentry_fts_update',
+    'DROP TABLE IF EXISTS services_searchentry_fts',
+]
+
+
+def create_search_index(apps, schema_editor):
+    # Other databases have no full-text index and are searched with icontains.
+    for statement in {'postgresql': POSTGRES_INDEX, 'sqlite': SQLITE_INDEX}.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    for statement in {'postgresql': POSTGRES_UNINDEX, 'sqlite': SQLITE_UNINDEX}.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(statement)
+
+
+def fill_search_entries(apps, schema_editor):
+    SearchEntry = apps.get_model('services', 'SearchEntry')
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    for name, keywords in OPTION_KEYWORDS.items():
+        model = apps.get_model('services', name)
+        if not model.objects.exists():
+            continue
+        content_type, _ = ContentType.objects.get_or_create(app_label='services', model=name.lower())
+        rows = model.objects.order_by('pk').values_list('pk', 'title', 'description', 'category_id', *keywords)
+        SearchEntry.objects.bulk_create(
+            [
+                SearchEntry(content_type=content_type, object_id=pk, category_id=category_id, title=title or '',
+                            description=description or '', keywords=' '.join(name for name in names if name))
+                for pk, title, description, category_id, *names in rows.iterator(chunk_size=1000)
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0011_gazeboserviceoption_anchoring_charge'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(help_text='The ID of the indexed service option.', verbose_name='Object ID')),
+                ('title', models.CharField(blank=True, max_length=100, verbose_name='Title')),
+                ('description', models.TextField(blank=True, verbose_name='Description')),
+                ('keywords', models.TextField(blank=True, help_text='Names of the category, gazebo model or installation type of the option.', verbose_name='Keywords')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.servicecategory', verbose_name='Service')),
+                ('content_type', models.ForeignKey(help_text='The type of the indexed service option.', on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='Content Type')),
+            ],
+            options={
+                'verbose_name': 'Search Entry',
+                'verbose_name_plural': 'Search Entries',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(fill_search_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0012_searchentry'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['updated_at'], name='services_ca_updated_013973_idx'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0013_cart_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IdempotencyKey',
+            fields=[
+                ('key', models.BinaryField(help_text='Hash of the Idempotency-Key header, the user or guest email, the method and the path.', max_length=32, primary_key=True, serialize=False, verbose_name='Key')),
+                ('fingerprint', models.BinaryField(help_text='Hash of the request body.', max_length=16, verbose_name='Fingerprint')),
+                ('status_code', models.PositiveSmallIntegerField(blank=True, help_text='Status of the stored response, empty while the first request is in progress.', null=True, verbose_name='Status Code')),
+                ('response', models.BinaryField(blank=True, help_text='zlib-compressed JSON response body.', null=True, verbose_name='Response')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Expires At')),
+            ],
+            options={
+                'verbose_name': 'Idempotency Key',
+                'verbose_name_plural': 'Idempotency Keys',
+            },
+        ),
+    ]
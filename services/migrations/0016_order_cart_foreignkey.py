@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 08:07
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('services', '0015_priceversion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='cart',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='orders', to='services.cart', verbose_name='Cart'),
+        ),
+    ]
@@ -1,12 +1,18 @@
-from django.db import models
+from decimal import Decimal
+from django.db import models, router, transaction
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
 from django.core.validators import MinValueValidator
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.auth.models import User
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from .help_functions import upload_to_service
 from uuid import uuid4
 
+ZERO = Value(Decimal('0.00'))
+
 
 class ServiceCategory(models.Model):
     """
@@ -79,6 +85,44 @@ class BaseServiceOption(models.Model):
         validators=[MinValueValidator(0)],
     )
 
+    # Fields read to price an option, loaded along with it wherever its price is rendered.
+    price_fields = ('price', 'needs_moving_help', 'moving_help_charge')
+
+    @classmethod
+    def price_component_expressions(cls):
+        """
+        SQL expressions of the components that add up to the price of one unit of this option.
+        """
+        return {
+            'base': Coalesce('price', ZERO),
+            'moving_help': Case(When(needs_moving_help='YES', then=Coalesce('moving_help_charge', ZERO)), default=ZERO),
+        }
+
+    @property
+    def price_components(self):
+        """
+        Components of the price of one unit of this option, the Python equivalent of
+        ``price_component_expressions``.
+        """
+        return {
+            'base': self.price or Decimal('0.00'),
+            'moving_help': (self.moving_help_charge or Decimal('0.00')) if self.needs_moving_help == 'YES'
+            else Decimal('0.00'),
+        }
+
+    @property
+    def unit_price(self):
+        """
+        Price of one unit of this option, the Python equivalent of ``unit_price_expression``.
+        """
+        return sum(self.price_components.values(), Decimal('0.00'))
+
+    @classmethod
+    def unit_price_expression(cls):
+        terms = list(cls.price_component_expressions().values())
+        return models.ExpressionWrapper(
+            sum(terms[1:], terms[0]), output_field=models.DecimalField(max_digits=12, decimal_places=2))
+
     class Meta:
         abstract = True
 
@@ -128,6 +172,22 @@ class TVMountingOption(BaseServiceOption):
         verbose_name=_('Wall Type')
     )
 
+    price_fields = BaseServiceOption.price_fields + ('bracket', 'bracket_price')
+
+    @classmethod
+    def price_component_expressions(cls):
+        return {
+            **super().price_component_expressions(),
+            'bracket': Case(When(~models.Q(bracket='OWN'), then=Coalesce('bracket_price', ZERO)), default=ZERO),
+        }
+
+    @property
+    def price_components(self):
+        return {
+            **super().price_components,
+            'bracket': (self.bracket_price or Decimal('0.00')) if self.bracket != 'OWN' else Decimal('0.00'),
+        }
+
     def __str__(self):
         return f"{self.title}"
 
@@ -277,6 +337,31 @@ class GazeboServiceOption(BaseServiceOption):
         max_length=20, choices=SIZE_CHOICES, blank=True, null=True)
     anchoring = models.CharField(
         max_length=3, choices=YES_NO_CHOICES, default='NO')
+    anchoring_charge = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+        help_text=_("Additional charge for anchoring the gazebo."),
+        verbose_name=_("Anchoring Charge"),
+        validators=[MinValueValidator(0)],
+    )
+
+    price_fields = BaseServiceOption.price_fields + ('anchoring', 'anchoring_charge')
+
+    @classmethod
+    def price_component_expressions(cls):
+        return {
+            **super().price_component_expressions(),
+            'anchoring': Case(When(anchoring='YES', then=Coalesce('anchoring_charge', ZERO)), default=ZERO),
+        }
+
+    @property
+    def price_components(self):
+        return {
+            **super().price_components,
+            'anchoring': (self.anchoring_charge or Decimal('0.00')) if self.anchoring == 'YES' else Decimal('0.00'),
+        }
 
     def __str__(self):
         return f"{self.title}"
@@ -286,6 +371,136 @@ class GazeboServiceOption(BaseServiceOption):
         verbose_name_plural = _("Gazebo Assembly Options")
 
 
+SERVICE_OPTION_MODELS = (TVMountingOption, FurnitureAssemblyOption, InstallationServiceOption, GazeboServiceOption)
+
+
+class PriceVersion(models.Model):
+    """
+    Version of the prices of one service option model, changed in the same transaction as any
+    save or delete of its options.
+
+    Cached option prices are keyed by it (see ``services.pricing``). It lives in the database
+    rather than in the cache so that every process sees a change as soon as it is committed,
+    whatever cache backend is configured.
+    """
+    model = models.CharField(max_length=100, primary_key=True, verbose_name=_('Model'))
+    version = models.BigIntegerField(default=0, verbose_name=_('Version'))
+
+    def __str__(self):
+        return f'{self.model} v{self.version}'
+
+    class Meta:
+        verbose_name = _('Price Version')
+        verbose_name_plural = _('Price Versions')
+
+
+class SearchEntry(models.Model):
+    """
+    Searchable text of one service option, kept current by ``services.signals``.
+
+    The full-text index over these rows is database specific, see ``services.search``.
+    """
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, verbose_name=_("Content Type"),
+        help_text=_('The type of the indexed service option.')
+    )
+    object_id = models.PositiveIntegerField(
+        verbose_name=_("Object ID"), help_text=_('The ID of the indexed service option.')
+    )
+    category = models.ForeignKey(
+        ServiceCategory, on_delete=models.CASCADE, related_name='+', verbose_name=_("Service")
+    )
+    title = models.CharField(max_length=100, blank=True, verbose_name=_("Title"))
+    description = models.TextField(blank=True, verbose_name=_("Description"))
+    keywords = models.TextField(
+        blank=True, verbose_name=_("Keywords"),
+        help_text=_('Names of the category, gazebo model or installation type of the option.')
+    )
+
+    def __str__(self):
+        return self.title
+
+    class Meta:
+        unique_together = [('content_type', 'object_id')]
+        verbose_name = _("Search Entry")
+        verbose_name_plural = _("Search Entries")
+
+MONEY = models.DecimalField(max_digits=12, decimal_places=2)
+
+
+def option_unit_price(content_type_id, object_id):
+    """
+    SQL expression of the current unit price of a service option, zero if it no longer exists.
+    """
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model not in SERVICE_OPTION_MODELS:
+        return ZERO
+    return Coalesce(
+        Subquery(model.objects.filter(pk=object_id).values(unit_price=model.unit_price_expression())[:1]),
+        ZERO, output_field=MONEY,
+    )
+
+
+def cart_item_unit_price():
+    """
+    SQL expression of the unit price of the option of the CartItem in the outer query.
+    """
+    return Case(
+        *[
+            When(content_type_id=content_type.pk, then=Subquery(
+                model.objects.filter(pk=OuterRef('object_id')).values(unit_price=model.unit_price_expression())[:1]
+            ))
+            for model, content_type in ContentType.objects.get_for_models(*SERVICE_OPTION_MODELS).items()
+        ],
+        default=ZERO,
+        output_field=MONEY,
+    )
+
+
+def cart_totals(items=None):
+    """
+    SQL expressions computing the ``subtotal`` and ``item_count`` of the Cart in the outer query
+    from ``items`` (all CartItems by default).
+    """
+    items = (CartItem.objects.all() if items is None else items).filter(cart=OuterRef('pk')).order_by().values('cart')
+    return {
+        'subtotal': Coalesce(
+            Subquery(items.annotate(total=Sum(F('quantity') * cart_item_unit_price(), output_field=MONEY)).values('total')),
+            ZERO, output_field=MONEY,
+        ),
+        'item_count': Coalesce(Subquery(items.annotate(count=Count('pk')).values('count')), 0),
+    }
+
+
+class CartQuerySet(models.QuerySet):
+    def with_totals(self):
+        """
+        Annotates every cart with the ``computed_subtotal`` and ``computed_item_count`` of its items,
+        computed in SQL, to check the stored totals against.
+        """
+        return self.annotate(**{f'computed_{name}': expression for name, expression in cart_totals().items()})
+
+    def adjust_totals(self, item_count=0, subtotal=None, touch=True):
+        """
+        Adds to the stored totals of the carts with a single atomic ``UPDATE``.
+
+        The carts' ``updated_at`` is set too, so that carts in use are never purged as abandoned,
+        unless ``touch`` is False, for changes that are not the customer's doing.
+        """
+        changes = {'item_count': F('item_count') + item_count} if item_count else {}
+        if subtotal is not None:
+            changes['subtotal'] = F('subtotal') + subtotal
+        if changes and touch:
+            changes['updated_at'] = timezone.now()
+        return self.update(**changes) if changes else 0
+
+    def recompute_totals(self):
+        """
+        Overwrites the stored totals of the carts with the totals computed from their items.
+        """
+        return self.update(**cart_totals())
+
+
 class Cart(models.Model):
     """
     Represents a shopping cart for a user.
@@ -300,6 +515,12 @@ class Cart(models.Model):
         auto_now_add=True, verbose_name=_("Created At"))
     updated_at = models.DateTimeField(
         auto_now=True, verbose_name=_("Updated At"))
+    # Kept up to date incrementally by CartItem, see CartQuerySet.adjust_totals.
+    item_count = models.PositiveIntegerField(default=0, editable=False, verbose_name=_("Item Count"))
+    subtotal = models.DecimalField(
+        max_digits=12, decimal_places=2, default=Decimal('0.00'), editable=False, verbose_name=_("Subtotal"))
+
+    objects = CartQuerySet.as_manager()
 
     def __str__(self):
         return f"Cart for {self.user.username}"
@@ -307,11 +528,43 @@ class Cart(models.Model):
     class Meta:
         verbose_name = _("Cart")
         verbose_name_plural = _("Carts")
+        indexes = [
+            # Drives the batches of purge_abandoned_carts.
+            models.Index(fields=['updated_at']),
+        ]
+
+
+def lock_carts(pks, using):
+    """
+    Locks the rows of the carts ``pks`` until the end of the transaction, in primary key order.
+
+    Every writer of cart items locks their carts before the items, so that they queue up per cart.
+    """
+    list(Cart.objects.using(using).select_for_update().filter(pk__in=pks).order_by('pk').values_list('pk', flat=True))
+
+
+class CartItemQuerySet(models.QuerySet):
+    def delete(self):
+        # Takes the deleted items out of the stored cart totals in one UPDATE. Their carts, then the
+        # items are locked first, so that the totals and the DELETE see the same rows as concurrent writers.
+        with transaction.atomic(using=self.db, savepoint=False):
+            lock_carts(self.values('cart_id'), self.db)
+            locked = self.model.objects.using(self.db).filter(
+                pk__in=list(self.select_for_update().values_list('pk', flat=True)))
+            removed = cart_totals(locked)
+            Cart.objects.using(self.db).filter(pk__in=locked.values('cart_id')).adjust_totals(
+                item_count=-removed['item_count'], subtotal=-removed['subtotal'])
+            return super(CartItemQuerySet, locked).delete()
+
+    delete.alters_data = True
+    delete.queryset_only = True
 
 
 class CartItem(models.Model):
     """
     Represents an item in a shopping cart.
+
+    Saving and deleting items keep the ``item_count`` and ``subtotal`` of their cart up to date.
     """
     cart = models.ForeignKey(
         Cart, on_delete=models.CASCADE, related_name="items", verbose_name=_("Cart")
@@ -331,6 +584,57 @@ class CartItem(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Created At'))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Updated At'))
 
+    objects = CartItemQuerySet.as_manager()
+
+    def _line(self):
+        return self.cart_id, self.content_type_id, self.object_id, self.quantity
+
+    def _locked_line(self, using):
+        # The stored line, read under a row lock so that concurrent writers of the item queue up
+        # instead of computing their cart total deltas from the same old quantity. The cart is
+        # locked first, in the order of bulk adds and checkouts, which lock the cart, then its items.
+        lock_carts([self.cart_id], using)
+        line = CartItem.objects.using(using).select_for_update().filter(pk=self.pk).values_list(
+            'cart_id', 'content_type_id', 'object_id', 'quantity').first()
+        if line and line[0] != self.cart_id:
+            # Moved to another cart: its previous cart changes too.
+            lock_carts([line[0]], using)
+        return line
+
+    def save(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(CartItem, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            if self._state.adding:
+                lock_carts([self.cart_id], using)
+                previous = None
+            else:
+                previous = self._locked_line(using)
+            super().save(*args, **kwargs)
+            current = self._line()
+            if previous and previous[:3] == current[:3]:
+                if current[3] != previous[3]:
+                    Cart.objects.using(using).filter(pk=self.cart_id).adjust_totals(
+                        subtotal=(current[3] - previous[3]) * option_unit_price(self.content_type_id, self.object_id))
+            else:
+                if previous:
+                    self._adjust_cart_totals(previous, -1, using)
+                self._adjust_cart_totals(current, 1, using)
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(CartItem, instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            line = self._locked_line(using)
+            result = super().delete(*args, **kwargs)
+            if line:
+                self._adjust_cart_totals(line, -1, using)
+        return result
+
+    @staticmethod
+    def _adjust_cart_totals(line, sign, using):
+        cart_id, content_type_id, object_id, quantity = line
+        Cart.objects.using(using).filter(pk=cart_id).adjust_totals(
+            item_count=sign, subtotal=sign * quantity * option_unit_price(content_type_id, object_id))
+
     def __str__(self):
         service_title = getattr(self.service_option, 'title', str(self.service_option))
         username = getattr(getattr(self.cart, 'user', None), 'username', 'unknown')
@@ -356,7 +660,7 @@ class Order(models.Model):
     guest_name = models.CharField(max_length=255, blank=True, null=True, verbose_name=_('Guest Name'))
     guest_email = models.EmailField(blank=True, null=True, verbose_name=_('Guest Email'))
     guest_phone = models.CharField(max_length=32, blank=True, null=True, verbose_name=_('Guest Phone'))
-    cart = models.OneToOneField('Cart', on_delete=models.SET_NULL, null=True, blank=True, related_name='order', verbose_name=_('Cart'))
+    cart = models.ForeignKey('Cart', on_delete=models.SET_NULL, null=True, blank=True, related_name='orders', verbose_name=_('Cart'))
     total_price = models.DecimalField(max_digits=12, decimal_places=2, verbose_name=_('Total Price'))
     status = models.CharField(
         max_length=20,
@@ -381,6 +685,11 @@ class Order(models.Model):
         verbose_name = _('Order')
         verbose_name_plural = _('Orders')
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['user', '-created_at', '-id']),
+            models.Index(fields=['status', '-created_at', '-id']),
+        ]
 
     def clean(self):
         # Ensure guest contact info is present if user is not set
@@ -423,4 +732,34 @@ class OrderItem(models.Model):
         ordering = ['order']
         indexes = [
             models.Index(fields=['order']),
+            models.Index(fields=['-created_at', '-id']),
         ]
+
+
+class IdempotencyKey(models.Model):
+    """
+    Outcome of a write request sent with an ``Idempotency-Key`` header, replayed to its retries.
+
+    Rows are kept small: the key, its scope and the endpoint are hashed into the primary key, the
+    request body into a short fingerprint, and the response body is stored compressed. See
+    ``services.idempotency``.
+    """
+    key = models.BinaryField(
+        max_length=32, primary_key=True, verbose_name=_('Key'),
+        help_text=_('Hash of the Idempotency-Key header, the user or guest email, the method and the path.')
+    )
+    fingerprint = models.BinaryField(
+        max_length=16, verbose_name=_('Fingerprint'), help_text=_('Hash of the request body.')
+    )
+    status_code = models.PositiveSmallIntegerField(
+        null=True, blank=True, verbose_name=_('Status Code'),
+        help_text=_('Status of the stored response, empty while the first request is in progress.')
+    )
+    response = models.BinaryField(
+        null=True, blank=True, verbose_name=_('Response'), help_text=_('zlib-compressed JSON response body.')
+    )
+    expires_at = models.DateTimeField(db_index=True, verbose_name=_('Expires At'))
+
+    class Meta:
+        verbose_name = _('Idempotency Key')
+        verbose_name_plural = _('Idempotency Keys')
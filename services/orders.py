@@ -0,0 +1,57 @@
+from django.db import router, transaction
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from .models import Order
+
+# State machine of Order.status: each transition moves an order from one of its source statuses
+# to its target status.
+ORDER_TRANSITIONS = {
+    'pay': (('PENDING',), 'PAID'),
+    'cancel': (('PENDING', 'PAID'), 'CANCELLED'),
+    'complete': (('PAID',), 'COMPLETED'),
+}
+
+
+class TransitionConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'The order is not in a status this transition applies to.'
+    default_code = 'conflict'
+
+
+def transition_order(pk, transition):
+    """
+    Applies ``transition`` to one order and returns its primary key.
+
+    The status is changed with a single conditional ``UPDATE ... WHERE status IN (sources)``, so
+    concurrent transitions cannot overwrite each other: the one that loses sees no row updated and
+    raises TransitionConflict. Raises Http404 for unknown orders.
+    """
+    sources, target = ORDER_TRANSITIONS[transition]
+    updated = Order.objects.filter(pk=pk, status__in=sources).update(status=target, updated_at=timezone.now())
+    if not updated:
+        # Read from the primary: the row may have just been changed by a concurrent transition.
+        order = get_object_or_404(Order.objects.using(router.db_for_write(Order)).only('status'), pk=pk)
+        raise TransitionConflict(f'Cannot {transition} an order that is {order.status}.')
+    return pk
+
+
+def bulk_transition_orders(pks, transition):
+    """
+    Applies ``transition`` to many orders at once and returns ``(updated, failed)``: the number of
+    orders moved and ``{pk: reason}`` for the others.
+
+    The current statuses are read with ``SELECT ... FOR UPDATE`` so the report matches what the
+    single ``UPDATE`` of the eligible orders does.
+    """
+    sources, target = ORDER_TRANSITIONS[transition]
+    pks = set(pks)
+    with transaction.atomic(using=router.db_for_write(Order)):
+        statuses = dict(Order.objects.select_for_update().filter(pk__in=pks).values_list('pk', 'status'))
+        eligible = [pk for pk, current in statuses.items() if current in sources]
+        updated = Order.objects.filter(pk__in=eligible).update(status=target, updated_at=timezone.now())
+    failed = {pk: 'Not found.' for pk in pks - statuses.keys()}
+    failed.update({pk: f'Cannot {transition} an order that is {current}.'
+                   for pk, current in statuses.items() if current not in sources})
+    return updated, failed
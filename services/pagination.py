@@ -0,0 +1,276 @@
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connection, connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from .search import search
+
+
+class CatalogCursorPagination(BasePagination):
+    """
+    Keyset pagination over the UNION of all service option tables.
+
+    The cursor holds the ``(sort value, type, id)`` of the row a page starts after and its
+    direction. Each UNION branch is filtered past that key and, where the database allows it,
+    limited to one page before the tables are merged, so every page is one query and rows
+    created while paging never shift the following pages. The sort values are ``Coalesce``
+    annotations that no index covers: each table is still read and sorted up to the cursor,
+    which is cheap at the size of the catalog.
+    """
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_branches(self, branches, sort_field, descending, request):
+        self.request = request
+        self.sort_field = sort_field
+        self.descending = descending
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[3]
+
+        if cursor is not None:
+            branches = [branch.filter(self.get_cursor_filter(cursor)) for branch in branches]
+        # Pages before the cursor are read backwards from it, then put back in display order.
+        prefix = '-' if descending != reverse else ''
+        ordering = (prefix + sort_field, prefix + 'type', prefix + 'id')
+        if connection.features.supports_slicing_ordering_in_compound:
+            # Let every table stop after one page instead of returning all of its rows.
+            branches = [branch.order_by(*ordering)[:page_size + 1] for branch in branches]
+        queryset = branches[0].union(*branches[1:], all=True).order_by(*ordering)
+
+        rows = list(queryset[:page_size + 1])
+        has_more = len(rows) > page_size
+        self.page = rows[:page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        return self.page
+
+    def get_cursor_filter(self, cursor):
+        value, type_, pk, reverse = cursor
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return (
+            Q(**{f'{self.sort_field}__{lookup}': value})
+            | Q(**{self.sort_field: value, f'type__{lookup}': type_})
+            | Q(**{self.sort_field: value, 'type': type_, f'id__{lookup}': pk})
+        )
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            # Cursors issued before previous links existed have no direction.
+            value, type_, pk, *reverse = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            value = Decimal(value) if self.sort_field == 'sort_price' else str(value)
+            return value, str(type_), int(pk), bool(reverse and reverse[0])
+        except (TypeError, ValueError, InvalidOperation, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse=False):
+        payload = json.dumps([str(row[self.sort_field]), row['type'], row['id'], reverse])
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+class SearchPagination(BasePagination):
+    """
+    Page-numbered pagination of search results, best match first.
+
+    Fetches one row past the page to tell whether there is a next page, so no ``COUNT(*)`` of the
+    matches is ever run.
+    """
+    page_size = 20
+    max_page_size = 100
+    page_query_param = 'page'
+    page_size_query_param = 'page_size'
+    invalid_page_message = 'Invalid page.'
+
+    def paginate_search(self, query, request):
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message)
+        rows = search(query, page_size + 1, (self.page_number - 1) * page_size)
+        self.has_next = len(rows) > page_size
+        self.page = rows[:page_size]
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.page_query_param, self.page_number + 1)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class OrderCursorPagination(BasePagination):
+    """
+    Keyset pagination for order history, newest first, keyed on ``(created_at, id)``.
+
+    The cursor holds the ``(created_at, id)`` of the row a page starts after and its direction.
+    Pages are read with ``created_at <= c AND (created_at < c OR id < pk)``, the tuple comparison
+    ``(created_at, id) < (c, pk)``, so they are a range scan of the composite ``created_at``/``id``
+    indexes on Order and OrderItem and their latency does not depend on how far back the client
+    has paged. Unlike an offset, rows created while paging never shift the following pages.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    max_page_size = 200
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.pk_field = queryset.model._meta.pk
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor[2]
+        if cursor is not None:
+            queryset = queryset.filter(self.get_cursor_filter(cursor))
+        ordering = tuple(field.lstrip('-') for field in self.ordering) if reverse else self.ordering
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        self.page = rows[:page_size]
+        if reverse:
+            # Read backwards from the cursor, the page is put back in display order.
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        return self.page
+
+    def get_cursor_filter(self, cursor):
+        created_at, pk, reverse = cursor
+        lookup = 'gt' if reverse else 'lt'
+        return Q(**{f'created_at__{lookup}e': created_at}) & (
+            Q(**{f'created_at__{lookup}': created_at}) | Q(**{f'pk__{lookup}': pk}))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(page_size, 1), self.max_page_size)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            created_at, pk, reverse = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')).decode('utf-8'))
+            created_at = datetime.fromisoformat(created_at)
+            return created_at, self.pk_field.to_python(pk), bool(reverse)
+        except (TypeError, ValueError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, row, reverse=False):
+        payload = json.dumps([row.created_at.isoformat(), str(row.pk), reverse])
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page[0], reverse=True))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+
+def estimate_count(queryset):
+    """
+    Returns the PostgreSQL planner's estimate of the number of rows of ``queryset``, or None
+    on other databases.
+    """
+    db = queryset.db
+    if connections[db].vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connections[db].cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator for large admin changelists that trusts the planner's row estimate rather than
+    running an exact ``COUNT(*)`` once the estimate exceeds ``exact_count_threshold``.
+
+    Counts above the threshold are approximate, which only affects the page links.
+    """
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list)
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
@@ -0,0 +1,187 @@
+import time
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import router
+from django.db.models import F, IntegerField, Value
+from django.db.models.functions import Cast, Greatest
+from rest_framework.exceptions import ValidationError
+from .cache import KEY_PREFIX, get_catalog_cache
+from .models import MONEY, SERVICE_OPTION_MODELS, PriceVersion
+
+CENT = Decimal('0.01')
+
+
+def line_total(unit_price, quantity):
+    """
+    Exact price of ``quantity`` units at ``unit_price``, rounded to the cent.
+    """
+    return (unit_price * quantity).quantize(CENT)
+
+
+def option_models():
+    """
+    Returns the service option models by the id of their content type.
+    """
+    return {content_type.pk: model
+            for model, content_type in ContentType.objects.get_for_models(*SERVICE_OPTION_MODELS).items()}
+
+
+def price_versions():
+    """
+    Returns the current price version of every service option model, by model label, in one query.
+    """
+    return dict(PriceVersion.objects.values_list('model', 'version'))
+
+
+def bump_price_version(model):
+    """
+    Invalidates the cached prices of every option of ``model``, in every process.
+
+    Run it in the transaction that changes the options: the new version becomes visible with the
+    new prices. Versions move to at least the current time in nanoseconds so that a version lost
+    with a rolled back or restored database is never reused for other prices.
+    """
+    label = model._meta.label_lower
+    if not PriceVersion.objects.filter(model=label).update(version=Greatest(F('version') + 1, Value(time.time_ns()))):
+        PriceVersion.objects.get_or_create(model=label, defaults={'version': time.time_ns()})
+
+
+def price_cache_keys(model, pks, versions):
+    """
+    Returns the catalog cache key of the price of every option of ``model`` among ``pks``,
+    under the price version of ``model`` in ``versions``.
+    """
+    prefix = f'{KEY_PREFIX}:prices:{model._meta.label_lower}:{versions.get(model._meta.label_lower, 0)}'
+    return {pk: f'{prefix}:{pk}' for pk in pks}
+
+
+def load_prices(requested):
+    """
+    Computes ``{model: {pk: (unit_price, components)}}`` in SQL for the ``{model: pks}`` in
+    ``requested``, with one UNION query whatever the number of option types.
+
+    Every branch selects every component name of the requested types, zero where its own
+    model has no such component, and only the model's own components are returned.
+
+    Prices are read from the primary, like the price versions they are cached under: read from
+    a lagging replica, old prices would be cached under a new version.
+    """
+    requested = [(model, pks) for model, pks in requested.items() if pks]
+    if not requested:
+        return {}
+    names = list(dict.fromkeys(name for model, _ in requested for name in model.price_component_expressions()))
+    zero = Value(Decimal('0.00'), output_field=MONEY)
+    branches = []
+    for index, (model, pks) in enumerate(requested):
+        expressions = model.price_component_expressions()
+        # Component names can clash with field names (e.g. ``bracket``), so the columns are prefixed.
+        branches.append(model.objects.using(router.db_for_write(model)).filter(pk__in=pks).order_by().values(
+            'pk', option_type=Value(index, output_field=IntegerField()),
+            **{f'component_{name}': Cast(expressions.get(name, zero), MONEY) for name in names}))
+    queryset = branches[0].union(*branches[1:], all=True) if len(branches) > 1 else branches[0]
+    prices = {model: {} for model, _ in requested}
+    for row in queryset:
+        model = requested[row['option_type']][0]
+        components = {name: Decimal(row[f'component_{name}']).quantize(CENT)
+                      for name in model.price_component_expressions()}
+        prices[model][row['pk']] = (sum(components.values(), Decimal('0.00')), components)
+    return prices
+
+
+def cached_prices(requested, versions):
+    """
+    Returns ``{model: {pk: (unit_price, components)}}`` for the options of the ``{model: pks}``
+    in ``requested`` that exist.
+
+    Prices are cached in the catalog cache under the price version of their model read from the
+    primary (``versions``, from ``price_versions()``). Saving or deleting an option changes the
+    version (see ``services.signals``), so no process can serve its old price once the change is
+    committed. Options missing from the cache are priced by ``load_prices`` in one query, on the
+    primary too, so a replica never puts old prices under a new version.
+    """
+    cache = get_catalog_cache()
+    keys = {model: price_cache_keys(model, pks, versions) for model, pks in requested.items()}
+    cached = cache.get_many([key for model_keys in keys.values() for key in model_keys.values()])
+    prices, missing = {}, {}
+    for model, model_keys in keys.items():
+        prices[model] = {pk: cached[key] for pk, key in model_keys.items() if key in cached}
+        missing[model] = [pk for pk in model_keys if pk not in prices[model]]
+    loaded = load_prices(missing)
+    for model, model_loaded in loaded.items():
+        cache.set_many({keys[model][pk]: price for pk, price in model_loaded.items()},
+                       timeout=getattr(settings, 'SERVICES_CATALOG_CACHE_TIMEOUT', 60 * 60 * 6))
+        prices[model].update(model_loaded)
+    return prices
+
+
+def model_prices(model, pks, versions=None):
+    """
+    Returns ``{pk: (unit_price, components)}`` for the options of ``model`` among ``pks`` that
+    exist, see ``cached_prices``. ``versions``, from ``price_versions()``, saves a query.
+    """
+    if versions is None:
+        versions = price_versions()
+    return cached_prices({model: pks}, versions)[model]
+
+
+def option_prices(keys, raise_exception=True):
+    """
+    Returns ``{(content_type_id, object_id): (unit_price, components)}`` for the option references in ``keys``.
+
+    This is the single source of option prices: quotes, cart adds, cart item totals, checkout
+    and search all price options through it. Options are priced by ``cached_prices``, with one
+    version query, one cache read and, for the prices not cached yet, one query whatever the
+    option types involved. Raises ValidationError listing the references that are not service
+    options, unless ``raise_exception`` is False, in which case they are left out of the result.
+    """
+    models = option_models()
+    requested = defaultdict(set)
+    for content_type_id, object_id in keys:
+        requested[content_type_id].add(object_id)
+    errors = [{'content_type': content_type_id, 'detail': 'Not a service option type.'}
+              for content_type_id in requested if content_type_id not in models]
+    requested = {content_type_id: object_ids for content_type_id, object_ids in requested.items()
+                 if content_type_id in models}
+    found = cached_prices({models[content_type_id]: object_ids for content_type_id, object_ids in requested.items()},
+                          price_versions()) if requested else {}
+    prices = {}
+    for content_type_id, object_ids in requested.items():
+        model_found = found[models[content_type_id]]
+        for object_id in sorted(object_ids):
+            if object_id in model_found:
+                prices[content_type_id, object_id] = model_found[object_id]
+            else:
+                errors.append({'content_type': content_type_id, 'object_id': object_id,
+                               'detail': 'Service option not found.'})
+    if errors and raise_exception:
+        raise ValidationError({'items': errors})
+    return prices
+
+
+def quote(configurations):
+    """
+    Prices many candidate configurations in one pass.
+
+    ``configurations`` is a list of lists of ``content_type``/``object_id``/``quantity`` dicts.
+    Every option referenced by any configuration is priced once, then each configuration is
+    returned with its priced lines and its total.
+    """
+    prices = option_prices({(line['content_type'], line['object_id'])
+                            for lines in configurations for line in lines})
+    quotes = []
+    for lines in configurations:
+        priced = []
+        for line in lines:
+            unit_price, components = prices[line['content_type'], line['object_id']]
+            priced.append({
+                'content_type': line['content_type'],
+                'object_id': line['object_id'],
+                'quantity': line['quantity'],
+                'unit_price': unit_price,
+                'components': components,
+                'line_total': line_total(unit_price, line['quantity']),
+            })
+        quotes.append({'items': priced, 'total': sum((line['line_total'] for line in priced), Decimal('0.00'))})
+    return quotes
@@ -0,0 +1,146 @@
+import re
+from itertools import islice
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections, router
+from django.db.models import Q
+from .models import (SERVICE_OPTION_MODELS, FurnitureAssemblyOption, GazeboServiceOption, InstallationServiceOption,
+                     SearchEntry, TVMountingOption)
+from .pricing import option_prices
+
+# Related names folded into the ``keywords`` of each option type.
+SEARCH_KEYWORDS = {
+    TVMountingOption: ('category__name',),
+    FurnitureAssemblyOption: ('category__name',),
+    InstallationServiceOption: ('category__name', 'installation_type__name'),
+    GazeboServiceOption: ('category__name', 'gazebo_model__name'),
+}
+INDEX_BATCH_SIZE = 1000
+
+# Queries of the full-text indexes created by migration 0012_searchentry: a weighted, generated
+# tsvector column with a GIN index on PostgreSQL, an FTS5 table kept in sync by triggers on SQLite.
+POSTGRES_SEARCH = """
+    SELECT e.content_type_id, e.object_id, e.category_id, e.title, e.description, ts_rank_cd(e.document, q) AS rank
+    FROM services_searchentry e, to_tsquery('english'::regconfig, %s) q
+    WHERE e.document @@ q
+    ORDER BY rank DESC, e.id
+    LIMIT %s OFFSET %s
+"""
+SQLITE_SEARCH = """
+    SELECT e.content_type_id, e.object_id, e.category_id, e.title, e.description,
+           -bm25(services_searchentry_fts, 10.0, 5.0, 1.0) AS rank
+    FROM services_searchentry_fts JOIN services_searchentry e ON e.id = services_searchentry_fts.rowid
+    WHERE services_searchentry_fts MATCH %s
+    ORDER BY rank DESC, e.id
+    LIMIT %s OFFSET %s
+"""
+
+
+def keyword_sources(model):
+    """
+    Returns the ``(option model, foreign key name)`` pairs whose keywords include the names of ``model``.
+    """
+    sources = []
+    for option_model, lookups in SEARCH_KEYWORDS.items():
+        for lookup in lookups:
+            field = option_model._meta.get_field(lookup.split('__')[0])
+            if field.related_model is model:
+                sources.append((option_model, field.name))
+    return sources
+
+
+def indexed_fields(model):
+    """
+    Returns the names and attnames of the fields of option ``model`` that its search entry is built from.
+    """
+    fields = [model._meta.get_field(name) for name in ('title', 'description', 'category', *(
+        lookup.split('__')[0] for lookup in SEARCH_KEYWORDS[model]))]
+    return {field.name for field in fields} | {field.attname for field in fields}
+
+
+def index_options(model, queryset=None, batch_size=INDEX_BATCH_SIZE):
+    """
+    Writes the search entries of the options of ``queryset`` (all options of ``model`` by default),
+    one ``INSERT ... ON CONFLICT DO UPDATE`` per batch.
+    """
+    queryset = model.objects.all() if queryset is None else queryset
+    content_type = ContentType.objects.get_for_model(model)
+    rows = queryset.order_by().values_list(
+        'pk', 'title', 'description', 'category_id', *SEARCH_KEYWORDS[model]).iterator(chunk_size=batch_size)
+    indexed = 0
+    while batch := list(islice(rows, batch_size)):
+        SearchEntry.objects.bulk_create(
+            [
+                SearchEntry(content_type=content_type, object_id=pk, category_id=category_id, title=title or '',
+                            description=description or '', keywords=' '.join(name for name in names if name))
+                for pk, title, description, category_id, *names in batch
+            ],
+            update_conflicts=True,
+            unique_fields=['content_type', 'object_id'],
+            update_fields=['category', 'title', 'description', 'keywords'],
+        )
+        indexed += len(batch)
+    return indexed
+
+
+def rebuild_search_index(batch_size=INDEX_BATCH_SIZE):
+    """
+    Re-indexes every service option and drops the entries of options that no longer exist.
+    """
+    indexed = 0
+    for model in SERVICE_OPTION_MODELS:
+        indexed += index_options(model, batch_size=batch_size)
+        SearchEntry.objects.filter(content_type=ContentType.objects.get_for_model(model)).exclude(
+            object_id__in=model.objects.values('pk')).delete()
+    return indexed
+
+
+def search_terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def search(query, limit, offset=0):
+    """
+    Returns the options matching every word of ``query`` (as a prefix), best match first.
+
+    Rows carry the option's ``type``, ``content_type``, ``id``, ``category``, ``title``,
+    ``description``, ``unit_price`` and the ``rank`` of the match.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return []
+    alias = router.db_for_read(SearchEntry)
+    connection = connections[alias]
+    if connection.vendor == 'postgresql':
+        sql, match = POSTGRES_SEARCH, ' & '.join(f'{term}:*' for term in terms)
+    elif connection.vendor == 'sqlite':
+        sql, match = SQLITE_SEARCH, ' '.join(f'"{term}"*' for term in terms)
+    else:
+        sql = None
+    if sql is not None:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [match, limit, offset])
+            rows = cursor.fetchall()
+    else:
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(keywords__icontains=term) | Q(description__icontains=term)
+        rows = [(*row, None) for row in SearchEntry.objects.using(alias).filter(condition).order_by('title', 'pk')
+                .values_list('content_type_id', 'object_id', 'category_id', 'title', 'description')[offset:offset + limit]]
+
+    prices = option_prices({(content_type_id, object_id) for content_type_id, object_id, *_ in rows},
+                           raise_exception=False)
+    results = []
+    for content_type_id, object_id, category_id, title, description, rank in rows:
+        model = ContentType.objects.get_for_id(content_type_id).model_class()
+        unit_price, _ = prices.get((content_type_id, object_id), (None, None))
+        results.append({
+            'type': model._meta.model_name,
+            'content_type': content_type_id,
+            'id': object_id,
+            'category': category_id,
+            'title': title,
+            'description': description,
+            'unit_price': unit_price,
+            'rank': rank,
+        })
+    return results
@@ -1,7 +1,17 @@
 import base64
+from decimal import Decimal
+from collections import defaultdict
+from asgiref.sync import sync_to_async
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.contenttypes.models import ContentType
+from django.core.files.storage import default_storage
+from django.db import models
+from .catalog import CATALOG_ORDERINGS
+from .fieldsets import DynamicFieldsMixin, nested_context, optimize_queryset
+from .images import srcset
+from .orders import ORDER_TRANSITIONS
+from .pricing import line_total, option_prices
 from .models import (Cart, CartItem, FurnitureAssemblyOption, Location, ServiceType, AssemblyType,
                      GazeboServiceOption, GazeboModel,
                      InstallationServiceOption, InstallationType,
@@ -11,18 +21,99 @@ from .models import (Cart, CartItem, FurnitureAssemblyOption, Location, ServiceT
                      OrderItem)
 
 
-def serialize_service_option(obj):
-    if obj is None:
+# Nested lookups embedded by each option serializer, joined when options are resolved in bulk.
+SERVICE_OPTION_RELATED = {
+    TVMountingOption: (),
+    FurnitureAssemblyOption: ('location', 'service_type', 'assembly_type'),
+    InstallationServiceOption: ('installation_type',),
+    GazeboServiceOption: ('gazebo_model',),
+}
+
+
+def _pending_service_options(items):
+    pending = defaultdict(list)
+    for item in items:
+        if not item._meta.get_field('service_option').is_cached(item):
+            pending[item.content_type_id].append(item)
+    return pending
+
+
+def _service_option_queryset(content_type_id, queryset_for=None):
+    model = ContentType.objects.get_for_id(content_type_id).model_class()
+    if model is None:
         return None
-    if isinstance(obj, TVMountingOption):
-        return TVMountingOptionSerializer(obj).data
-    elif isinstance(obj, FurnitureAssemblyOption):
-        return FurnitureAssemblyOptionSerializer(obj).data
-    elif isinstance(obj, InstallationServiceOption):
-        return InstallationServiceOptionSerializer(obj).data
-    elif isinstance(obj, GazeboServiceOption):
-        return GazeboServiceOptionSerializer(obj).data
-    return None
+    if queryset_for is not None:
+        return queryset_for(model)
+    return model._default_manager.select_related(*SERVICE_OPTION_RELATED.get(model, ()))
+
+
+def _cache_service_options(group, options):
+    for item in group:
+        item._meta.get_field('service_option').set_cached_value(item, options.get(item.object_id))
+
+
+def resolve_service_options(items, queryset_for=None):
+    """
+    Populates the ``service_option`` of CartItem/OrderItem instances in bulk.
+
+    Items are grouped by content type and every option model is loaded with a single
+    ``in_bulk`` query joined with its nested lookups, so the number of queries depends
+    on the number of option types rather than on the number of items. ``queryset_for``
+    maps an option model to the queryset to load it from instead.
+    """
+    for content_type_id, group in _pending_service_options(items).items():
+        queryset = _service_option_queryset(content_type_id, queryset_for)
+        options = queryset.in_bulk({item.object_id for item in group}) if queryset is not None else {}
+        _cache_service_options(group, options)
+    return items
+
+
+async def aresolve_service_options(items, queryset_for=None):
+    """
+    Async version of ``resolve_service_options``.
+    """
+    for content_type_id, group in _pending_service_options(items).items():
+        queryset = await sync_to_async(_service_option_queryset)(content_type_id, queryset_for)
+        options = await queryset.ain_bulk({item.object_id for item in group}) if queryset is not None else {}
+        _cache_service_options(group, options)
+    return items
+
+
+class ServiceOptionItemListSerializer(serializers.ListSerializer):
+    """
+    List serializer for CartItem/OrderItem that resolves all service options in one batch.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        self.child.resolve_service_options(items)
+        return super().to_representation(items)
+
+
+class ItemContainerListSerializer(serializers.ListSerializer):
+    """
+    List serializer for Cart/Order that resolves the service options of every nested item
+    across the whole page in one batch.
+    """
+
+    def to_representation(self, data):
+        containers = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        items = self.child.fields.get('items')
+        if items is not None:
+            items.child.resolve_service_options([item for container in containers for item in container.items.all()])
+        return super().to_representation(containers)
+
+
+class SrcsetField(serializers.ReadOnlyField):
+    """
+    Read-only map of the generated derivatives of an image field, ``{format: {width: url}}``, or ``None``.
+    """
+
+    def to_representation(self, value):
+        if not value:
+            return None
+        return srcset(value.name, value.storage, self.context.get('request'))
+
 
 class UserInfoMixin:
     def get_user_info(self, obj):
@@ -31,30 +122,35 @@ class UserInfoMixin:
             return {'id': user.id, 'username': user.username, 'email': user.email}
         return None
 
-class BaseServiceOptionSerializer(serializers.ModelSerializer):
+class BaseServiceOptionSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    # Price preview including surcharges; subclasses list the model's ``price_fields`` as its dependencies.
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+
     class Meta:
         fields = '__all__'
         read_only_fields = ['id']
 
 class TVMountingOptionSerializer(BaseServiceOptionSerializer):
     category = serializers.PrimaryKeyRelatedField(queryset=ServiceCategory.objects.all())
+    related_image_srcset = SrcsetField(source='related_image')
 
     class Meta(BaseServiceOptionSerializer.Meta):
         model = TVMountingOption
+        field_dependencies = {'unit_price': TVMountingOption.price_fields}
 
-class LocationSerializer(serializers.ModelSerializer):
+class LocationSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Location
         fields = ['id', 'name']
         read_only_fields = ['id']
 
-class ServiceTypeSerializer(serializers.ModelSerializer):
+class ServiceTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ServiceType
         fields = ['id', 'name']
         read_only_fields = ['id']
 
-class AssemblyTypeSerializer(serializers.ModelSerializer):
+class AssemblyTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AssemblyType
         fields = ['id', 'name']
@@ -62,6 +158,7 @@ class AssemblyTypeSerializer(serializers.ModelSerializer):
 
 class FurnitureAssemblyOptionSerializer(BaseServiceOptionSerializer):
     category = serializers.PrimaryKeyRelatedField(queryset=ServiceCategory.objects.all())
+    related_image_srcset = SrcsetField(source='related_image')
     location = LocationSerializer(read_only=True)
     location_id = serializers.PrimaryKeyRelatedField(queryset=Location.objects.all(), source='location', write_only=True, required=False, allow_null=True)
     service_type = ServiceTypeSerializer(read_only=True)
@@ -71,55 +168,246 @@ class FurnitureAssemblyOptionSerializer(BaseServiceOptionSerializer):
 
     class Meta(BaseServiceOptionSerializer.Meta):
         model = FurnitureAssemblyOption
-        fields = ['id', 'category', 'title', 'description', 'related_image', 'price', 'quantity', 'location', 'location_id', 'service_type', 'service_type_id', 'assembly_type', 'assembly_type_id', 'created_at']
+        fields = ['id', 'category', 'title', 'description', 'related_image', 'related_image_srcset', 'price', 'quantity', 'location', 'location_id', 'service_type', 'service_type_id', 'assembly_type', 'assembly_type_id', 'unit_price']
         read_only_fields = BaseServiceOptionSerializer.Meta.read_only_fields
+        field_dependencies = {'unit_price': FurnitureAssemblyOption.price_fields}
+        collapsed_fields = {
+            'location': (serializers.PrimaryKeyRelatedField, {'read_only': True}),
+            'service_type': (serializers.PrimaryKeyRelatedField, {'read_only': True}),
+            'assembly_type': (serializers.PrimaryKeyRelatedField, {'read_only': True}),
+        }
+
+class InstallationTypeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    photo_srcset = SrcsetField(source='photo')
 
-class InstallationTypeSerializer(serializers.ModelSerializer):
     class Meta:
         model = InstallationType
-        fields = ['id', 'name', 'photo', 'description']
+        fields = ['id', 'name', 'photo', 'photo_srcset', 'description']
         read_only_fields = ['id']
 
 class InstallationServiceOptionSerializer(BaseServiceOptionSerializer):
     category = serializers.PrimaryKeyRelatedField(queryset=ServiceCategory.objects.all())
+    related_image_srcset = SrcsetField(source='related_image')
     installation_type = InstallationTypeSerializer(read_only=True)
     installation_type_id = serializers.PrimaryKeyRelatedField(queryset=InstallationType.objects.all(), source='installation_type', write_only=True, required=False, allow_null=True)
 
     class Meta(BaseServiceOptionSerializer.Meta):
         model = InstallationServiceOption
-        fields = ['id', 'category', 'title', 'description', 'related_image', 'price', 'quantity', 'installation_type', 'installation_type_id', 'location', 'power_nearby', 'created_at']
+        fields = ['id', 'category', 'title', 'description', 'related_image', 'related_image_srcset', 'price', 'quantity', 'installation_type', 'installation_type_id', 'location', 'power_nearby', 'unit_price']
         read_only_fields = BaseServiceOptionSerializer.Meta.read_only_fields
+        field_dependencies = {'unit_price': InstallationServiceOption.price_fields}
+        collapsed_fields = {
+            'installation_type': (serializers.PrimaryKeyRelatedField, {'read_only': True}),
+        }
+
+class GazeboModelSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    photo_srcset = SrcsetField(source='photo')
 
-class GazeboModelSerializer(serializers.ModelSerializer):
     class Meta:
         model = GazeboModel
-        fields = ['id', 'name', 'photo', 'description']
+        fields = ['id', 'name', 'photo', 'photo_srcset', 'description']
         read_only_fields = ['id']
 
 class GazeboServiceOptionSerializer(BaseServiceOptionSerializer):
     category = serializers.PrimaryKeyRelatedField(queryset=ServiceCategory.objects.all())
+    related_image_srcset = SrcsetField(source='related_image')
     gazebo_model = GazeboModelSerializer(read_only=True)
     gazebo_model_id = serializers.PrimaryKeyRelatedField(queryset=GazeboModel.objects.all(), source='gazebo_model', write_only=True, required=False, allow_null=True)
 
     class Meta(BaseServiceOptionSerializer.Meta):
         model = GazeboServiceOption
-        fields = ['id', 'category', 'title', 'description', 'related_image', 'price', 'quantity', 'action', 'gazebo_model', 'gazebo_model_id', 'size', 'anchoring', 'created_at'
+        fields = ['id', 'category', 'title', 'description', 'related_image', 'related_image_srcset', 'price', 'quantity', 'action', 'gazebo_model', 'gazebo_model_id', 'size', 'anchoring', 'anchoring_charge', 'unit_price'
         ]
         read_only_fields = BaseServiceOptionSerializer.Meta.read_only_fields
+        field_dependencies = {'unit_price': GazeboServiceOption.price_fields}
+        collapsed_fields = {
+            'gazebo_model': (serializers.PrimaryKeyRelatedField, {'read_only': True}),
+        }
+
 
+SERVICE_OPTION_SERIALIZERS = {
+    TVMountingOption: TVMountingOptionSerializer,
+    FurnitureAssemblyOption: FurnitureAssemblyOptionSerializer,
+    InstallationServiceOption: InstallationServiceOptionSerializer,
+    GazeboServiceOption: GazeboServiceOptionSerializer,
+}
 
-class ServiceCategorySerializer(serializers.ModelSerializer):
+
+class ServiceCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the ServiceCategory model.
     """
+    feature_image_srcset = SrcsetField(source='feature_image')
 
     class Meta:
         model = ServiceCategory
-        fields = ['id', 'name', 'description', 'feature_image', 'created_at']
+        fields = ['id', 'name', 'description', 'feature_image', 'feature_image_srcset', 'created_at']
         read_only_fields = ['id', 'created_at']
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+# Nested lookups embedded in the options of the category tree.
+CATEGORY_TREE_EXPAND = {
+    'furniture_assembly_options.location',
+    'furniture_assembly_options.service_type',
+    'furniture_assembly_options.assembly_type',
+    'installation_service_options.installation_type',
+    'gazebo_service_options.gazebo_model',
+}
+
+
+class CategoryTreeSerializer(ServiceCategorySerializer):
+    """
+    Serializer for a ServiceCategory with all of its options, see ``CATEGORY_TREE_EXPAND``.
+
+    Meant to be rendered with ``optimize_queryset``, which prefetches each list of options with
+    its lookups joined, so the whole tree costs one query per option type.
+    """
+    tv_mounting_options = TVMountingOptionSerializer(many=True, read_only=True, source='tvmountingoption_options')
+    furniture_assembly_options = FurnitureAssemblyOptionSerializer(
+        many=True, read_only=True, source='furnitureassemblyoption_options')
+    installation_service_options = InstallationServiceOptionSerializer(
+        many=True, read_only=True, source='installationserviceoption_options')
+    gazebo_service_options = GazeboServiceOptionSerializer(
+        many=True, read_only=True, source='gazeboserviceoption_options')
+
+    class Meta(ServiceCategorySerializer.Meta):
+        fields = ServiceCategorySerializer.Meta.fields + [
+            'tv_mounting_options', 'furniture_assembly_options', 'installation_service_options', 'gazebo_service_options',
+        ]
+
+
+class CatalogQuerySerializer(serializers.Serializer):
+    """
+    Validates the filter and ordering query parameters of the service catalog.
+    """
+    category = serializers.IntegerField(required=False)
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
+    ordering = serializers.ChoiceField(
+        choices=[prefix + key for key in CATALOG_ORDERINGS for prefix in ('', '-')], default='price')
+
+
+class OrderBulkTransitionSerializer(serializers.Serializer):
+    """
+    Validates a bulk status transition, see ``services.orders.bulk_transition_orders``.
+    """
+    transition = serializers.ChoiceField(choices=list(ORDER_TRANSITIONS))
+    ids = serializers.ListField(child=serializers.UUIDField(), allow_empty=False, max_length=10000)
+
+
+class SearchQuerySerializer(serializers.Serializer):
+    """
+    Validates the query parameters of the search endpoint.
+    """
+    q = serializers.CharField(max_length=200)
+
+
+class SearchResultSerializer(serializers.Serializer):
+    """
+    Serializer for the rows returned by ``services.search.search``.
+    """
+    type = serializers.CharField()
+    content_type = serializers.IntegerField()
+    id = serializers.IntegerField()
+    category = serializers.IntegerField()
+    title = serializers.CharField()
+    description = serializers.CharField()
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=2, allow_null=True)
+    rank = serializers.FloatField(allow_null=True)
+
+
+class OrderFilterSerializer(serializers.Serializer):
+    """
+    Validates the filter query parameters of the order history endpoints.
+    """
+    user = serializers.IntegerField(required=False)
+    status = serializers.ChoiceField(choices=Order._meta.get_field('status').choices, required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+
+
+class CatalogEntrySerializer(DynamicFieldsMixin, serializers.Serializer):
+    """
+    Serializer for the rows of the service catalog, i.e. the fields shared by every service option.
+    """
+    type = serializers.CharField()
+    content_type = serializers.IntegerField()
+    id = serializers.IntegerField()
+    category = serializers.IntegerField(source='category_id')
+    title = serializers.CharField()
+    description = serializers.CharField()
+    related_image = serializers.SerializerMethodField()
+    related_image_srcset = serializers.SerializerMethodField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2)
+    quantity = serializers.IntegerField()
+    needs_moving_help = serializers.CharField()
+    moving_help_charge = serializers.DecimalField(max_digits=10, decimal_places=2)
+    unit_price = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+    def get_related_image(self, row):
+        if not row['related_image']:
+            return None
+        url = default_storage.url(row['related_image'])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def get_related_image_srcset(self, row):
+        return srcset(row['related_image'], default_storage, self.context.get('request'))
+
+
+class ServiceOptionItemMixin:
+    """
+    Renders the generic ``service_option`` of CartItem/OrderItem, left out when ``?expand=`` does not list it.
+
+    Options are loaded with only the option serializer's fields, and only when rendered. When one
+    of ``option_price_fields`` is rendered, items get the ``unit_price`` of their option from
+    ``services.pricing.option_prices``, the prices used by quotes and checkout.
+    """
+    option_price_fields = ()
+
+    def get_option_queryset_for(self):
+        """
+        Returns how to load the options of the rendered fields, None when no option is rendered.
+        """
+        if 'service_option' in self.fields:
+            return lambda model: optimize_queryset(model._default_manager.all(), self.get_option_serializer(model))
+        return None
+
+    def resolve_service_options(self, items):
+        queryset_for = self.get_option_queryset_for()
+        if queryset_for is not None:
+            resolve_service_options(items, queryset_for)
+        self.resolve_unit_prices(items)
+
+    def resolve_unit_prices(self, items):
+        if not any(name in self.fields for name in self.option_price_fields):
+            return
+        pending = [item for item in items if not hasattr(item, 'unit_price')]
+        if not pending:
+            return
+        prices = option_prices({(item.content_type_id, item.object_id) for item in pending}, raise_exception=False)
+        for item in pending:
+            # Options deleted since they were added to the cart count for nothing.
+            item.unit_price = prices.get((item.content_type_id, item.object_id), (Decimal('0.00'), None))[0]
+
+    def get_option_serializer(self, model):
+        # One serializer per option type, reused for every item of the list.
+        if not hasattr(self, '_option_serializers'):
+            self._option_serializers = {}
+        if model not in self._option_serializers:
+            self._option_serializers[model] = SERVICE_OPTION_SERIALIZERS[model](
+                context=nested_context(self, 'service_option'))
+        return self._option_serializers[model]
+
+    def get_service_option(self, obj):
+        self.resolve_service_options([obj])
+        option = obj.service_option
+        if option is None or type(option) not in SERVICE_OPTION_SERIALIZERS:
+            return None
+        return self.get_option_serializer(type(option)).to_representation(option)
+
+
+class CartItemSerializer(ServiceOptionItemMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     """
     Improved serializer for CartItem model, handling generic relations and providing detailed service option data.
     """
@@ -127,56 +415,69 @@ class CartItemSerializer(serializers.ModelSerializer):
     object_id = serializers.IntegerField()
     service_option = serializers.SerializerMethodField(read_only=True)
     total_price = serializers.SerializerMethodField()
+    option_price_fields = ('total_price',)
 
     class Meta:
         model = CartItem
         fields = ['id', 'cart', 'content_type', 'object_id', 'service_option', 'quantity', 'total_price']
-
-    def get_service_option(self, obj):
-        return serialize_service_option(obj.service_option)
+        list_serializer_class = ServiceOptionItemListSerializer
+        collapsed_fields = {
+            'service_option': None,
+        }
+        field_dependencies = {
+            'service_option': ('content_type_id', 'object_id'),
+            'total_price': ('quantity', 'content_type_id', 'object_id'),
+        }
 
     def get_total_price(self, obj):
-        if obj.service_option and hasattr(obj.service_option, 'price'):
-            return obj.quantity * float(obj.service_option.price)
-        return 0
+        self.resolve_unit_prices([obj])
+        return line_total(obj.unit_price, obj.quantity)
+
+
+class CartItemBulkSerializer(serializers.Serializer):
+    """
+    One entry of a bulk add to a cart. Option references are checked in bulk by ``add_cart_items``.
+    """
+    content_type = serializers.IntegerField()
+    object_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1, default=1)
+
+
+class QuoteConfigurationSerializer(serializers.Serializer):
+    """
+    One candidate configuration to price, a list of options with their quantities.
+    """
+    items = CartItemBulkSerializer(many=True, allow_empty=False, max_length=100)
+
+
+class QuoteSerializer(serializers.Serializer):
+    """
+    Validates a quote request, many candidate configurations priced together by ``services.pricing.quote``.
+    """
+    configurations = QuoteConfigurationSerializer(many=True, allow_empty=False, max_length=1000)
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """
-    Improved serializer for Cart model, providing user info, item count, and robust total price calculation.
+    Improved serializer for Cart model, providing user info, item count, and total price.
+    Totals are read from the columns kept up to date by CartItem.
     """
     id = serializers.UUIDField(format='hex_verbose', read_only=True)
     items = CartItemSerializer(many=True, read_only=True)
-    total_price = serializers.SerializerMethodField()
-    item_count = serializers.SerializerMethodField()
+    total_price = serializers.DecimalField(source='subtotal', max_digits=12, decimal_places=2, read_only=True)
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), write_only=True, required=True)
 
     class Meta:
         model = Cart
         fields = ['id', 'user', 'items', 'item_count', 'total_price', 'created_at']
-        read_only_fields = ['created_at']
+        read_only_fields = ['created_at', 'item_count']
+        list_serializer_class = ItemContainerListSerializer
 
     def create(self, validated_data):
         user = validated_data.pop('user')
         cart = Cart.objects.create(user=user, **validated_data)
         return cart
 
-    def get_total_price(self, obj):
-        """
-        Calculates the total price of all items in the cart, safely handling missing prices.
-        """
-        total = 0
-        for item in obj.items.all():
-            price = getattr(item.service_option, 'price', 0) or 0
-            try:
-                total += item.quantity * float(price)
-            except Exception:
-                continue
-        return total
-
-    def get_item_count(self, obj):
-        return obj.items.count()
-
     def get_user(self, obj):
         user = getattr(obj, 'user', None)
         if user:
@@ -184,7 +485,7 @@ class CartSerializer(serializers.ModelSerializer):
         return None
 
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(ServiceOptionItemMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     service_option = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -193,12 +494,16 @@ class OrderItemSerializer(serializers.ModelSerializer):
             'id', 'order', 'content_type', 'object_id', 'service_option', 'quantity', 'price', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'service_option']
-
-    def get_service_option(self, obj):
-        return serialize_service_option(obj.service_option)
+        list_serializer_class = ServiceOptionItemListSerializer
+        collapsed_fields = {
+            'service_option': None,
+        }
+        field_dependencies = {
+            'service_option': ('content_type_id', 'object_id'),
+        }
 
 
-class OrderSerializer(UserInfoMixin, serializers.ModelSerializer):
+class OrderSerializer(UserInfoMixin, DynamicFieldsMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), write_only=True, required=False, allow_null=True)
     user_info = serializers.SerializerMethodField(read_only=True)
@@ -211,7 +516,12 @@ class OrderSerializer(UserInfoMixin, serializers.ModelSerializer):
         fields = [
             'id', 'user', 'user_info', 'guest_name', 'guest_email', 'guest_phone', 'cart', 'items', 'total_price', 'status', 'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'created_at', 'updated_at', 'items', 'user_info']
+        # Status changes go through the transition actions, see services.orders.
+        read_only_fields = ['id', 'created_at', 'updated_at', 'items', 'user_info', 'status']
+        list_serializer_class = ItemContainerListSerializer
+        field_dependencies = {
+            'user_info': ('user',),
+        }
 
     def create(self, validated_data):
         user = validated_data.pop('user', None)
@@ -0,0 +1,130 @@
+from functools import partial
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.db.models import OuterRef, Subquery
+from django.db.models.signals import post_delete, post_save, pre_save
+from .cache import bump_version
+from .images import schedule_derivatives, service_image_fields
+from .pricing import bump_price_version
+from .models import (SERVICE_OPTION_MODELS, AssemblyType, Cart, CartItem, GazeboModel, InstallationType, Location,
+                     SearchEntry, ServiceCategory, ServiceType)
+from .search import index_options, indexed_fields, keyword_sources
+
+CATALOG_MODELS = (ServiceCategory, *SERVICE_OPTION_MODELS, GazeboModel, InstallationType, Location, ServiceType,
+                  AssemblyType)
+
+
+def invalidate_catalog_cache(sender, **kwargs):
+    # Wait for the commit, otherwise a concurrent read could cache the old rows under the new version.
+    transaction.on_commit(partial(bump_version, sender), using=kwargs.get('using'))
+
+
+for model in CATALOG_MODELS:
+    post_save.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f'catalog_cache_save_{model.__name__}')
+    post_delete.connect(invalidate_catalog_cache, sender=model, dispatch_uid=f'catalog_cache_delete_{model.__name__}')
+
+
+def mark_new_uploads(sender, instance, **kwargs):
+    # Files are committed to storage after pre_save, so uncommitted files here are new uploads.
+    instance._new_service_images = [
+        field for field in service_image_fields(sender)
+        if getattr(instance, field.attname) and not getattr(instance, field.attname)._committed
+    ]
+
+
+def generate_image_derivatives(sender, instance, **kwargs):
+    for field in getattr(instance, '_new_service_images', ()):
+        field_file = getattr(instance, field.attname)
+        # Cached catalog responses embed the srcset, so refresh them once the derivatives exist.
+        schedule_derivatives(field_file.name, field_file.storage, partial(bump_version, sender))
+    instance._new_service_images = []
+
+
+for model in CATALOG_MODELS:
+    if service_image_fields(model):
+        pre_save.connect(mark_new_uploads, sender=model, dispatch_uid=f'service_images_pre_save_{model.__name__}')
+        post_save.connect(generate_image_derivatives, sender=model,
+                          dispatch_uid=f'service_images_post_save_{model.__name__}')
+
+
+def invalidate_prices(sender, raw=False, **kwargs):
+    # In the saving transaction, not on commit: the new version must be visible with the new prices.
+    if not raw:
+        bump_price_version(sender)
+
+
+for model in SERVICE_OPTION_MODELS:
+    post_save.connect(invalidate_prices, sender=model, dispatch_uid=f'prices_save_{model.__name__}')
+    post_delete.connect(invalidate_prices, sender=model, dispatch_uid=f'prices_delete_{model.__name__}')
+
+
+def _adjust_carts_containing(option, delta):
+    # Adds ``delta`` times the quantity of the option in each cart holding it, in one UPDATE. A price
+    # change is no activity of the carts' owners, so it does not keep abandoned carts alive.
+    items = CartItem.objects.filter(content_type=ContentType.objects.get_for_model(option), object_id=option.pk)
+    quantity = Subquery(items.filter(cart=OuterRef('pk')).values('quantity')[:1])
+    Cart.objects.filter(pk__in=items.values('cart_id')).adjust_totals(subtotal=quantity * delta, touch=False)
+
+
+def remember_unit_price(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_unit_price = None
+    if raw or instance._state.adding:
+        return
+    if update_fields is not None and not update_fields.intersection(sender.price_fields):
+        return
+    instance._previous_unit_price = (
+        sender.objects.filter(pk=instance.pk).values_list(sender.unit_price_expression(), flat=True).first()
+    )
+
+
+def reprice_carts(sender, instance, created, raw=False, **kwargs):
+    previous = getattr(instance, '_previous_unit_price', None)
+    if created or raw or previous is None or previous == instance.unit_price:
+        return
+    _adjust_carts_containing(instance, instance.unit_price - previous)
+
+
+def remove_from_cart_totals(sender, instance, **kwargs):
+    # Items of a deleted option are kept (checkout reports them as unavailable) but count for nothing.
+    _adjust_carts_containing(instance, -instance.unit_price)
+
+
+for model in SERVICE_OPTION_MODELS:
+    pre_save.connect(remember_unit_price, sender=model, dispatch_uid=f'cart_totals_pre_save_{model.__name__}')
+    post_save.connect(reprice_carts, sender=model, dispatch_uid=f'cart_totals_post_save_{model.__name__}')
+    post_delete.connect(remove_from_cart_totals, sender=model, dispatch_uid=f'cart_totals_delete_{model.__name__}')
+
+
+def index_option(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not update_fields.intersection(indexed_fields(sender))):
+        return
+    index_options(sender, sender.objects.filter(pk=instance.pk))
+
+
+def unindex_option(sender, instance, **kwargs):
+    SearchEntry.objects.filter(content_type=ContentType.objects.get_for_model(sender), object_id=instance.pk).delete()
+
+
+def remember_name(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_name = None
+    if raw or instance._state.adding or (update_fields is not None and 'name' not in update_fields):
+        return
+    instance._previous_name = sender.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+
+
+def reindex_named_options(sender, instance, created, raw=False, **kwargs):
+    # Options carry the names of their category, gazebo model or installation type as keywords.
+    # A new row has no options yet, and other changes leave the keywords alone.
+    previous = getattr(instance, '_previous_name', None)
+    if created or raw or previous is None or previous == instance.name:
+        return
+    for model, field_name in keyword_sources(sender):
+        index_options(model, model.objects.filter(**{field_name: instance}))
+
+
+for model in SERVICE_OPTION_MODELS:
+    post_save.connect(index_option, sender=model, dispatch_uid=f'search_index_save_{model.__name__}')
+    post_delete.connect(unindex_option, sender=model, dispatch_uid=f'search_index_delete_{model.__name__}')
+for model in (ServiceCategory, GazeboModel, InstallationType):
+    pre_save.connect(remember_name, sender=model, dispatch_uid=f'search_keywords_pre_save_{model.__name__}')
+    post_save.connect(reindex_named_options, sender=model, dispatch_uid=f'search_keywords_save_{model.__name__}')
@@ -0,0 +1,41 @@
+import hashlib
+import os
+import posixpath
+from uuid import uuid4
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage that names every file after the SHA-256 of its content.
+
+    ``cas/ab/cd/abcd....jpg`` is written once however many times the same bytes are
+    uploaded, and since a name can never point at different content its URL can be
+    cached forever. Only the extension of the requested name is kept.
+    """
+    prefix = 'cas'
+
+    @staticmethod
+    def content_hash(content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk if isinstance(chunk, bytes) else chunk.encode('utf-8'))
+        return digest.hexdigest()
+
+    def address(self, digest, name):
+        extension = posixpath.splitext(name)[1].lower()
+        return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is chosen by _save() from the content, so there is nothing to deduplicate here.
+        return name
+
+    def _save(self, name, content):
+        name = self.address(self.content_hash(content), name)
+        if self.exists(name):
+            return name
+        # Write under a unique temporary name and rename, so a concurrent upload of the
+        # same bytes never observes a partially written file.
+        temporary = super()._save(f'{name}.{uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
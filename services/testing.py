@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+from django.http.request import HttpHeaders
+from django.urls import reverse
+from .middleware import QueryRecorder, query_budget_for
+
+
+@contextmanager
+def query_budget(budget, label='block'):
+    """
+    Fails with the list of executed statements when the block runs more than ``budget`` queries.
+    """
+    with QueryRecorder() as recorder:
+        yield recorder
+    if recorder.count > budget:
+        raise AssertionError(f'{label} exceeded its query budget of {budget}: {recorder.report()}')
+
+
+def assert_query_budget(client, url_name, budget=None, method='get', args=None, kwargs=None, **request_kwargs):
+    """
+    Requests ``url_name`` with a Django test client and fails if the request exceeds its
+    query budget, which defaults to the entry in ``SERVICES_QUERY_BUDGETS``, plus the queries
+    of an ``Idempotency-Key`` when the request sends one.
+
+    Example::
+
+        assert_query_budget(self.client, 'cart-detail', kwargs={'pk': cart.pk})
+    """
+    if budget is None:
+        meta = {f'HTTP_{name.upper().replace("-", "_")}': value
+                for name, value in request_kwargs.get('headers', {}).items()}
+        meta.update((name, value) for name, value in request_kwargs.items() if name.startswith('HTTP_'))
+        budget = query_budget_for(url_name, method, HttpHeaders(meta))
+        if budget is None:
+            raise KeyError(f'{url_name} has no entry in SERVICES_QUERY_BUDGETS.')
+    url = reverse(url_name, args=args, kwargs=kwargs)
+    with query_budget(budget, label=f'{method.upper()} {url_name}'):
+        response = getattr(client, method)(url, **request_kwargs)
+    return response
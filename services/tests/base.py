@@ -0,0 +1,47 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase
+from services.cache import get_catalog_cache
+from services.models import (AssemblyType, Cart, FurnitureAssemblyOption, GazeboModel, GazeboServiceOption,
+                             InstallationServiceOption, InstallationType, Location, ServiceCategory, ServiceType,
+                             TVMountingOption)
+
+
+class ServicesTestCase(TestCase):
+    """
+    Test case with one option of every type, each with a surcharge, and a customer with a cart.
+
+    The catalog cache is cleared before every test: it is not rolled back with the database.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = ServiceCategory.objects.create(name='Test services')
+        cls.location = Location.objects.create(name='Test location')
+        cls.service_type = ServiceType.objects.create(name='Test service type')
+        cls.assembly_type = AssemblyType.objects.create(name='Test assembly type')
+        cls.installation_type = InstallationType.objects.create(name='Test installation type')
+        cls.gazebo_model = GazeboModel.objects.create(name='Test gazebo model')
+        cls.tv = TVMountingOption.objects.create(
+            category=cls.category, title='Wall mount', price=Decimal('100.00'), bracket='FLAT',
+            bracket_price=Decimal('25.00'))
+        cls.furniture = FurnitureAssemblyOption.objects.create(
+            category=cls.category, title='Wardrobe assembly', price=Decimal('80.00'), needs_moving_help='YES',
+            moving_help_charge=Decimal('15.50'), location=cls.location, service_type=cls.service_type,
+            assembly_type=cls.assembly_type)
+        cls.installation = InstallationServiceOption.objects.create(
+            category=cls.category, title='Ceiling fan', price=Decimal('60.00'), installation_type=cls.installation_type)
+        cls.gazebo = GazeboServiceOption.objects.create(
+            category=cls.category, title='Gazebo build', price=Decimal('300.00'), gazebo_model=cls.gazebo_model,
+            anchoring='YES', anchoring_charge=Decimal('40.00'))
+        cls.user = User.objects.create_user('customer', email='customer@example.com')
+        cls.cart = Cart.objects.create(user=cls.user)
+
+    def setUp(self):
+        get_catalog_cache().clear()
+
+    @staticmethod
+    def line(option, quantity=1):
+        return {'content_type': ContentType.objects.get_for_model(option).pk, 'object_id': option.pk,
+                'quantity': quantity}
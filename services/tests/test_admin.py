@@ -0,0 +1,61 @@
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.urls import reverse
+from services.models import Order, TVMountingOption
+from services.pagination import EstimatedCountPaginator, estimate_count
+from .base import ServicesTestCase
+
+
+class AdminChangelistTests(ServicesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        for price in ('40.00', '75.00', '600.00'):
+            TVMountingOption.objects.create(category=cls.category, title=f'Mount {price}', price=Decimal(price))
+        cls.guest_order = Order.objects.create(guest_name='Guest', guest_email='guest@example.com', total_price=0)
+        cls.user_order = Order.objects.create(user=cls.user, total_price=0)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.admin)
+
+    def changelist(self, model, query=''):
+        response = self.client.get(reverse(f'admin:services_{model}_changelist') + query)
+        self.assertEqual(response.status_code, 200)
+        return response.context['cl']
+
+    def test_price_range_filter(self):
+        expected = {'-50': ['Mount 40.00'], '50-100': ['Mount 75.00'], '100-250': ['Wall mount'],
+                    '250-500': [], '500-': ['Mount 600.00']}
+        for price_range, titles in expected.items():
+            with self.subTest(price_range=price_range):
+                changelist = self.changelist('tvmountingoption', f'?price_range={price_range}')
+                self.assertEqual(sorted(option.title for option in changelist.result_list), titles)
+
+    def test_search_matches_exact_values(self):
+        changelist = self.changelist('order', '?q=guest@example.com')
+        self.assertEqual(list(changelist.result_list), [self.guest_order])
+        self.assertEqual(list(self.changelist('order', '?q=guest').result_list), [])
+        self.assertEqual(list(self.changelist('order', '?q=customer').result_list), [self.user_order])
+
+    def test_large_tables_show_no_full_count(self):
+        changelist = self.changelist('order')
+        self.assertIsInstance(changelist.paginator, EstimatedCountPaginator)
+        self.assertIsNone(changelist.full_result_count)
+        self.assertEqual(changelist.result_count, 2)
+
+    def test_estimated_count_above_the_threshold(self):
+        self.assertIsNone(estimate_count(Order.objects.all()))  # Only PostgreSQL has a planner estimate.
+        with mock.patch('services.pagination.estimate_count', return_value=50000):
+            with self.assertNumQueries(0):
+                self.assertEqual(EstimatedCountPaginator(Order.objects.all(), 50).count, 50000)
+            changelist = self.changelist('order')
+        self.assertEqual((changelist.result_count, changelist.paginator.num_pages), (50000, 1000))
+        self.assertEqual(len(changelist.result_list), 2)
+
+    def test_exact_count_below_the_threshold(self):
+        with mock.patch('services.pagination.estimate_count', return_value=500):
+            with self.assertNumQueries(1):
+                self.assertEqual(EstimatedCountPaginator(Order.objects.all(), 50).count, 2)
@@ -0,0 +1,140 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from services.carts import add_cart_items
+from services.checkout import checkout_cart
+from services.models import Cart, FurnitureAssemblyOption, GazeboServiceOption, Order
+from services.testing import assert_query_budget
+from .base import ServicesTestCase
+
+
+class QueryBudgetTests(ServicesTestCase):
+    """
+    Requests every URL of ``SERVICES_QUERY_BUDGETS`` with several rows per table, so that a query
+    run per row breaks the budget.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number in range(3):
+            FurnitureAssemblyOption.objects.create(category=cls.category, title=f'Assembly {number}',
+                                                   location=cls.location, service_type=cls.service_type,
+                                                   assembly_type=cls.assembly_type)
+            GazeboServiceOption.objects.create(category=cls.category, title=f'Gazebo {number}',
+                                               gazebo_model=cls.gazebo_model)
+        lines = [cls.line(option) for option in (cls.tv, cls.furniture, cls.installation, cls.gazebo)]
+        for number in range(3):
+            cart = Cart.objects.create(user=User.objects.create_user(f'shopper{number}'))
+            add_cart_items(cart.pk, lines)
+            checkout_cart(cart.pk)
+            add_cart_items(cart.pk, lines)
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        add_cart_items(cls.cart.pk, lines)
+        cls.order = Order.objects.first()
+
+    def assert_budget(self, url_name, method='get', status=200, **kwargs):
+        response = assert_query_budget(self.client, url_name, method=method, **kwargs)
+        self.assertEqual(response.status_code, status, response.content)
+        return response
+
+    def test_every_budget_is_tested(self):
+        tested = {name[len('test_'):].replace('_', '-') for name in dir(self) if name.startswith('test_')}
+        self.assertEqual(set(settings.SERVICES_QUERY_BUDGETS) - tested, set())
+
+    def test_service_category_list(self):
+        self.assert_budget('service-category-list')
+
+    def test_service_category_detail(self):
+        self.assert_budget('service-category-detail', kwargs={'pk': self.category.pk})
+
+    def test_tv_mounting_option_list(self):
+        self.assert_budget('tv-mounting-option-list')
+
+    def test_furniture_assembly_option_list(self):
+        self.assert_budget('furniture-assembly-option-list')
+
+    def test_installation_service_option_list(self):
+        self.assert_budget('installation-service-option-list')
+
+    def test_gazebo_service_option_list(self):
+        self.assert_budget('gazebo-service-option-list')
+
+    def test_catalog_list(self):
+        self.assert_budget('catalog-list')
+
+    def test_cart_list(self):
+        self.assert_budget('cart-list')
+
+    def test_cart_detail(self):
+        self.assert_budget('cart-detail', kwargs={'pk': self.cart.pk})
+
+    def test_cart_items_list(self):
+        self.assert_budget('cart-items-list', kwargs={'cart_pk': self.cart.pk})
+
+    def test_order_list(self):
+        self.assert_budget('order-list')
+
+    def test_order_detail(self):
+        self.assert_budget('order-detail', kwargs={'pk': self.order.pk})
+
+    def test_orderitem_list(self):
+        self.assert_budget('orderitem-list')
+
+    def test_cart_checkout(self):
+        self.assert_budget('cart-checkout', method='post', status=201, kwargs={'pk': self.cart.pk})
+
+    def test_order_pay(self):
+        self.assert_budget('order-pay', method='post', kwargs={'pk': self.order.pk})
+
+    def test_order_cancel(self):
+        self.assert_budget('order-cancel', method='post', kwargs={'pk': self.order.pk})
+
+    def test_order_complete(self):
+        Order.objects.filter(pk=self.order.pk).update(status='PAID')
+        self.assert_budget('order-complete', method='post', kwargs={'pk': self.order.pk})
+
+    def test_order_bulk_transition(self):
+        self.client.force_login(self.admin)
+        ids = [str(pk) for pk in Order.objects.values_list('pk', flat=True)]
+        self.assert_budget('order-bulk-transition', method='post', content_type='application/json',
+                           data={'transition': 'pay', 'ids': ids})
+
+    def test_quote(self):
+        self.assert_budget('quote', method='post', content_type='application/json', data={'configurations': [
+            {'items': [self.line(self.tv), self.line(self.gazebo, 2)]}, {'items': [self.line(self.furniture)]}]})
+
+    def test_category_tree(self):
+        self.assert_budget('category-tree')
+
+    def test_service_list(self):
+        self.assert_budget('service-list')
+
+    def test_search(self):
+        self.assert_budget('search', data={'q': 'gazebo'})
+
+    def test_tv_mounting_option_facets(self):
+        self.assert_budget('tv-mounting-option-facets')
+
+    def test_furniture_assembly_option_facets(self):
+        self.assert_budget('furniture-assembly-option-facets')
+
+    def test_installation_service_option_facets(self):
+        self.assert_budget('installation-service-option-facets')
+
+    def test_gazebo_service_option_facets(self):
+        self.assert_budget('gazebo-service-option-facets')
+
+    def test_async_service_category_list(self):
+        self.assert_budget('async-service-category-list')
+
+    def test_async_option_list(self):
+        for kind in ('tv-mounting-options', 'furniture-assembly-options', 'installation-service-options',
+                     'gazebo-service-options'):
+            with self.subTest(kind=kind):
+                self.assert_budget('async-option-list', kwargs={'kind': kind})
+
+    def test_async_cart_detail(self):
+        self.assert_budget('async-cart-detail', kwargs={'pk': self.cart.pk})
+
+    def test_async_order_detail(self):
+        self.assert_budget('async-order-detail', kwargs={'pk': self.order.pk})
@@ -0,0 +1,103 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from services.models import Cart, CartItem
+from .base import ServicesTestCase
+
+
+class CartTotalsTests(ServicesTestCase):
+    def add(self, option, quantity=1, cart=None):
+        return CartItem.objects.create(cart=cart or self.cart, content_type=ContentType.objects.get_for_model(option),
+                                       object_id=option.pk, quantity=quantity)
+
+    def assert_totals(self, cart=None):
+        cart = Cart.objects.get(pk=(cart or self.cart).pk)
+        stored = (cart.item_count, cart.subtotal)
+        Cart.objects.filter(pk=cart.pk).recompute_totals()
+        cart.refresh_from_db()
+        self.assertEqual(stored, (cart.item_count, cart.subtotal))
+        return stored
+
+    def test_create(self):
+        self.add(self.tv, 2)
+        self.add(self.furniture)
+        self.assertEqual(self.assert_totals(), (2, Decimal('345.50')))
+
+    def test_update_quantity(self):
+        item = self.add(self.tv, 2)
+        item.quantity = 5
+        item.save()
+        self.assertEqual(self.assert_totals(), (1, Decimal('625.00')))
+
+    def test_update_from_a_stale_instance(self):
+        item = self.add(self.tv, 2)
+        stale = CartItem.objects.get(pk=item.pk)
+        item.quantity = 4
+        item.save()
+        # The delta is taken from the stored quantity (4), not the one the stale instance loaded (2).
+        stale.quantity = 3
+        stale.save()
+        self.assertEqual(self.assert_totals(), (1, Decimal('375.00')))
+
+    def test_move_between_carts(self):
+        other = Cart.objects.create(user=User.objects.create_user('other'))
+        item = self.add(self.gazebo, 2)
+        self.add(self.installation)
+        item.cart = other
+        item.save()
+        self.assertEqual(self.assert_totals(), (1, Decimal('60.00')))
+        self.assertEqual(self.assert_totals(other), (1, Decimal('680.00')))
+
+    def test_change_option(self):
+        item = self.add(self.tv, 2)
+        item.content_type = ContentType.objects.get_for_model(self.installation)
+        item.object_id = self.installation.pk
+        item.save()
+        self.assertEqual(self.assert_totals(), (1, Decimal('120.00')))
+
+    def test_delete(self):
+        item = self.add(self.tv, 2)
+        self.add(self.furniture)
+        item.delete()
+        self.assertEqual(self.assert_totals(), (1, Decimal('95.50')))
+
+    def test_delete_of_a_stale_instance(self):
+        item = self.add(self.tv, 2)
+        stale = CartItem.objects.get(pk=item.pk)
+        item.quantity = 3
+        item.save()
+        stale.delete()
+        self.assertEqual(self.assert_totals(), (0, Decimal('0.00')))
+        # Deleting an item that is already gone leaves the totals alone.
+        item.delete()
+        self.assertEqual(self.assert_totals(), (0, Decimal('0.00')))
+
+    def test_bulk_delete(self):
+        other = Cart.objects.create(user=User.objects.create_user('other'))
+        self.add(self.tv, 2)
+        self.add(self.furniture)
+        self.add(self.gazebo, cart=other)
+        self.add(self.installation, 3, cart=other)
+        CartItem.objects.filter(object_id__in=[self.tv.pk, self.gazebo.pk],
+                                content_type__in=ContentType.objects.get_for_models(self.tv, self.gazebo).values()
+                                ).delete()
+        self.assertEqual(self.assert_totals(), (1, Decimal('95.50')))
+        self.assertEqual(self.assert_totals(other), (1, Decimal('180.00')))
+
+    def test_price_change_reprices_carts(self):
+        self.add(self.tv, 2)
+        self.tv.bracket = 'OWN'
+        self.tv.save()
+        self.assertEqual(self.assert_totals(), (1, Decimal('200.00')))
+
+    def test_save_without_price_fields_skips_repricing(self):
+        self.add(self.tv, 2)
+        self.tv.title = 'Renamed'
+        with CaptureQueriesContext(connection) as queries:
+            self.tv.save(update_fields=['title'])
+        self.assertIsNone(self.tv._previous_unit_price)
+        self.assertFalse([query for query in queries if query['sql'].startswith('SELECT') and
+                          '"bracket_price"' in query['sql']])
+        self.assertEqual(self.assert_totals(), (1, Decimal('250.00')))
@@ -0,0 +1,92 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import F
+from django.urls import reverse
+from django.utils import timezone
+from services import carts
+from services.carts import add_cart_items, purge_abandoned_carts
+from services.models import Cart, CartItem, Order
+from .base import ServicesTestCase
+
+
+class AddCartItemsTests(ServicesTestCase):
+    def quantities(self):
+        return dict(CartItem.objects.filter(cart=self.cart).values_list('object_id', 'quantity'))
+
+    def test_adds_to_the_quantities_in_the_cart(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv, 2)])
+        add_cart_items(self.cart.pk, [self.line(self.tv), self.line(self.tv), self.line(self.gazebo, 3)])
+        self.assertEqual(self.quantities(), {self.tv.pk: 4, self.gazebo.pk: 3})
+        cart = Cart.objects.get(pk=self.cart.pk)
+        self.assertEqual((cart.item_count, cart.subtotal), (2, Decimal('1520.00')))
+
+    def test_increment_is_done_in_sql(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv, 2)])
+        upsert = carts.upsert_cart_items
+
+        def concurrent_write_then_upsert(*args, **kwargs):
+            # A writer that changed the quantity after the cart was read must not be overwritten.
+            CartItem.objects.filter(cart=self.cart).update(quantity=F('quantity') + 10)
+            return upsert(*args, **kwargs)
+
+        with mock.patch.object(carts, 'upsert_cart_items', concurrent_write_then_upsert):
+            add_cart_items(self.cart.pk, [self.line(self.tv, 1)])
+        self.assertEqual(self.quantities(), {self.tv.pk: 13})
+
+    def test_single_item_writes_keep_the_totals(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv, 2)])
+        response = self.client.post(reverse('cart-items-list', kwargs={'cart_pk': self.cart.pk}), {
+            'cart': str(self.cart.pk), 'content_type': ContentType.objects.get_for_model(self.gazebo).pk,
+            'object_id': self.gazebo.pk, 'quantity': 1}, content_type='application/json')
+        self.assertEqual(response.status_code, 201, response.content)
+        add_cart_items(self.cart.pk, [self.line(self.gazebo, 2)])
+        cart = Cart.objects.get(pk=self.cart.pk)
+        self.assertEqual((cart.item_count, cart.subtotal), (2, Decimal('1270.00')))
+        self.assertEqual(self.quantities(), {self.tv.pk: 2, self.gazebo.pk: 3})
+
+    def test_unknown_option_adds_nothing(self):
+        response = self.client.post(reverse('cart-items-bulk', kwargs={'cart_pk': self.cart.pk}),
+                                    [self.line(self.tv), {**self.line(self.tv), 'object_id': 999}],
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.quantities(), {})
+
+
+class PurgeAbandonedCartsTests(ServicesTestCase):
+    def setUp(self):
+        super().setUp()
+        add_cart_items(self.cart.pk, [self.line(self.tv), self.line(self.gazebo)])
+        self.cutoff = timezone.now() - timedelta(days=7)
+        self.idle(self.cart)
+
+    def idle(self, cart):
+        # Leaves the cart and its items untouched since long before the cutoff.
+        long_ago = self.cutoff - timedelta(days=30)
+        Cart.objects.filter(pk=cart.pk).update(updated_at=long_ago)
+        CartItem.objects.filter(cart=cart).update(updated_at=long_ago)
+
+    def purge(self):
+        return list(purge_abandoned_carts(self.cutoff))
+
+    def test_purges_idle_carts_with_their_items(self):
+        ordered = Cart.objects.create(user=User.objects.create_user('ordered'))
+        Order.objects.create(user=ordered.user, cart=ordered, total_price=0)
+        self.idle(ordered)
+        recent = Cart.objects.create(user=User.objects.create_user('recent'))
+
+        self.assertEqual(self.purge(), [(1, 2)])
+        self.assertEqual(set(Cart.objects.values_list('pk', flat=True)), {ordered.pk, recent.pk})
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_recently_edited_cart_survives(self):
+        CartItem.objects.get(cart=self.cart, content_type=ContentType.objects.get_for_model(self.gazebo)).delete()
+        self.assertEqual(self.purge(), [])
+        self.assertEqual(Cart.objects.get(pk=self.cart.pk).item_count, 1)
+
+    def test_price_changes_do_not_keep_carts_alive(self):
+        self.tv.price = Decimal('110.00')
+        self.tv.save()
+        self.assertEqual(self.purge(), [(1, 2)])
@@ -0,0 +1,86 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from .base import ServicesTestCase
+
+
+class CatalogCacheTests(ServicesTestCase):
+    def get(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache'], response.json()
+
+    def titles(self, url):
+        status, data = self.get(url)
+        return status, sorted(row['title'] if 'title' in row else row['name'] for row in data)
+
+    def refresh(self, url, change):
+        """
+        Caches ``url``, applies ``change`` and returns the titles of the rebuilt response.
+        """
+        self.get(url)
+        self.assertEqual(self.get(url)[0], 'HIT')
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        status, titles = self.titles(url)
+        self.assertEqual(status, 'MISS')
+        self.assertEqual(self.get(url)[0], 'HIT')
+        return titles
+
+    def test_saving_an_option_refreshes_its_cached_list(self):
+        def change():
+            self.tv.title = 'Swivel mount'
+            self.tv.save()
+        self.assertEqual(self.refresh(reverse('tv-mounting-option-list'), change), ['Swivel mount'])
+
+    def test_deleting_an_option_refreshes_its_cached_list(self):
+        self.assertEqual(self.refresh(reverse('tv-mounting-option-list'), self.tv.delete), [])
+
+    def test_saving_a_category_refreshes_the_cached_categories(self):
+        def change():
+            self.category.name = 'Home services'
+            self.category.save()
+        titles = self.refresh(reverse('service-category-list'), change)
+        self.assertIn('Home services', titles)
+        self.assertNotIn('Test services', titles)
+
+    def test_other_models_do_not_invalidate(self):
+        url = reverse('tv-mounting-option-list')
+        self.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.installation.save()
+        self.assertEqual(self.get(url)[0], 'HIT')
+
+    def test_new_images_and_their_derivatives_refresh_the_cached_option(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root, SERVICES_IMAGE_WIDTHS=(320,),
+                                     SERVICES_IMAGE_FORMATS=('webp',))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, 'JPEG')
+        url = reverse('tv-mounting-option-detail', kwargs={'pk': self.tv.pk})
+        self.get(url)
+
+        with mock.patch('services.images.get_executor') as get_executor, \
+                self.captureOnCommitCallbacks(execute=True):
+            self.tv.related_image = SimpleUploadedFile('red.jpg', buffer.getvalue())
+            self.tv.save()
+        status, data = self.get(url)
+        self.assertEqual(status, 'MISS')
+        self.assertTrue(data['related_image'])
+        self.assertIsNone(data['related_image_srcset'])
+        self.assertEqual(self.get(url)[0], 'HIT')
+
+        # The background pool writes the derivatives.
+        function, *args = get_executor.return_value.submit.call_args.args
+        function(*args)
+        status, data = self.get(url)
+        self.assertEqual(status, 'MISS')
+        self.assertEqual(list(data['related_image_srcset']['webp']), ['320'])
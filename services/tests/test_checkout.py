@@ -0,0 +1,38 @@
+from decimal import Decimal
+from django.urls import reverse
+from services.carts import add_cart_items
+from services.models import Cart, Order
+from .base import ServicesTestCase
+
+
+class CheckoutTests(ServicesTestCase):
+    def checkout(self):
+        return self.client.post(reverse('cart-checkout', kwargs={'pk': self.cart.pk}))
+
+    def test_checkout_empties_the_cart(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv, 2)])
+        response = self.checkout()
+        self.assertEqual(response.status_code, 201)
+        order = Order.objects.get(pk=response.json()['id'])
+        self.assertEqual(order.total_price, Decimal('250.00'))
+        self.assertEqual(order.items.get().price, Decimal('125.00'))
+        cart = Cart.objects.get(pk=self.cart.pk)
+        self.assertEqual((cart.items.count(), cart.item_count, cart.subtotal), (0, 0, Decimal('0.00')))
+
+    def test_empty_cart_is_rejected(self):
+        self.assertEqual(self.checkout().status_code, 400)
+        self.assertFalse(Order.objects.exists())
+
+    def test_cart_keeps_every_order_checked_out_of_it(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv)])
+        first = self.checkout().json()['id']
+        add_cart_items(self.cart.pk, [self.line(self.gazebo)])
+        second = self.checkout().json()['id']
+        self.assertEqual(set(map(str, self.cart.orders.values_list('pk', flat=True))), {first, second})
+
+    def test_deleted_option_blocks_checkout(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv), self.line(self.installation)])
+        self.installation.delete()
+        response = self.checkout()
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(len(response.json()['items']), 1)
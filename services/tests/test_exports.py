@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from decimal import Decimal
+from django.contrib.contenttypes.models import ContentType
+from django.urls import reverse
+from services.carts import add_cart_items
+from services.checkout import checkout_cart
+from services.exports import CSV_COLUMNS, export_orders
+from services.models import Order, TVMountingOption
+from .base import ServicesTestCase
+
+
+class OrderExportTests(ServicesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.orders = [self.checkout(), Order.objects.create(user=self.user, total_price=0)]
+
+    def checkout(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv, 2), self.line(self.gazebo)])
+        return checkout_cart(self.cart.pk)
+
+    def export(self, query):
+        response = self.client.get(reverse('order-export') + query)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_has_one_row_per_item(self):
+        header, *rows = csv.reader(io.StringIO(self.export('?fmt=csv')))
+        self.assertEqual(header, list(CSV_COLUMNS))
+        rows = [dict(zip(header, row)) for row in rows]
+        self.assertEqual([row['order_id'] for row in rows], [str(self.orders[0].pk)] * 2 + [str(self.orders[1].pk)])
+        self.assertEqual([(row['title'], row['quantity'], row['unit_price'], row['line_total']) for row in rows],
+                         [('Wall mount', '2', '125.00', '250.00'), ('Gazebo build', '1', '340.00', '340.00'),
+                          ('', '', '', '')])
+        self.assertEqual({row['order_total'] for row in rows[:2]}, {'590.00'})
+
+    def test_ndjson_has_one_line_per_order(self):
+        orders = [json.loads(line) for line in self.export('?fmt=ndjson').splitlines()]
+        self.assertEqual([order['id'] for order in orders], [str(order.pk) for order in self.orders])
+        self.assertEqual([(item['service_type'], item['title'], item['line_total']) for item in orders[0]['items']],
+                         [('tvmountingoption', 'Wall mount', '250.00'),
+                          ('gazeboserviceoption', 'Gazebo build', '340.00')])
+        self.assertEqual(orders[1]['items'], [])
+
+    def test_filters_and_formats(self):
+        self.orders[1].status = 'CANCELLED'
+        self.orders[1].save()
+        orders = [json.loads(line) for line in self.export('?fmt=ndjson&status=CANCELLED').splitlines()]
+        self.assertEqual([order['id'] for order in orders], [str(self.orders[1].pk)])
+        self.assertEqual(self.client.get(reverse('order-export') + '?fmt=xml').status_code, 400)
+
+    def test_items_and_titles_are_loaded_per_chunk(self):
+        self.orders += [self.checkout() for _ in range(3)]
+        ContentType.objects.get_for_model(TVMountingOption)  # Warms the content type cache.
+        with self.assertNumQueries(4):
+            exported = list(export_orders(Order.objects.all()))
+        # Chunks of two orders: the orders once, then the items and the titles of both types per chunk.
+        with self.assertNumQueries(1 + 3 * 3):
+            self.assertEqual(list(export_orders(Order.objects.all(), chunk_size=2)), exported)
+        self.assertEqual([order['id'] for order in exported], [order.pk for order in self.orders])
+        self.assertEqual(sum(order['total_price'] for order in exported), Decimal('590.00') * 4)
+
+    def test_streamed_queries_are_not_held_to_a_budget(self):
+        with self.assertLogs('services.queries', 'INFO') as logs:
+            self.export('?fmt=csv')
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual((record['url_name'], record['streaming'], record['budget']), ('order-export', True, None))
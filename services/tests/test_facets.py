@@ -0,0 +1,69 @@
+from decimal import Decimal
+from django.urls import reverse
+from services.facets import facet_counts
+from services.models import TVMountingOption
+from .base import ServicesTestCase
+
+
+class FacetTests(ServicesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # With the base option (DRY_WALL, FLAT): two concrete walls, two flat and two tilt brackets.
+        for wall_type, bracket in (('CONCRETE', 'FLAT'), ('STONE', 'TILT'), ('CONCRETE', 'TILT')):
+            TVMountingOption.objects.create(category=cls.category, title=f'{wall_type} {bracket}',
+                                            price=Decimal('100.00'), wall_type=wall_type, bracket=bracket)
+
+    @staticmethod
+    def counts(data, facet):
+        return {entry['value']: entry['count'] for entry in data['facets'][facet]}
+
+    def facets(self, query=''):
+        response = self.client.get(reverse('tv-mounting-option-facets') + query)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_counts_without_filters(self):
+        data = facet_counts(TVMountingOption, {})
+        self.assertEqual(data['count'], 4)
+        self.assertEqual(self.counts(data, 'wall_type'), {'DRY_WALL': 1, 'CONCRETE': 2, 'STONE': 1, 'BRICKS': 0})
+        self.assertEqual(self.counts(data, 'bracket'), {'OWN': 0, 'FLAT': 2, 'TILT': 2, 'FULL_MOTION': 0})
+        self.assertEqual(self.counts(data, 'needs'), {'MOUNTING': 4, 'UNMOUNTING': 0, 'BOTH': 0})
+
+    def test_a_facet_ignores_its_own_filter(self):
+        data = self.facets('?wall_type=CONCRETE,STONE&bracket=TILT')
+        self.assertEqual(data['count'], 2)
+        self.assertEqual(self.counts(data, 'wall_type'), {'DRY_WALL': 0, 'CONCRETE': 1, 'STONE': 1, 'BRICKS': 0})
+        self.assertEqual(self.counts(data, 'bracket'), {'OWN': 0, 'FLAT': 1, 'TILT': 2, 'FULL_MOTION': 0})
+        self.assertEqual([entry['value'] for entry in data['facets']['wall_type'] if entry['selected']],
+                         ['CONCRETE', 'STONE'])
+
+    def test_list_is_filtered_like_the_counts(self):
+        response = self.client.get(reverse('tv-mounting-option-list') + '?wall_type=CONCRETE,STONE&bracket=TILT')
+        self.assertEqual(sorted(row['title'] for row in response.json()), ['CONCRETE TILT', 'STONE TILT'])
+
+    def test_invalid_values_are_rejected(self):
+        response = self.client.get(reverse('tv-mounting-option-facets') + '?wall_type=CONCRETE,WOOD')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()), ['wall_type'])
+        response = self.client.get(reverse('furniture-assembly-option-list') + '?location=abc')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()), ['location'])
+
+    def test_relations_are_filtered_by_primary_key(self):
+        data = self.client.get(reverse('furniture-assembly-option-facets') + f'?location={self.location.pk}').json()
+        self.assertEqual(data['count'], 1)
+        self.assertEqual(data['facets']['location'],
+                         [{'value': self.location.pk, 'label': 'Test location', 'count': 1, 'selected': True}])
+
+    def test_changing_filters_costs_no_query(self):
+        facet_counts(TVMountingOption, {})
+        with self.assertNumQueries(0):
+            facet_counts(TVMountingOption, {'bracket': {'TILT'}})
+
+    def test_counts_are_rebuilt_after_a_change(self):
+        self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tv.wall_type = 'BRICKS'
+            self.tv.save()
+        self.assertEqual(self.counts(self.facets(), 'wall_type'), {'DRY_WALL': 0, 'CONCRETE': 2, 'STONE': 1, 'BRICKS': 1})
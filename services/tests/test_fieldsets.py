@@ -0,0 +1,135 @@
+from decimal import Decimal
+from django.urls import reverse
+from services.carts import add_cart_items
+from services.checkout import checkout_cart
+from services.models import FurnitureAssemblyOption, GazeboServiceOption, ServiceCategory, TVMountingOption
+from .base import ServicesTestCase
+
+
+class FieldsetTests(ServicesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for number in range(5):
+            FurnitureAssemblyOption.objects.create(
+                category=cls.category, title=f'Assembly {number}', price=Decimal('10.00'), location=cls.location,
+                service_type=cls.service_type, assembly_type=cls.assembly_type)
+            GazeboServiceOption.objects.create(
+                category=cls.category, title=f'Gazebo {number}', price=Decimal('10.00'), gazebo_model=cls.gazebo_model)
+
+    def get(self, url_name, kwargs=None, queries=None, **params):
+        url = reverse(url_name, kwargs=kwargs)
+        if queries is None:
+            response = self.client.get(url, params)
+        else:
+            with self.assertNumQueries(queries):
+                response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def results(self, data):
+        return data['results'] if isinstance(data, dict) else data
+
+    def test_relations_are_embedded_by_default(self):
+        option = self.results(self.get('furniture-assembly-option-list', queries=1))[0]
+        self.assertEqual(option['location'], {'id': self.location.pk, 'name': self.location.name})
+        self.assertEqual(option['service_type']['name'], self.service_type.name)
+        self.assertEqual(option['assembly_type']['name'], self.assembly_type.name)
+        gazebo = self.results(self.get('gazebo-service-option-list', queries=1))[0]
+        self.assertEqual(gazebo['gazebo_model']['name'], self.gazebo_model.name)
+
+    def test_expand_narrows_the_embedded_relations(self):
+        option = self.results(self.get('furniture-assembly-option-list', queries=1, expand='location'))[0]
+        self.assertEqual(option['location']['id'], self.location.pk)
+        self.assertEqual((option['service_type'], option['assembly_type']), (self.service_type.pk, self.assembly_type.pk))
+
+    def test_fields_trim_the_representation_without_deferred_loads(self):
+        options = self.results(self.get('furniture-assembly-option-list', queries=1,
+                                        fields='id,title,unit_price,location.name'))
+        self.assertEqual(set(options[0]), {'id', 'title', 'unit_price', 'location'})
+        self.assertEqual(options[0]['location'], {'name': self.location.name})
+        self.assertEqual(Decimal(options[0]['unit_price']), Decimal('95.50'))
+
+    def test_cart_items_embed_their_option_by_default(self):
+        add_cart_items(self.cart.pk, [self.line(self.furniture), self.line(self.gazebo, 2)])
+        cart = self.get('cart-detail', kwargs={'pk': self.cart.pk}, queries=5)
+        self.assertEqual(list(cart['items'][0]), ['id', 'cart', 'content_type', 'object_id', 'service_option',
+                                                  'quantity', 'total_price'])
+        options = {item['service_option']['title']: item['service_option'] for item in cart['items']}
+        self.assertEqual(options[self.furniture.title]['location']['name'], self.location.name)
+        self.assertEqual(options[self.gazebo.title]['gazebo_model']['name'], self.gazebo_model.name)
+
+        cart = self.get('cart-detail', kwargs={'pk': self.cart.pk}, queries=3, expand='')
+        self.assertNotIn('service_option', cart['items'][0])
+
+    def test_order_items_embed_their_option_by_default(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv), self.line(self.installation)])
+        order = checkout_cart(self.cart.pk)
+        data = self.get('order-detail', kwargs={'pk': order.pk}, queries=4)
+        options = {item['service_option']['title']: item['service_option'] for item in data['items']}
+        self.assertEqual(options[self.installation.title]['installation_type']['name'], self.installation_type.name)
+        self.assertEqual(options[self.tv.title]['bracket'], 'FLAT')
+
+        data = self.get('order-detail', kwargs={'pk': order.pk}, queries=2, fields='id,items.quantity')
+        self.assertEqual(data, {'id': str(order.pk), 'items': [{'quantity': 1}, {'quantity': 1}]})
+
+    def test_query_count_does_not_grow_with_the_rows(self):
+        for number in range(5):
+            add_cart_items(self.cart.pk, [self.line(option) for option in FurnitureAssemblyOption.objects.all()])
+        checkout_cart(self.cart.pk)
+        add_cart_items(self.cart.pk, [self.line(option) for option in GazeboServiceOption.objects.all()])
+        checkout_cart(self.cart.pk)
+        for params in ({}, {'fields': 'id,total_price,items.service_option.title'},
+                       {'expand': 'items.service_option', 'fields': 'items.service_option.unit_price'}):
+            with self.subTest(**params):
+                self.get('order-list', queries=4, **params)
+
+
+class CategoryTreeTests(ServicesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Created after 'Wall mount' but sorted before it: options are listed in primary key order.
+        TVMountingOption.objects.create(category=cls.category, title='Another mount', price=Decimal('90.00'))
+        cls.other_category = ServiceCategory.objects.create(name='Aaa services')
+        TVMountingOption.objects.create(category=cls.other_category, title='Other mount', price=Decimal('50.00'))
+
+    def tree(self):
+        response = self.client.get(reverse('category-tree'))
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def categories(self):
+        return {category['name']: category for category in self.tree()}
+
+    def test_categories_are_ordered_by_name(self):
+        names = [category['name'] for category in self.tree()]
+        self.assertEqual(names, sorted(names))
+        self.assertEqual(names[0], 'Aaa services')
+
+    def test_options_are_nested_in_their_category(self):
+        categories = self.categories()
+        category = categories['Test services']
+        self.assertEqual(set(category), {'id', 'name', 'description', 'feature_image', 'feature_image_srcset',
+                                         'created_at', 'tv_mounting_options', 'furniture_assembly_options',
+                                         'installation_service_options', 'gazebo_service_options'})
+        self.assertEqual([option['title'] for option in category['tv_mounting_options']],
+                         ['Wall mount', 'Another mount'])
+        self.assertEqual([option['title'] for option in categories['Aaa services']['tv_mounting_options']],
+                         ['Other mount'])
+        self.assertEqual(categories['Aaa services']['gazebo_service_options'], [])
+
+    def test_options_embed_their_lookups_and_prices(self):
+        categories = self.categories()
+        category = categories['Test services']
+        furniture, = category['furniture_assembly_options']
+        self.assertEqual(furniture['location'], {'id': self.location.pk, 'name': self.location.name})
+        self.assertEqual(furniture['service_type']['name'], self.service_type.name)
+        self.assertEqual(furniture['assembly_type']['name'], self.assembly_type.name)
+        self.assertEqual(Decimal(str(furniture['unit_price'])), Decimal('95.50'))
+        installation, = category['installation_service_options']
+        self.assertEqual(installation['installation_type']['name'], self.installation_type.name)
+        gazebo, = category['gazebo_service_options']
+        self.assertEqual(gazebo['gazebo_model']['name'], self.gazebo_model.name)
+        self.assertEqual(Decimal(str(gazebo['unit_price'])), Decimal('340.00'))
+        self.assertEqual(Decimal(str(category['tv_mounting_options'][0]['unit_price'])), Decimal('125.00'))
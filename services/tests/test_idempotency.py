@@ -0,0 +1,100 @@
+import json
+from datetime import timedelta
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.response import Response
+from services.carts import add_cart_items
+from services.idempotency import claim_key, idempotency_scope, key_digest, request_fingerprint, store_response
+from services.models import IdempotencyKey, Order
+from services.testing import assert_query_budget
+from .base import ServicesTestCase
+
+
+class IdempotencyTests(ServicesTestCase):
+    def order_request(self, key, **data):
+        return self.client.post(reverse('order-list'), {'guest_email': 'guest@example.com', 'total_price': '10.00',
+                                                        **data},
+                                content_type='application/json', headers={'Idempotency-Key': key})
+
+    @staticmethod
+    def api_request(data):
+        request = Request(RequestFactory().post('/', data, content_type='application/json'), parsers=[JSONParser()])
+        request.user = AnonymousUser()
+        return request
+
+    @staticmethod
+    def api_request_with_body(body):
+        return RequestFactory().post('/', body, content_type='application/json')
+
+    def test_anonymous_scope_ignores_the_user_of_the_body(self):
+        request = self.api_request({'user': self.user.pk, 'guest_email': 'Guest@Example.com'})
+        self.assertEqual(idempotency_scope(request), 'guest:guest@example.com')
+        request = self.api_request({'user': self.user.pk})
+        self.assertEqual(idempotency_scope(request), 'anonymous')
+
+    def test_anonymous_request_cannot_replay_a_users_response(self):
+        self.client.force_login(self.user)
+        first = self.client.post(reverse('order-list'), {'user': self.user.pk, 'total_price': '10.00'},
+                                 content_type='application/json', headers={'Idempotency-Key': 'shared'})
+        self.assertEqual(first.status_code, 201)
+        self.client.logout()
+        second = self.client.post(reverse('order-list'), {'user': self.user.pk, 'total_price': '10.00'},
+                                  content_type='application/json', headers={'Idempotency-Key': 'shared'})
+        self.assertNotIn('Idempotent-Replayed', second)
+        self.assertNotEqual(second.json().get('id'), first.json()['id'])
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.order_request('order-1')
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(1):
+            retry = self.order_request('order-1')
+        self.assertEqual((retry.status_code, retry.json()), (201, first.json()))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_with_another_body_is_rejected(self):
+        self.order_request('order-1')
+        response = self.order_request('order-1', total_price='20.00')
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_of_a_request_in_progress_is_a_conflict(self):
+        digest = key_digest('order-1', 'guest:guest@example.com', 'POST', reverse('order-list'))
+        body = json.dumps({'guest_email': 'guest@example.com', 'total_price': '10.00'}).encode()
+        claim_key(digest, request_fingerprint(self.api_request_with_body(body)))
+        response = self.order_request('order-1')
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+
+    def test_expired_claim_can_be_taken_over(self):
+        digest = key_digest('order-1', 'guest:guest@example.com', 'POST', reverse('order-list'))
+        body = json.dumps({'guest_email': 'guest@example.com', 'total_price': '10.00'}).encode()
+        claim_key(digest, request_fingerprint(self.api_request_with_body(body)))
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.order_request('order-1').status_code, 201)
+
+    def test_validation_errors_are_replayed_and_server_errors_released(self):
+        invalid = self.order_request('order-1', guest_email=None)
+        self.assertEqual(invalid.status_code, 400)
+        self.assertEqual(self.order_request('order-1', guest_email=None)['Idempotent-Replayed'], 'true')
+        claim = claim_key(b'k' * 32, b'f' * 16)
+        store_response(claim, Response(status=500))
+        self.assertFalse(IdempotencyKey.objects.filter(key=b'k' * 32).exists())
+
+    def test_safe_methods_ignore_the_key(self):
+        response = self.client.get(reverse('order-list'), headers={'Idempotency-Key': 'list'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_budgets_count_the_key_only_when_sent(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv)])
+        assert_query_budget(self.client, 'cart-checkout', method='post', kwargs={'pk': self.cart.pk})
+        add_cart_items(self.cart.pk, [self.line(self.tv)])
+        response = assert_query_budget(self.client, 'cart-checkout', method='post', kwargs={'pk': self.cart.pk},
+                                       headers={'Idempotency-Key': 'checkout-1'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.count(), 2)
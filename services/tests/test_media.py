@@ -0,0 +1,51 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+from services.cache import get_catalog_cache
+from services.images import derivative_name, generate_derivatives, srcset
+
+
+class MediaTests(SimpleTestCase):
+    def setUp(self):
+        get_catalog_cache().clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = override_settings(MEDIA_ROOT=media_root, SERVICES_IMAGE_WIDTHS=(320,),
+                                     SERVICES_IMAGE_FORMATS=('webp',))
+        settings.enable()
+        self.addCleanup(settings.disable)
+        buffer = io.BytesIO()
+        Image.new('RGB', (800, 600), 'red').save(buffer, 'JPEG')
+        self.name = default_storage.save('service_images/red.jpg', ContentFile(buffer.getvalue()))
+
+    def get(self, name):
+        return self.client.get(f'/media/{name}')
+
+    def test_uploads_are_immutable(self):
+        response = self.get(self.name)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(self.client.get(f'/media/{self.name}', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_derivatives_are_revalidated(self):
+        generate_derivatives(self.name)
+        response = self.get(derivative_name(self.name, 320, 'webp'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Cache-Control'], 'public, max-age=86400')
+
+    def test_srcset_lists_generated_derivatives_only(self):
+        self.assertIsNone(srcset(self.name))
+        generate_derivatives(self.name)
+        url = default_storage.url(derivative_name(self.name, 320, 'webp'))
+        self.assertEqual(srcset(self.name), {'webp': {'320': url}})
+
+    def test_srcset_does_not_look_derivatives_up_in_storage(self):
+        generate_derivatives(self.name)
+        with mock.patch.object(FileSystemStorage, 'exists', side_effect=AssertionError('storage lookup')):
+            self.assertEqual(list(srcset(self.name)['webp']), ['320'])
@@ -0,0 +1,77 @@
+from uuid import uuid4
+from django.contrib.auth.models import User
+from django.urls import reverse
+from services.carts import add_cart_items
+from services.checkout import checkout_cart
+from services.models import Order
+from services.orders import TransitionConflict, transition_order
+from .base import ServicesTestCase
+
+
+class OrderTransitionTests(ServicesTestCase):
+    def setUp(self):
+        super().setUp()
+        add_cart_items(self.cart.pk, [self.line(self.tv), self.line(self.gazebo)])
+        self.order = checkout_cart(self.cart.pk)
+
+    def transition(self, transition, pk=None, **params):
+        return self.client.post(reverse(f'order-{transition}', kwargs={'pk': pk or self.order.pk}) +
+                                (f'?expand={params["expand"]}' if 'expand' in params else ''))
+
+    def status(self):
+        return Order.objects.get(pk=self.order.pk).status
+
+    def test_pay_then_complete(self):
+        response = self.transition('pay')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'PAID')
+        self.assertEqual(self.transition('complete').json()['status'], 'COMPLETED')
+        self.assertEqual(self.status(), 'COMPLETED')
+
+    def test_cancel_from_pending_or_paid(self):
+        self.assertEqual(self.transition('cancel').status_code, 200)
+        self.assertEqual(self.status(), 'CANCELLED')
+
+    def test_invalid_transition_is_a_conflict(self):
+        response = self.transition('complete')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['detail'], 'Cannot complete an order that is PENDING.')
+        self.transition('cancel')
+        self.assertEqual(self.transition('pay').status_code, 409)
+        self.assertEqual(self.status(), 'CANCELLED')
+
+    def test_losing_a_concurrent_transition_is_a_conflict(self):
+        transition_order(self.order.pk, 'cancel')
+        with self.assertRaises(TransitionConflict):
+            transition_order(self.order.pk, 'pay')
+
+    def test_unknown_order(self):
+        self.assertEqual(self.transition('pay', pk=uuid4()).status_code, 404)
+        self.assertEqual(self.transition('pay', pk='not-a-uuid').status_code, 404)
+
+    def test_response_embeds_relations_on_request(self):
+        self.assertNotIn('service_option', self.transition('pay').json()['items'][0])
+        items = self.transition('complete', expand='items.service_option').json()['items']
+        self.assertEqual({item['service_option']['title'] for item in items}, {self.tv.title, self.gazebo.title})
+
+    def test_bulk_transition(self):
+        add_cart_items(self.cart.pk, [self.line(self.tv)])
+        other = checkout_cart(self.cart.pk)
+        transition_order(other.pk, 'cancel')
+        missing = uuid4()
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'password'))
+        response = self.client.post(reverse('order-bulk-transition'), {
+            'transition': 'pay', 'ids': [str(self.order.pk), str(other.pk), str(missing)]},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual({item['id']: item['detail'] for item in data['failed']}, {
+            str(other.pk): 'Cannot pay an order that is CANCELLED.', str(missing): 'Not found.'})
+        self.assertEqual(self.status(), 'PAID')
+
+    def test_bulk_transition_is_for_admins(self):
+        response = self.client.post(reverse('order-bulk-transition'), {'transition': 'pay', 'ids': [str(self.order.pk)]},
+                                    content_type='application/json')
+        self.assertIn(response.status_code, (401, 403))
+        self.assertEqual(self.status(), 'PENDING')
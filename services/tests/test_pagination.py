@@ -0,0 +1,103 @@
+from datetime import timedelta
+from decimal import Decimal
+from django.urls import reverse
+from django.utils import timezone
+from services.models import InstallationServiceOption, Order, ServiceCategory, TVMountingOption
+from .base import ServicesTestCase
+
+
+class OrderCursorPaginationTests(ServicesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        now = timezone.now()
+        # Pairs of orders share a created_at, so pages have to break ties on the id.
+        orders = Order.objects.bulk_create([Order(user=cls.user, total_price=number) for number in range(7)])
+        for number, order in enumerate(orders):
+            Order.objects.filter(pk=order.pk).update(created_at=now - timedelta(minutes=number // 2))
+        cls.expected = [str(pk) for pk in Order.objects.order_by('-created_at', '-id').values_list('pk', flat=True)]
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_pages_walk_every_order_once_in_both_directions(self):
+        data = self.page(reverse('order-list') + '?page_size=2&fields=id')
+        self.assertIsNone(data['previous'])
+        pages = [data]
+        while data['next']:
+            data = self.page(data['next'])
+            pages.append(data)
+        self.assertEqual([order['id'] for page in pages for order in page['results']], self.expected)
+        self.assertEqual(len(pages), 4)
+
+        backwards = [pages[-1]]
+        while backwards[-1]['previous']:
+            backwards.append(self.page(backwards[-1]['previous']))
+        self.assertEqual([page['results'] for page in reversed(backwards)], [page['results'] for page in pages])
+
+    def test_new_orders_do_not_shift_the_next_page(self):
+        first = self.page(reverse('order-list') + '?page_size=3&fields=id')
+        Order.objects.create(user=self.user, total_price=1)
+        second = self.page(first['next'])
+        self.assertEqual([order['id'] for order in second['results']], self.expected[3:6])
+
+    def test_page_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('order-list') + '?page_size=3&fields=id,total_price')
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(reverse('order-list') + '?cursor=bogus').status_code, 404)
+
+
+class CatalogCursorPaginationTests(ServicesTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other_category = ServiceCategory.objects.create(name='Other services')
+        # Ties on price and title across and within tables, so pages break ties on the type and id.
+        cls.cheap_tv = TVMountingOption.objects.create(category=cls.category, title='Ceiling fan', price=Decimal('80.00'))
+        cls.other = InstallationServiceOption.objects.create(
+            category=cls.other_category, title='Wall mount', price=Decimal('60.00'),
+            installation_type=cls.installation_type)
+        cls.options = [cls.tv, cls.furniture, cls.installation, cls.gazebo, cls.cheap_tv, cls.other]
+
+    def entries(self, options, field, descending=False):
+        key = lambda option: (getattr(option, field), option._meta.model_name, option.pk)  # noqa: E731
+        return [[option._meta.model_name, option.pk] for option in sorted(options, key=key, reverse=descending)]
+
+    def page(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        data['entries'] = [[entry['type'], entry['id']] for entry in data['results']]
+        return data
+
+    def walk(self, query):
+        data = self.page(reverse('catalog-list') + query)
+        self.assertIsNone(data['previous'])
+        pages = [data]
+        while data['next']:
+            data = self.page(data['next'])
+            pages.append(data)
+        backwards = [pages[-1]]
+        while backwards[-1]['previous']:
+            backwards.append(self.page(backwards[-1]['previous']))
+        self.assertEqual([page['entries'] for page in reversed(backwards)], [page['entries'] for page in pages])
+        return [entry for page in pages for entry in page['entries']]
+
+    def test_pages_walk_every_option_once_in_both_directions(self):
+        for ordering, field, descending in (('price', 'price', False), ('-price', 'price', True),
+                                            ('title', 'title', False), ('-title', 'title', True)):
+            with self.subTest(ordering=ordering):
+                self.assertEqual(self.walk(f'?ordering={ordering}&page_size=2'),
+                                 self.entries(self.options, field, descending))
+
+    def test_filters(self):
+        self.assertEqual(self.walk(f'?category={self.other_category.pk}&page_size=2'), self.entries([self.other], 'price'))
+        self.assertEqual(self.walk('?min_price=70&max_price=100&page_size=2'),
+                         self.entries([self.tv, self.furniture, self.cheap_tv], 'price'))
+
+    def test_invalid_cursor(self):
+        self.assertEqual(self.client.get(reverse('catalog-list') + '?cursor=bogus').status_code, 404)
@@ -0,0 +1,117 @@
+from decimal import Decimal
+from unittest import skipUnless
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from services.cache import get_catalog_cache
+from services.checkout import checkout_cart
+from services.db_routers import get_replica_alias
+from services.models import Cart, ServiceCategory, TVMountingOption
+from services.pricing import bump_price_version, option_prices, quote
+from .base import ServicesTestCase
+
+
+class PricingTests(ServicesTestCase):
+    def cart_lines(self):
+        return [self.line(self.tv, 2), self.line(self.furniture, 1), self.line(self.gazebo, 3)]
+
+    def fill_cart(self):
+        response = self.client.post(reverse('cart-items-bulk', kwargs={'cart_pk': self.cart.pk}),
+                                    self.cart_lines(), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def assert_prices_agree(self, expected):
+        self.assertEqual(quote([self.cart_lines()])[0]['total'], expected)
+        self.assertEqual(Cart.objects.get(pk=self.cart.pk).subtotal, expected)
+        detail = self.client.get(reverse('cart-detail', kwargs={'pk': self.cart.pk})).json()
+        self.assertEqual(Decimal(str(detail['total_price'])), expected)
+        self.assertEqual(sum(Decimal(str(item['total_price'])) for item in detail['items']), expected)
+
+    def test_unit_price_includes_surcharges(self):
+        prices = option_prices({(line['content_type'], line['object_id']) for line in self.cart_lines()})
+        self.assertEqual(sorted(unit_price for unit_price, _ in prices.values()),
+                         [Decimal('95.50'), Decimal('125.00'), Decimal('340.00')])
+
+    def test_quote_cart_and_checkout_agree(self):
+        self.fill_cart()
+        expected = Decimal('125.00') * 2 + Decimal('95.50') + Decimal('340.00') * 3
+        self.assert_prices_agree(expected)
+        self.assertEqual(checkout_cart(self.cart.pk).total_price, expected)
+
+    def test_quote_cart_and_checkout_agree_after_a_price_change(self):
+        self.fill_cart()
+        self.assert_prices_agree(Decimal('1365.50'))  # Warms the price cache.
+
+        self.tv.price = Decimal('110.00')
+        self.tv.save()
+        self.gazebo.anchoring = 'NO'
+        self.gazebo.save()
+
+        expected = Decimal('135.00') * 2 + Decimal('95.50') + Decimal('300.00') * 3
+        self.assert_prices_agree(expected)
+        order = checkout_cart(self.cart.pk)
+        self.assertEqual(order.total_price, expected)
+        self.assertEqual(sorted(order.items.values_list('price', flat=True)),
+                         [Decimal('95.50'), Decimal('135.00'), Decimal('300.00')])
+
+    def test_price_change_committed_by_another_process_is_seen(self):
+        key = (self.line(self.tv)['content_type'], self.tv.pk)
+        self.assertEqual(option_prices({key})[key][0], Decimal('125.00'))
+        # Another process writes the price and bumps the version; this process's cache knows nothing of it.
+        TVMountingOption.objects.filter(pk=self.tv.pk).update(price=Decimal('200.00'))
+        bump_price_version(TVMountingOption)
+        self.assertEqual(option_prices({key})[key][0], Decimal('225.00'))
+
+    def test_cold_prices_cost_two_queries(self):
+        keys = {(line['content_type'], line['object_id']) for line in self.cart_lines() + [self.line(self.installation)]}
+        with self.assertNumQueries(2):
+            prices = option_prices(keys)
+        self.assertEqual(len(prices), 4)
+
+    def test_warm_prices_cost_one_query(self):
+        keys = {(line['content_type'], line['object_id']) for line in self.cart_lines()}
+        option_prices(keys)
+        with self.assertNumQueries(1):
+            option_prices(keys)
+
+    def test_unknown_options_are_rejected(self):
+        response = self.client.post(reverse('quote'), {'configurations': [{'items': [
+            {**self.line(self.tv), 'object_id': self.tv.pk + 1000}]}]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+
+@skipUnless(get_replica_alias(), 'Needs a read replica, run with fixitek.settings_replica.')
+class ReplicaPricingTests(TransactionTestCase):
+    """
+    Outside a transaction, catalog reads go to the replica. Prices must not: a lagging replica
+    would put old prices in the cache under the new price version.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        get_catalog_cache().clear()
+        category = ServiceCategory.objects.create(name='Test services')
+        self.tv = TVMountingOption.objects.create(category=category, title='Wall mount', price=Decimal('100.00'),
+                                                  bracket='FLAT', bracket_price=Decimal('25.00'))
+        self.cart = Cart.objects.create(user=User.objects.create_user('customer'))
+        self.lines = [ServicesTestCase.line(self.tv, 2)]
+        key = (self.lines[0]['content_type'], self.tv.pk)
+        self.assertEqual(option_prices({key})[key][0], Decimal('125.00'))  # Warms the price cache.
+
+    def test_quote_and_checkout_use_a_new_price(self):
+        self.tv.price = Decimal('110.00')
+        self.tv.save()
+        with CaptureQueriesContext(connections[get_replica_alias()]) as replica:
+            # A read outside any transaction, e.g. a GET of another client, reprices the option first.
+            key = (self.lines[0]['content_type'], self.tv.pk)
+            self.assertEqual(option_prices({key})[key][0], Decimal('135.00'))
+            response = self.client.post(reverse('quote'), {'configurations': [{'items': self.lines}]},
+                                        content_type='application/json')
+            self.assertEqual(Decimal(str(response.json()['configurations'][0]['total'])), Decimal('270.00'))
+            self.client.post(reverse('cart-items-bulk', kwargs={'cart_pk': self.cart.pk}), self.lines,
+                             content_type='application/json')
+            self.assertEqual(checkout_cart(self.cart.pk).total_price, Decimal('270.00'))
+        table = TVMountingOption._meta.db_table
+        self.assertEqual([query['sql'] for query in replica.captured_queries if table in query['sql']], [])
@@ -0,0 +1,87 @@
+from contextlib import ExitStack
+from unittest import mock
+from django.db import DEFAULT_DB_ALIAS, connections, router
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from services.cache import bump_version, filling, get_catalog_cache
+from services.db_routers import pin_to_primary
+from services.middleware import ReplicaPinMiddleware
+from services.models import Cart, Location, TVMountingOption
+
+
+@override_settings(SERVICES_REPLICA_PIN_COOKIE='replica_pin', SERVICES_REPLICA_PIN_SECONDS=5)
+class ReplicaRoutingTests(SimpleTestCase):
+    """
+    Routing decisions only, with a replica alias configured but no query sent to it.
+    """
+
+    def setUp(self):
+        get_catalog_cache().clear()
+        stack = ExitStack()
+        for module in ('db_routers', 'middleware', 'cache'):
+            stack.enter_context(mock.patch(f'services.{module}.get_replica_alias', return_value='replica'))
+        self.addCleanup(stack.close)
+
+    def read_alias(self, request, status=200):
+        """
+        Passes ``request`` through ReplicaPinMiddleware and returns where a catalog read would go.
+        """
+        aliases = []
+
+        def view(request):
+            aliases.append(router.db_for_read(TVMountingOption))
+            return HttpResponse(status=status)
+
+        response = ReplicaPinMiddleware(view)(request)
+        return aliases[0], response
+
+    def test_catalog_reads_go_to_the_replica(self):
+        self.assertEqual(router.db_for_read(TVMountingOption), 'replica')
+        self.assertEqual(router.db_for_read(Cart), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_write(TVMountingOption), DEFAULT_DB_ALIAS)
+
+    def test_pinned_and_transactional_reads_go_to_the_primary(self):
+        with pin_to_primary():
+            self.assertEqual(router.db_for_read(TVMountingOption), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_read(TVMountingOption), 'replica')
+        with mock.patch.object(connections[DEFAULT_DB_ALIAS], 'in_atomic_block', True):
+            self.assertEqual(router.db_for_read(TVMountingOption), DEFAULT_DB_ALIAS)
+
+    def test_writes_pin_the_client_with_a_cookie(self):
+        alias, response = self.read_alias(RequestFactory().post('/services/quote/'))
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        cookie = response.cookies['replica_pin']
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertTrue(cookie['httponly'])
+
+        request = RequestFactory().get('/services/service-categories/')
+        request.COOKIES['replica_pin'] = cookie.value
+        alias, response = self.read_alias(request)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.assertNotIn('replica_pin', response.cookies)
+
+    def test_reads_and_failed_writes_do_not_pin(self):
+        alias, response = self.read_alias(RequestFactory().get('/services/service-categories/'))
+        self.assertEqual(alias, 'replica')
+        self.assertNotIn('replica_pin', response.cookies)
+
+        alias, response = self.read_alias(RequestFactory().post('/services/quote/'), status=400)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        self.assertNotIn('replica_pin', response.cookies)
+
+    def test_cache_entries_are_filled_from_the_primary_after_a_bump(self):
+        with filling([TVMountingOption, Location]):
+            self.assertEqual(router.db_for_read(TVMountingOption), 'replica')
+        bump_version(Location)
+        with filling([TVMountingOption, Location]):
+            self.assertEqual(router.db_for_read(TVMountingOption), DEFAULT_DB_ALIAS)
+        with filling([TVMountingOption]):
+            self.assertEqual(router.db_for_read(TVMountingOption), 'replica')
+
+
+@override_settings(SERVICES_READ_REPLICA_ALIAS=None)
+class NoReplicaTests(SimpleTestCase):
+    def test_without_a_replica_nothing_is_routed_or_pinned(self):
+        self.assertEqual(router.db_for_read(TVMountingOption), DEFAULT_DB_ALIAS)
+        response = ReplicaPinMiddleware(lambda request: HttpResponse())(RequestFactory().post('/services/quote/'))
+        self.assertNotIn('replica_pin', response.cookies)
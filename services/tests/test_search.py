@@ -0,0 +1,51 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from services.models import SearchEntry
+from .base import ServicesTestCase
+
+
+class SearchIndexTests(ServicesTestCase):
+    def entry(self, option):
+        return SearchEntry.objects.get(content_type=ContentType.objects.get_for_model(option), object_id=option.pk)
+
+    def search(self, q):
+        response = self.client.get(reverse('search'), {'q': q})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [result['title'] for result in (data['results'] if isinstance(data, dict) else data)]
+
+    def test_saving_an_option_indexes_it(self):
+        self.gazebo.title = 'Pergola build'
+        self.gazebo.save()
+        self.assertEqual(self.entry(self.gazebo).title, 'Pergola build')
+        self.assertEqual(self.search('pergola'), ['Pergola build'])
+
+    def test_saving_other_fields_skips_the_index(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.gazebo.save(update_fields=['size'])
+        self.assertFalse([query for query in queries if 'services_searchentry' in query['sql']])
+        with CaptureQueriesContext(connection) as queries:
+            self.gazebo.save(update_fields=['gazebo_model_id'])
+        self.assertTrue([query for query in queries if 'services_searchentry' in query['sql']])
+
+    def test_renaming_a_gazebo_model_reindexes_its_options(self):
+        self.gazebo_model.name = 'Cedar'
+        self.gazebo_model.save()
+        self.assertIn('Cedar', self.entry(self.gazebo).keywords)
+
+    def test_saving_a_category_without_renaming_it_skips_the_index(self):
+        self.category.description = 'Updated'
+        with CaptureQueriesContext(connection) as queries:
+            self.category.save()
+        self.assertFalse([query for query in queries if 'services_searchentry' in query['sql']])
+        with CaptureQueriesContext(connection) as queries:
+            self.category.save(update_fields=['description'])
+        self.assertFalse([query for query in queries if 'services_servicecategory' in query['sql']
+                          and query['sql'].startswith('SELECT')])
+
+    def test_deleting_an_option_unindexes_it(self):
+        self.tv.delete()
+        self.assertFalse(SearchEntry.objects.filter(object_id=self.tv.pk,
+                                                    content_type=ContentType.objects.get_for_model(self.tv)).exists())
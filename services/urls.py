@@ -1,15 +1,22 @@
 from django.urls import path, include
 from rest_framework_nested import routers
+from . import async_views
 from .views import (
     ServiceCategoryViewSet,
     TVMountingOptionViewSet,
     FurnitureAssemblyOptionViewSet,
     InstallationServiceOptionViewSet,
     GazeboServiceOptionViewSet,
+    ServiceCatalogViewSet,
+    CatalogCacheStatsView,
+    CategoryTreeView,
+    QuoteView,
+    SearchView,
     CartViewSet,
     CartItemViewSet,
     OrderViewSet,
     OrderItemViewSet,
+    service_list,
 )
 
 # Create a router and register the viewsets
@@ -19,6 +26,7 @@ router.register(r'tv-mounting-options', TVMountingOptionViewSet, basename='tv-mo
 router.register(r'furniture-assembly-options', FurnitureAssemblyOptionViewSet, basename='furniture-assembly-option')
 router.register(r'installation-service-options', InstallationServiceOptionViewSet, basename='installation-service-option')
 router.register(r'gazebo-service-options', GazeboServiceOptionViewSet, basename='gazebo-service-option')
+router.register(r'catalog', ServiceCatalogViewSet, basename='catalog')
 router.register(r'cart', CartViewSet, basename='cart')
 router.register(r'cart-items', CartItemViewSet, basename='cart-item')
 router.register(r'orders', OrderViewSet, basename='order')
@@ -29,7 +37,22 @@ cart_router = routers.NestedDefaultRouter(router, r'cart', lookup='cart')
 cart_router.register(r'items', CartItemViewSet, basename='cart-items')
 
 # Define the URL patterns
+# Async read path, served concurrently under fixitek.asgi
+async_urlpatterns = [
+    path('service-categories/', async_views.category_list, name='async-service-category-list'),
+    path('service-categories/<int:pk>/', async_views.category_detail, name='async-service-category-detail'),
+    path('cart/<uuid:pk>/', async_views.cart_detail, name='async-cart-detail'),
+    path('orders/<uuid:pk>/', async_views.order_detail, name='async-order-detail'),
+    path('<slug:kind>/', async_views.option_list, name='async-option-list'),
+]
+
 urlpatterns = [
+    path('async/', include(async_urlpatterns)),
+    path('catalog-cache/stats/', CatalogCacheStatsView.as_view(), name='catalog-cache-stats'),
+    path('category-tree/', CategoryTreeView.as_view(), name='category-tree'),
+    path('list/', service_list, name='service-list'),
+    path('quote/', QuoteView.as_view(), name='quote'),
+    path('search/', SearchView.as_view(), name='search'),
     path('', include(router.urls)),
     path('', include(cart_router.urls)),
 ]
\ No newline at end of file
@@ -1,91 +1,295 @@
+import posixpath
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponseNotModified, StreamingHttpResponse
 from django.shortcuts import render
+from django.views.decorators.http import require_safe
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
-from rest_framework import viewsets
-from .serializers import (CartItemSerializer, CartSerializer, FurnitureAssemblyOptionSerializer,
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status, viewsets
+from .cache import CachedCatalogMixin, cached_response, cached_value, catalog_cache_stats
+from .carts import add_cart_items
+from .checkout import checkout_cart
+from .orders import bulk_transition_orders, transition_order
+from .exports import EXPORT_FORMATS, export_orders
+from .facets import FacetFilterMixin
+from .idempotency import IdempotentMixin
+from .images import get_derivative_storage, is_derivative_name
+from .fieldsets import SparseFieldsMixin, optimize_queryset
+from .catalog import CATALOG_ORDERINGS, catalog_branches
+from .pagination import CatalogCursorPagination, OrderCursorPagination, SearchPagination
+from .pricing import quote
+from .serializers import (CATEGORY_TREE_EXPAND, CartItemBulkSerializer, CartItemSerializer, CartSerializer, CatalogEntrySerializer,
+                          CatalogQuerySerializer, CategoryTreeSerializer,
+                          FurnitureAssemblyOptionSerializer,
                           GazeboServiceOptionSerializer,
                           InstallationServiceOptionSerializer,
-                          ServiceCategorySerializer,
+                          OrderBulkTransitionSerializer, OrderFilterSerializer, QuoteSerializer, SearchQuerySerializer,
+                          SearchResultSerializer, ServiceCategorySerializer,
                           TVMountingOptionSerializer, OrderSerializer, OrderItemSerializer)
-from .models import (Cart, CartItem, FurnitureAssemblyOption,
-                     GazeboServiceOption,
-                     InstallationServiceOption,
-                     ServiceCategory,
+from .models import (SERVICE_OPTION_MODELS, AssemblyType, Cart, CartItem, FurnitureAssemblyOption,
+                     GazeboModel, GazeboServiceOption,
+                     InstallationServiceOption, InstallationType, Location,
+                     ServiceCategory, ServiceType,
                      TVMountingOption, Order, OrderItem)
 
 # Create your views here.
 
 
+@require_safe
+def content_addressed_media(request, path):
+    """
+    Serves files of the content-addressed storage with long-lived caching headers.
+
+    Names of uploads are derived from the file content, so their URL never changes meaning.
+    Derivatives are named after their source and can be regenerated with other settings, so
+    they are only cached for ``SERVICES_DERIVATIVE_MAX_AGE`` seconds, revalidated by an ETag
+    of their size and modification time. In production the same headers should be set by
+    the web server in front of MEDIA_ROOT.
+    """
+    name = posixpath.normpath(f'cas/{path}')
+    derivative = is_derivative_name(name)
+    storage = get_derivative_storage(default_storage) if derivative else default_storage
+    if not name.startswith('cas/') or not storage.exists(name):
+        raise Http404
+    if derivative:
+        modified = storage.get_modified_time(name).timestamp()
+        etag = f'"{posixpath.basename(name)}-{storage.size(name)}-{int(modified * 1000)}"'
+        cache_control = f'public, max-age={getattr(settings, "SERVICES_DERIVATIVE_MAX_AGE", 60 * 60 * 24)}'
+    else:
+        etag = f'"{posixpath.basename(name)}"'
+        cache_control = 'public, max-age=31536000, immutable'
+    if request.headers.get('If-None-Match') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = FileResponse(storage.open(name, 'rb'))
+    response['ETag'] = etag
+    response['Cache-Control'] = cache_control
+    return response
+
+
+def filter_orders(queryset, query_params, prefix=''):
+    """
+    Applies the ``user``, ``status``, ``created_after`` and ``created_before`` filters to
+    an Order queryset, or to a queryset related to Order through ``prefix``.
+    """
+    params = OrderFilterSerializer(data=query_params)
+    params.is_valid(raise_exception=True)
+    filters = params.validated_data
+    if 'user' in filters:
+        queryset = queryset.filter(**{f'{prefix}user_id': filters['user']})
+    if 'status' in filters:
+        queryset = queryset.filter(**{f'{prefix}status': filters['status']})
+    if 'created_after' in filters:
+        queryset = queryset.filter(created_at__gte=filters['created_after'])
+    if 'created_before' in filters:
+        queryset = queryset.filter(created_at__lt=filters['created_before'])
+    return queryset
+
+
+# Every model rendered in the category tree.
+CATEGORY_TREE_DEPENDENCIES = (ServiceCategory, *SERVICE_OPTION_MODELS, Location, ServiceType, AssemblyType,
+                              InstallationType, GazeboModel)
+
+
+def category_tree(request):
+    """
+    Serializes every category with its options and their lookups.
+
+    The categories and each type of option are loaded with one query, so the tree costs five
+    queries however many categories and options there are.
+    """
+    context = {'request': request, 'expand': CATEGORY_TREE_EXPAND}
+    queryset = optimize_queryset(ServiceCategory.objects.order_by('name'), CategoryTreeSerializer(context=context))
+    return CategoryTreeSerializer(queryset, many=True, context=context).data
+
+
 def service_list(request):
-    categories = ServiceCategory.objects.prefetch_related('services').all()
+    tree = cached_value('service-list', request, CATEGORY_TREE_DEPENDENCIES, lambda: category_tree(request))
+    categories = []
+    for category in tree:
+        groups = []
+        for name, model in zip(('tv_mounting_options', 'furniture_assembly_options', 'installation_service_options',
+                                'gazebo_service_options'), SERVICE_OPTION_MODELS):
+            options = [
+                {**option, 'lookups': [value['name'] for value in option.values() if isinstance(value, dict) and 'name' in value]}
+                for option in category[name]
+            ]
+            if options:
+                groups.append({'label': model._meta.verbose_name_plural, 'options': options})
+        categories.append({**category, 'groups': groups})
     return render(request, 'services/list.html', {'categories': categories})
 
 
-class ServiceCategoryViewSet(viewsets.ModelViewSet):
+class ServiceCategoryViewSet(CachedCatalogMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for listing and retrieving Service Categories.
     """
     queryset = ServiceCategory.objects.all()
     serializer_class = ServiceCategorySerializer
+    cache_dependencies = (ServiceCategory,)
 
 
-class TVMountingOptionViewSet(viewsets.ModelViewSet):
+class TVMountingOptionViewSet(FacetFilterMixin, CachedCatalogMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
-    ViewSet for managing TV Mounting Options.
+    ViewSet for managing TV Mounting Options, filterable by ``wall_type``, ``bracket`` and ``needs``.
     """
     queryset = TVMountingOption.objects.all()
     serializer_class = TVMountingOptionSerializer
+    cache_dependencies = (TVMountingOption,)
 
 
-class FurnitureAssemblyOptionViewSet(viewsets.ModelViewSet):
+class FurnitureAssemblyOptionViewSet(FacetFilterMixin, CachedCatalogMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
-    ViewSet for managing Furniture Assembly Options.
+    ViewSet for managing Furniture Assembly Options, filterable by ``location``, ``service_type``
+    and ``assembly_type``.
     """
     queryset = FurnitureAssemblyOption.objects.all()
     serializer_class = FurnitureAssemblyOptionSerializer
+    cache_dependencies = (FurnitureAssemblyOption, Location, ServiceType, AssemblyType)
 
 
-class InstallationServiceOptionViewSet(viewsets.ModelViewSet):
+class InstallationServiceOptionViewSet(FacetFilterMixin, CachedCatalogMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
-    ViewSet for managing Installation Service Options.
+    ViewSet for managing Installation Service Options, filterable by ``installation_type`` and
+    ``power_nearby``.
     """
     queryset = InstallationServiceOption.objects.all()
     serializer_class = InstallationServiceOptionSerializer
+    cache_dependencies = (InstallationServiceOption, InstallationType)
 
 
-class GazeboServiceOptionViewSet(viewsets.ModelViewSet):
+class GazeboServiceOptionViewSet(FacetFilterMixin, CachedCatalogMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
-    ViewSet for managing Gazebo Service Options.
+    ViewSet for managing Gazebo Service Options, filterable by ``size``, ``action`` and ``gazebo_model``.
     """
     queryset = GazeboServiceOption.objects.all()
     serializer_class = GazeboServiceOptionSerializer
+    cache_dependencies = (GazeboServiceOption, GazeboModel)
 
 
-class CartViewSet(viewsets.ModelViewSet):
+class ServiceCatalogViewSet(viewsets.ViewSet):
+    """
+    Read-only catalog merging the options of every service type into one paginated list.
+
+    Supports ``category``, ``min_price`` and ``max_price`` filters and ``ordering`` by
+    ``price``/``title`` (prefix with ``-`` for descending).
+    """
+    pagination_class = CatalogCursorPagination
+    cache_dependencies = SERVICE_OPTION_MODELS
+
+    def list(self, request):
+        return cached_response(self, request, self._list)
+
+    def _list(self, request):
+        params = CatalogQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        filters = dict(params.validated_data)
+        ordering = filters.pop('ordering')
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_branches(
+            catalog_branches(**filters),
+            sort_field=CATALOG_ORDERINGS[ordering.lstrip('-')],
+            descending=ordering.startswith('-'),
+            request=request,
+        )
+        serializer = CatalogEntrySerializer(page, many=True, context={'request': request})
+        return paginator.get_paginated_response(serializer.data)
+
+
+class CategoryTreeView(APIView):
+    """
+    Returns every service category with all of its options, their prices and nested lookups.
+    """
+    basename = 'category-tree'
+    cache_dependencies = CATEGORY_TREE_DEPENDENCIES
+
+    def get(self, request):
+        return cached_response(self, request, lambda request: Response(category_tree(request)))
+
+
+class CatalogCacheStatsView(APIView):
+    """
+    Reports the hit/miss counters of the cached catalog endpoints.
+    """
+    permission_classes = [IsAdminUser]
+    basenames = ('service-category', 'tv-mounting-option', 'furniture-assembly-option',
+                 'installation-service-option', 'gazebo-service-option', 'catalog', 'category-tree', 'service-list')
+
+    def get(self, request):
+        return Response(catalog_cache_stats(self.basenames))
+
+
+class SearchView(APIView):
+    """
+    Full-text search over the title, description and category, gazebo model or installation
+    type names of every service option, ranked and paginated.
+    """
+    pagination_class = SearchPagination
+
+    def get(self, request):
+        params = SearchQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        paginator = self.pagination_class()
+        page = paginator.paginate_search(params.validated_data['q'], request)
+        return paginator.get_paginated_response(SearchResultSerializer(page, many=True).data)
+
+
+class QuoteView(APIView):
+    """
+    Prices many candidate configurations of service options in one request.
+
+    Each configuration is returned with the unit price, price components and total of each
+    line and its overall total, priced the same way as cart items and checkout.
+    """
+
+    def post(self, request):
+        serializer = QuoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        configurations = [configuration['items'] for configuration in serializer.validated_data['configurations']]
+        return Response({'configurations': quote(configurations)})
+
+
+class CartViewSet(IdempotentMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing the Cart.
     """
     # permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        return Cart.objects \
-            .prefetch_related('items__service_option').all()
-
+    # Items are prefetched by SparseFieldsMixin and their service options resolved in bulk
+    # by the serializers, see resolve_service_options.
+    queryset = Cart.objects.all()
     serializer_class = CartSerializer
 
     # def perform_create(self, serializer):
     #     serializer.save(user=self.request.user)
 
+    @action(detail=True, methods=['post'])
+    def checkout(self, request, pk=None):
+        """
+        Converts the cart into an order with server-side prices and empties the cart.
+        """
+        order = checkout_cart(pk)
+        serializer = OrderSerializer(context=self.get_serializer_context())
+        serializer.instance = optimize_queryset(Order.objects.all(), serializer).get(pk=order.pk)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 
-class CartItemViewSet(viewsets.ModelViewSet):
+class CartItemViewSet(IdempotentMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Cart Items.
     """
     # permission_classes = [IsAuthenticated]
 
+    queryset = CartItem.objects.all()
+
     def get_queryset(self):
         cart_pk = self.kwargs.get('cart_pk', None)
-        qs = CartItem.objects.all()
+        qs = super().get_queryset()
         if cart_pk:
             qs = qs.filter(cart_id=cart_pk)
         return qs
@@ -97,36 +301,129 @@ class CartItemViewSet(viewsets.ModelViewSet):
             context['cart_id'] = cart_pk
         return context
     serializer_class = CartItemSerializer
+    bulk_max_items = 500
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request, cart_pk=None):
+        """
+        Adds a list of service options to the cart, adding to the quantity of items already in it.
+        """
+        if cart_pk is None:
+            return Response({'detail': 'Bulk adds are only available under cart/<pk>/items/.'},
+                            status=status.HTTP_404_NOT_FOUND)
+        entries = CartItemBulkSerializer(data=request.data, many=True, max_length=self.bulk_max_items,
+                                         allow_empty=False)
+        entries.is_valid(raise_exception=True)
+        items = add_cart_items(cart_pk, entries.validated_data)
+        serializer = CartItemSerializer(items, many=True, context=self.get_serializer_context())
+        return Response(serializer.data)
 
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(IdempotentMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Orders.
+
+    Creating orders and the other writes accept an ``Idempotency-Key`` header, so clients can
+    retry them safely, see IdempotentMixin.
     """
-    queryset = Order.objects.prefetch_related('items').select_related('user', 'cart')
+    queryset = Order.objects.all()
     serializer_class = OrderSerializer
+    pagination_class = OrderCursorPagination
     # permission_classes = [IsAuthenticated]
 
+    def get_queryset(self):
+        return filter_orders(super().get_queryset(), self.request.query_params)
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """
+        Streams the filtered orders with their items as CSV or NDJSON (``?fmt=csv|ndjson``).
+
+        The export is read while the response streams, so it has no query budget: see
+        ``services.middleware.QueryCountMiddleware``.
+        """
+        fmt = request.query_params.get('fmt', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            return Response({'fmt': [f'Must be one of: {", ".join(EXPORT_FORMATS)}.']},
+                            status=status.HTTP_400_BAD_REQUEST)
+        encode, content_type = EXPORT_FORMATS[fmt]
+        orders = export_orders(filter_orders(Order.objects.all(), request.query_params))
+        response = StreamingHttpResponse(encode(orders), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="orders.{fmt}"'
+        return response
+
+    def transition_response(self, pk, transition):
+        # transition_order raises Http404 itself, so the order is only read once, to render it.
+        # Relations are embedded only when ?expand= asks for them: the reply to a status change
+        # does not need the options of the items.
+        try:
+            pk = Order._meta.pk.to_python(pk)
+        except DjangoValidationError:
+            raise Http404
+        transition_order(pk, transition)
+        context = self.get_serializer_context()
+        context.setdefault('expand', self.request.query_params.get('expand', ''))
+        serializer = OrderSerializer(context=context)
+        serializer.instance = optimize_queryset(Order.objects.all(), serializer).get(pk=pk)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'])
+    def pay(self, request, pk=None):
+        """
+        Marks a pending order as paid.
+        """
+        return self.transition_response(pk, 'pay')
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """
+        Cancels a pending or paid order.
+        """
+        return self.transition_response(pk, 'cancel')
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        """
+        Marks a paid order as completed.
+        """
+        return self.transition_response(pk, 'complete')
+
+    @action(detail=False, methods=['post'], url_path='bulk-transition', permission_classes=[IsAdminUser])
+    def bulk_transition(self, request):
+        """
+        Applies one transition to many orders (``{"transition": "complete", "ids": [...]}``) and
+        reports how many were moved and why the others were not.
+        """
+        params = OrderBulkTransitionSerializer(data=request.data)
+        params.is_valid(raise_exception=True)
+        updated, failed = bulk_transition_orders(params.validated_data['ids'], params.validated_data['transition'])
+        return Response({
+            'transition': params.validated_data['transition'],
+            'updated': updated,
+            'failed': [{'id': pk, 'detail': detail} for pk, detail in sorted(failed.items())],
+        })
+
     def perform_create(self, serializer):
         # Optionally set user from request if using authentication
         # serializer.save(user=self.request.user)
         serializer.save()
 
 
-class OrderItemViewSet(viewsets.ModelViewSet):
+class OrderItemViewSet(IdempotentMixin, SparseFieldsMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Order Items.
     """
-    queryset = OrderItem.objects.select_related('order', 'content_type')
+    queryset = OrderItem.objects.all()
     serializer_class = OrderItemSerializer
+    pagination_class = OrderCursorPagination
     # permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
         order_pk = self.kwargs.get('order_pk', None)
-        qs = OrderItem.objects.all().select_related('order', 'content_type')
+        qs = super().get_queryset()
         if order_pk:
             qs = qs.filter(order_id=order_pk)
-        return qs
+        return filter_orders(qs, self.request.query_params, prefix='order__')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()